@@ -25,4 +25,8 @@ CLIENT_ID_GUI_STOCK = 101
 CLIENT_ID_GUI_OPTION = 102
 CLIENT_ID_GUI_GENERAL = 103  # If GUI needs another general purpose connection
 
-
+# --- Contract Cache ---
+# Qualified contracts (conId, primary exchange, trading class, multiplier) are cached on disk
+# and reused for this many days, so each run does not re-qualify the same symbols.
+CONTRACT_CACHE_PATH = 'data/ibkr_contract_cache.json'
+CONTRACT_CACHE_TTL_DAYS = 7.0
@@ -10,15 +10,19 @@ behavior of the trading engine without requiring code changes in the core logic.
 from typing import Literal, Dict
 
 # --- Strategy Selection ---
-# This can be set by the execution script. Default is 'CORE'.
+# The default strategy when a run does not name one explicitly. Default is 'CORE'.
 STRATEGY_NAME: Literal['CORE', 'SMOOTH', 'FROG_IN_PAN'] = 'CORE'
 
 
 # --- Rebalancing Parameters ---
-# Defines the frequency of portfolio rebalancing.
-# This setting is primarily for live execution logic.
-REBALANCE_PERIOD: Literal['QUARTERLY', 'MONTHLY'] = 'QUARTERLY'
+# Defines the frequency of portfolio rebalancing of the MONTHLY timeframe, in live runs and backtests:
+# every month by default, or every quarter if set to 'QUARTERLY'. DAILY and WEEKLY portfolios rebalance
+# every day or week.
+REBALANCE_PERIOD: Literal['QUARTERLY', 'MONTHLY'] = 'MONTHLY'
+# The trading day of the week, month or quarter to rebalance on (1 = the first, -1 = the last).
 REBALANCE_DAY_OF_PERIOD: int = 1
+# The exchange holidays that are not trading days (one 'date' per row).
+EXCHANGE_HOLIDAYS_CSV_PATH: str = "data/exchange_holidays.csv"
 
 
 # --- Momentum Calculation Parameters ---
@@ -44,9 +48,22 @@ MOMENTUM_LAGS: Dict[str, int] = {
 # The percentage of top-ranked stocks to include in the target portfolio.
 TOP_PERCENTILE_CUTOFF: float = 0.025
 
+# How the top/bottom selection treats sectors. 'NONE' ranks the whole universe at once;
+# 'NEUTRAL' picks the best and worst names within each sector, with each sector's share of
+# the picks proportional to its share of the eligible stocks; 'CAPPED' ranks the whole
+# universe but takes at most MAX_NAMES_PER_SECTOR longs (and shorts) from any one sector.
+SECTOR_RANKING_MODE: Literal['NONE', 'NEUTRAL', 'CAPPED'] = 'NONE'
+MAX_NAMES_PER_SECTOR: int = 5
+
 # The percentage of bottom market cap stocks to exclude for liquidity reasons.
 LIQUIDITY_FILTER_PERCENTILE: float = 0.0
 
+# The measure the liquidity filter ranks on. 'MARKET_CAP' requires the per-ticker
+# market cap crawl; 'DOLLAR_VOLUME' uses the average daily Close x Volume computed
+# from the cached price history and skips the crawl entirely.
+LIQUIDITY_MEASURE: Literal['MARKET_CAP', 'DOLLAR_VOLUME'] = 'MARKET_CAP'
+DOLLAR_VOLUME_LOOKBACK_DAYS: int = 20
+
 
 # --- Strategy-Specific Filter Parameters ---
 
@@ -64,10 +81,54 @@ VOLATILITY_CUTOFF_PERCENTILE: float = 0.85
 
 # --- Universe & Data Parameters ---
 UNIVERSE_TICKERS_CSV_PATH: str = "data/ticker_list.csv"
+# Where historical prices and company info come from: 'YFINANCE' (network),
+# 'LOCAL' (the on-disk caches only) or 'SYNTHETIC' (generated data for load tests).
+DATA_SOURCE: Literal['YFINANCE', 'LOCAL', 'SYNTHETIC'] = 'YFINANCE'
+# Size and seed of the generated universe when DATA_SOURCE is 'SYNTHETIC'.
+SYNTHETIC_NUM_TICKERS: int = 1000
+SYNTHETIC_NUM_YEARS: int = 5
+SYNTHETIC_SEED: int = 42
 YFINANCE_DATA_PERIOD: str = "2y"
+# 'INCREMENTAL' extends a stale price cache with the missing bars only (and backfills
+# tickers that are new to the universe); 'FULL' re-downloads the entire period.
+HISTORICAL_DATA_REFRESH_MODE: Literal['INCREMENTAL', 'FULL'] = 'INCREMENTAL'
+# Historical downloads are split into shards of this many tickers, downloaded by a
+# bounded worker pool and written to the price store as each shard completes.
+# Failed shards (only) are retried with exponential backoff.
+DOWNLOAD_SHARD_SIZE: int = 100
+DOWNLOAD_MAX_WORKERS: int = 8
+DOWNLOAD_MAX_RETRIES: int = 2
+DOWNLOAD_RETRY_BACKOFF_S: float = 5.0
 SECTORS_TO_EXCLUDE: list[str] = ["Financial Services", "Financials"]
 
+# --- Company Info (Market Cap) Fetching ---
+# Each cached market cap is re-fetched once it is older than this many days.
+COMPANY_INFO_TTL_DAYS: float = 7.0
+# Market caps are fetched by a bounded worker pool sharing a single rate limit.
+COMPANY_INFO_MAX_WORKERS: int = 8
+COMPANY_INFO_REQUESTS_PER_SECOND: float = 10.0
+# Failed lookups are retried with exponential backoff starting at this delay.
+COMPANY_INFO_MAX_RETRIES: int = 3
+COMPANY_INFO_RETRY_BACKOFF_S: float = 1.0
+
 # --- Execution Parameters ---
 ORDER_TYPE: Literal['MKT', 'LMT'] = 'MKT'
-DELAY_BETWEEN_BUYS_S: float = 1.0
-EXECUTE_ORDERS_OUTSIDE_RTH: bool = False
\ No newline at end of file
+# Rebalancing resizes every position to its equal target weight. Quantities are rounded down to whole
+# lots, and resizes worth less than MIN_TRADE_FRACTION of the portfolio value are skipped (opening and
+# closing positions always trades).
+ORDER_LOT_SIZE: int = 1
+MIN_TRADE_FRACTION: float = 0.005
+# Orders are submitted concurrently, paced by a token bucket below IB's limit of 50 API messages per second.
+# A burst plus one second of refill (5 + 40) stays under the limit in any one-second window.
+ORDER_MESSAGES_PER_SECOND: float = 40.0
+ORDER_MESSAGE_BURST: int = 5
+# The maximum number of orders awaiting their submission confirmation at once.
+MAX_ORDERS_IN_FLIGHT: int = 20
+# How long to wait for submitted orders to fill. Only fills received by then are booked in the portfolio states.
+ORDER_FILL_TIMEOUT_S: float = 60.0
+EXECUTE_ORDERS_OUTSIDE_RTH: bool = False
+
+# --- Backtest Parameters ---
+# Years of history loaded for backtests (run_backtest.py), and the starting capital.
+BACKTEST_YEARS: int = 20
+BACKTEST_INITIAL_CASH: float = 10000.0
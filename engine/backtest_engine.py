@@ -0,0 +1,372 @@
+# engine/backtest_engine.py
+"""
+Backtest Engine for the Quantitative Momentum Trading System.
+
+Replays a strategy over the historical data, rebalancing on the same trading
+days as the live run (see engine/rebalance_calendar.py). Instead of running a PortfolioConstructor
+per rebalance date, the signals (momentum, smoothness, volatility and dollar
+volume) are computed once for every date as point-in-time matrices by the
+FeatureStore. Each rebalance date then applies the constructor's CORE, SMOOTH
+or FROG_IN_PAN rules to a single row of those matrices and sizes the trades
+the way ExecutionManager does.
+"""
+
+import logging
+import warnings
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from engine import signals
+from engine.feature_store import FeatureStore
+from engine.portfolio_constructor import StrategyParameters, select_extremes
+from engine.rebalance_calendar import RebalanceCalendar, rebalance_period
+from engine.rebalance_engine import equal_target_weights, rebalance_deltas
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BacktestResult:
+    """
+    The outcome of a backtest run.
+
+    Attributes:
+        strategy (str): The strategy that was replayed.
+        timeframe (str): The rebalancing and signal timeframe.
+        equity (pd.Series): The portfolio value on every trading day.
+        trades (pd.DataFrame): One row per simulated order ('Date', 'Ticker', 'Action', 'Quantity', 'Price').
+        holdings (Dict[pd.Timestamp, Dict[str, List[str]]]): The target 'longs' and 'shorts' of each rebalance.
+    """
+    strategy: str
+    timeframe: str
+    equity: pd.Series
+    trades: pd.DataFrame
+    holdings: Dict[pd.Timestamp, Dict[str, List[str]]] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Calculates headline performance statistics from the equity curve.
+
+        Returns:
+            Dict[str, float]: Total return, CAGR, annualized volatility, Sharpe ratio
+                              (zero risk-free rate), maximum drawdown and trade counts.
+        """
+        equity = self.equity.dropna()
+        if len(equity) < 2 or equity.iloc[0] <= 0:
+            return {}
+        daily_returns = equity.pct_change().dropna()
+        years = (equity.index[-1] - equity.index[0]).days / 365.25
+        total_return = equity.iloc[-1] / equity.iloc[0] - 1.0
+        annual_vol = daily_returns.std() * np.sqrt(252)
+        return {
+            'total_return': float(total_return),
+            'cagr': float((1.0 + total_return) ** (1.0 / years) - 1.0) if years > 0 and total_return > -1 else np.nan,
+            'annual_volatility': float(annual_vol),
+            'sharpe': float(daily_returns.mean() * 252 / annual_vol) if annual_vol > 0 else np.nan,
+            'max_drawdown': float((equity / equity.cummax() - 1.0).min()),
+            'num_rebalances': float(len(self.holdings)),
+            'num_trades': float(len(self.trades)),
+        }
+
+
+@dataclass
+class RankHistory:
+    """
+    Cross-sectional momentum rankings on every rebalance date.
+
+    Attributes:
+        strategy (str): The strategy whose filters decide eligibility.
+        timeframe (str): The rebalancing and signal timeframe.
+        ranks (pd.DataFrame): (rebalance date x ticker) momentum ranks among the eligible stocks (1 = best, NaN = not eligible).
+        deciles (pd.DataFrame): (rebalance date x ticker) momentum deciles (1 = best), as in the portfolio report.
+        turnover (pd.DataFrame): Per rebalance date: the number of eligible stocks, the size of each leg and each
+                                 leg's turnover (sum of absolute equal-weight changes; 2.0 = fully replaced).
+    """
+    strategy: str
+    timeframe: str
+    ranks: pd.DataFrame
+    deciles: pd.DataFrame
+    turnover: pd.DataFrame
+
+    def estimated_costs(self, cost_per_unit_traded: float) -> pd.Series:
+        """
+        Estimates the trading cost of every rebalance as a fraction of the
+        portfolio value, assuming the long and short legs are equally sized.
+
+        Args:
+            cost_per_unit_traded (float): The cost per unit of value traded (e.g., 0.001 for 10 bps).
+
+        Returns:
+            pd.Series: The estimated cost of each rebalance date.
+        """
+        # Each leg holds half of the gross exposure.
+        traded = 0.5 * (self.turnover['long_turnover'] + self.turnover['short_turnover'])
+        return (traded * cost_per_unit_traded).rename('estimated_cost')
+
+
+class BacktestEngine:
+    """
+    Walks a strategy forward through the historical data using precomputed
+    signal matrices.
+    """
+    def __init__(self, historical_data: pd.DataFrame, company_info: Dict[str, Dict], config: Any,
+                 features: Optional[FeatureStore] = None, calendar: Optional[RebalanceCalendar] = None):
+        """
+        Initializes the BacktestEngine.
+
+        Args:
+            historical_data (pd.DataFrame): DataFrame with historical OHLCV data.
+            company_info (Dict[str, Dict]): Dictionary with 'marketCap' and 'sector'.
+            config (Any): Configuration module with strategy parameters.
+            features (Optional[FeatureStore]): A feature store over `historical_data`, e.g., shared
+                                               with other backtests. Defaults to a private store.
+            calendar (Optional[RebalanceCalendar]): The exchange calendar of the rebalance dates. Defaults
+                                                    to one built from EXCHANGE_HOLIDAYS_CSV_PATH.
+        """
+        self.historical_data = historical_data
+        self.company_info = company_info
+        self.config = config
+        self.features = features or FeatureStore(historical_data)
+        self.calendar = calendar or RebalanceCalendar.from_csv(config.EXCHANGE_HOLIDAYS_CSV_PATH,
+                                                               start=historical_data.index[0],
+                                                               end=historical_data.index[-1])
+        self.tickers = historical_data['Adj Close'].columns
+        logger.info(f"BacktestEngine initialized with {len(self.tickers)} tickers over {len(historical_data)} days.")
+
+    def _static_universe(self) -> pd.DataFrame:
+        """
+        Returns the company info of the tickers that have a sector, in the
+        order the constructor sees them. Market caps are today's values, so a
+        market cap liquidity filter carries look-ahead bias; the dollar volume
+        measure does not.
+        """
+        return pd.DataFrame.from_dict(self.company_info, orient='index').dropna(subset=['sector'])
+
+    @staticmethod
+    def _rows_values(matrix: pd.DataFrame, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Returns rows of a signal matrix for the given columns, with NaN for unpriced tickers (column -1)."""
+        values = matrix.to_numpy()[np.asarray(rows)[:, np.newaxis], np.clip(columns, 0, None)].astype('float64')
+        values[:, columns < 0] = np.nan
+        return values
+
+    @staticmethod
+    def _row_quantiles(values: np.ndarray, eligible: np.ndarray, q: float) -> np.ndarray:
+        """Returns the q-quantile of every row's eligible values, as a column (NaN for rows with none)."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanquantile(np.where(eligible, values, np.nan), q, axis=1)[:, np.newaxis]
+
+    def rebalance_dates(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> pd.DatetimeIndex:
+        """
+        Returns the calendar's rebalance days of the timeframe (see `rebalance_period`)
+        within the data, each moved to the next date with data if it has none.
+        """
+        index = self.historical_data.index
+        dates = self.calendar.rebalance_dates(rebalance_period(timeframe, self.config), self.config.REBALANCE_DAY_OF_PERIOD,
+                                              start=index[0], end=index[-1])
+        rows = index.searchsorted(dates)
+        return index[np.unique(rows[rows < len(index)])]
+
+    def _eligible(self, rows: np.ndarray, params: StrategyParameters, timeframe: str, universe: pd.DataFrame,
+                  columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Applies the portfolio construction filters to the given rows of the
+        signal matrices at once, in the same order as construct_portfolio.
+
+        Args:
+            rows (np.ndarray): The row positions of the rebalance dates.
+            params (StrategyParameters): The strategy and its parameters.
+            timeframe (str): The signal timeframe.
+            universe (pd.DataFrame): The static universe from `_static_universe`.
+            columns (np.ndarray): The signal matrix column of every universe ticker (-1 if unpriced).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The (row x universe ticker) eligibility mask and momentum.
+        """
+        if params.liquidity_measure == 'DOLLAR_VOLUME':
+            liquidity = self._rows_values(self.features.dollar_volume_history(params.dollar_volume_lookback_days), rows, columns)
+        else:
+            liquidity = np.broadcast_to(universe['marketCap'].to_numpy(dtype='float64'), (len(rows), len(universe)))
+        eligible = ~np.isnan(liquidity)
+        with np.errstate(invalid='ignore'):
+            eligible &= liquidity >= self._row_quantiles(liquidity, eligible, params.liquidity_filter_percentile)
+        eligible &= ~universe['sector'].str.strip().isin(params.sectors_to_exclude).to_numpy()
+
+        if params.strategy == 'FROG_IN_PAN':
+            volatility = self._rows_values(self.features.volatility_history(params.volatility_lookback_days), rows, columns)
+            eligible &= ~np.isnan(volatility)
+            with np.errstate(invalid='ignore'):
+                eligible &= volatility <= self._row_quantiles(volatility, eligible, params.volatility_cutoff_percentile)
+
+        lookback, lag = params.momentum_lookbacks[timeframe], params.momentum_lags[timeframe]
+        momentum = self._rows_values(self.features.momentum_history(timeframe, lookback, lag), rows, columns)
+        eligible &= ~np.isnan(momentum)
+
+        if params.strategy == 'SMOOTH':
+            positive_periods = self._rows_values(self.features.positive_periods_history(timeframe, lookback), rows, columns)
+            eligible &= (momentum > 0) & (positive_periods >= params.smoothness_min_positive_periods)
+        return eligible, momentum
+
+    def _select(self, row: int, params: StrategyParameters, timeframe: str, universe: pd.DataFrame,
+                columns: np.ndarray) -> Dict[str, List[str]]:
+        """
+        Applies the portfolio construction rules to one date's row of the
+        signal matrices.
+
+        Args:
+            row (int): The row position of the rebalance date.
+            params (StrategyParameters): The strategy and its parameters.
+            timeframe (str): The signal timeframe.
+            universe (pd.DataFrame): The static universe from `_static_universe`.
+            columns (np.ndarray): The signal matrix column of every universe ticker (-1 if unpriced).
+
+        Returns:
+            Dict[str, List[str]]: The 'longs' and 'shorts' of the target portfolio.
+        """
+        eligible, momentum = self._eligible(np.array([row]), params, timeframe, universe, columns)
+        candidates = np.flatnonzero(eligible[0])
+        if len(candidates) == 0:
+            return {'longs': [], 'shorts': []}
+        names = universe.index.to_numpy()[candidates]
+        long_positions, short_positions = select_extremes(momentum[0, candidates], universe['sector'].to_numpy()[candidates], params)
+        return {'longs': names[long_positions].tolist(), 'shorts': names[short_positions].tolist()}
+
+    def rank_history(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], strategy: Optional[str] = None,
+                     start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> RankHistory:
+        """
+        Ranks the eligible stocks on every rebalance date at once and derives
+        the turnover of the long and short legs, without replaying the trades.
+
+        The filters of the strategy are applied to all rebalance dates as one
+        mask, and the momentum ranks come from a single row-wise argsort. With
+        SECTOR_RANKING_MODE 'NONE' the legs follow directly from the ranks;
+        the sector-aware modes select each date's legs with select_extremes.
+
+        Args:
+            timeframe (str): The rebalancing and signal timeframe ('DAILY', 'WEEKLY', 'MONTHLY').
+            strategy (Optional[str]): 'CORE', 'SMOOTH' or 'FROG_IN_PAN'. Defaults to config.STRATEGY_NAME.
+            start (Optional[pd.Timestamp]): The first rebalance date to include.
+            end (Optional[pd.Timestamp]): The last rebalance date to include.
+
+        Returns:
+            RankHistory: The rank, decile and turnover histories.
+        """
+        params = StrategyParameters.from_config(self.config, strategy)
+        dates = self.rebalance_dates(timeframe)
+        if start is not None:
+            dates = dates[dates >= pd.Timestamp(start)]
+        if end is not None:
+            dates = dates[dates <= pd.Timestamp(end)]
+        universe = self._static_universe()
+        columns = self.tickers.get_indexer(universe.index)
+        rows = self.historical_data.index.get_indexer(dates)
+
+        eligible, momentum = self._eligible(rows, params, timeframe, universe, columns)
+        ranks = signals.cross_sectional_ranks(np.where(eligible, momentum, np.nan))
+        deciles = signals.rank_deciles(ranks)
+
+        counts = eligible.sum(axis=1)
+        cutoff_n = np.where(counts > 0, np.maximum(1, (counts * params.top_percentile_cutoff).astype(np.int64)), 0)
+        if params.sector_ranking_mode == 'NONE':
+            with np.errstate(invalid='ignore'):
+                longs = ranks <= cutoff_n[:, np.newaxis]
+                shorts = ranks > (counts - cutoff_n)[:, np.newaxis]
+        else:
+            longs = np.zeros(eligible.shape, dtype=bool)
+            shorts = np.zeros(eligible.shape, dtype=bool)
+            sectors = universe['sector'].to_numpy()
+            for i in range(len(rows)):
+                candidates = np.flatnonzero(eligible[i])
+                long_positions, short_positions = select_extremes(momentum[i, candidates], sectors[candidates], params)
+                longs[i, candidates[long_positions]] = True
+                shorts[i, candidates[short_positions]] = True
+
+        tickers = pd.Index(universe.index, name='Ticker')
+        index = pd.DatetimeIndex(dates, name='Date')
+        turnover = pd.DataFrame({'eligible': counts, 'long_size': longs.sum(axis=1), 'short_size': shorts.sum(axis=1),
+                                 'long_turnover': signals.leg_turnover(longs), 'short_turnover': signals.leg_turnover(shorts)},
+                                index=index)
+        return RankHistory(strategy=params.strategy, timeframe=timeframe,
+                           ranks=pd.DataFrame(ranks, index=index, columns=tickers),
+                           deciles=pd.DataFrame(deciles, index=index, columns=tickers),
+                           turnover=turnover)
+
+    def run(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], strategy: Optional[str] = None,
+            initial_cash: float = 10000.0, start: Optional[pd.Timestamp] = None,
+            end: Optional[pd.Timestamp] = None) -> BacktestResult:
+        """
+        Replays the strategy and returns its equity curve and trades.
+
+        Positions are sized like ExecutionManager.calculate_rebalance_orders
+        (see engine/rebalance_engine.py): every position is brought to an equal
+        share of the portfolio value, rounded down to whole lots, closing
+        holdings that left the target and skipping small resizes. Trades
+        execute at the adjusted close of the rebalance date.
+
+        Args:
+            timeframe (str): The rebalancing and signal timeframe ('DAILY', 'WEEKLY', 'MONTHLY').
+            strategy (Optional[str]): 'CORE', 'SMOOTH' or 'FROG_IN_PAN'. Defaults to config.STRATEGY_NAME.
+            initial_cash (float): The starting cash.
+            start (Optional[pd.Timestamp]): The first date to trade on. Defaults to the first date.
+            end (Optional[pd.Timestamp]): The last date to simulate. Defaults to the last date.
+
+        Returns:
+            BacktestResult: The equity curve, trades and target holdings.
+        """
+        params = StrategyParameters.from_config(self.config, strategy)
+        strategy = params.strategy
+        logger.info(f"--- Starting backtest for strategy: {strategy}, Timeframe: {timeframe} ---")
+
+        index = self.historical_data.index
+        first_row = index.searchsorted(pd.Timestamp(start)) if start is not None else 0
+        last_row = index.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(index)
+        rebalance_rows = index.get_indexer(self.rebalance_dates(timeframe))
+        rebalance_rows = rebalance_rows[(rebalance_rows >= first_row) & (rebalance_rows < last_row)]
+
+        universe = self._static_universe()
+        columns = self.tickers.get_indexer(universe.index)
+        # Prices for valuation and execution; the last known price carries over missing bars.
+        prices = self.features.filled_prices()
+        valuation_prices = np.nan_to_num(prices)
+        ticker_names = self.tickers.to_numpy()
+
+        quantities = np.zeros(len(self.tickers), dtype=np.int64)
+        cash = float(initial_cash)
+        equity = np.full(len(index), np.nan)
+        trades: List[Dict[str, Any]] = []
+        holdings: Dict[pd.Timestamp, Dict[str, List[str]]] = {}
+
+        segment_ends = np.append(rebalance_rows[1:], last_row)
+        for row, segment_end in zip(rebalance_rows, segment_ends):
+            date = index[row]
+            target = self._select(row, params, timeframe, universe, columns)
+            holdings[date] = target
+            row_prices = prices[row]
+            total_value = cash + float(valuation_prices[row] @ quantities)
+
+            # Bring every position to its equal target weight of the pre-trade portfolio value.
+            weights = equal_target_weights(self.tickers, target)
+            deltas = rebalance_deltas(quantities, weights, row_prices, total_value, lot_size=self.config.ORDER_LOT_SIZE,
+                                      min_trade_fraction=self.config.MIN_TRADE_FRACTION)
+            traded = np.flatnonzero(deltas)
+            trades.extend({'Date': date, 'Ticker': ticker_names[i], 'Action': 'BUY' if deltas[i] > 0 else 'SELL',
+                           'Quantity': int(abs(deltas[i])), 'Price': row_prices[i]} for i in traded)
+            cash -= float(row_prices[traded] @ deltas[traded])
+            quantities += deltas
+
+            # Mark the positions to market until the next rebalance.
+            equity[row:segment_end] = cash + valuation_prices[row:segment_end] @ quantities
+
+        if len(rebalance_rows) > 0:
+            equity[first_row:rebalance_rows[0]] = initial_cash
+        else:
+            equity[first_row:last_row] = initial_cash
+
+        trades_df = pd.DataFrame(trades, columns=['Date', 'Ticker', 'Action', 'Quantity', 'Price'])
+        result = BacktestResult(strategy=strategy, timeframe=timeframe,
+                                equity=pd.Series(equity[first_row:last_row], index=index[first_row:last_row], name='Equity'),
+                                trades=trades_df, holdings=holdings)
+        logger.info(f"Backtest finished: {len(holdings)} rebalances, {len(trades_df)} trades.")
+        return result
@@ -0,0 +1,165 @@
+# engine/cache_manifest.py
+"""
+Cache Manifest for the Quantitative Momentum Trading System.
+
+The manifest records what the historical price store actually covers, instead
+of inferring freshness from file modification times:
+- Per-ticker coverage: the earliest date requested from the data source, the
+  last stored bar and the date of the last successful refresh.
+- Completed requests: content-addressed keys (a hash of the universe, the
+  required window and the interval) of fetches that were fully satisfied,
+  together with the day they were satisfied on.
+
+With this, a wider lookback only downloads the missing head of the history,
+and a second run on the same day with the same configuration does no work.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheManifest:
+    """
+    A thread-safe JSON manifest of the price store's per-ticker coverage.
+    Every update is written to disk immediately (atomically), so the coverage
+    of a partially completed download survives an interrupted run.
+    """
+    VERSION: int = 1
+
+    def __init__(self, path: str):
+        """
+        Loads the manifest from disk, or starts an empty one.
+
+        Args:
+            path (str): The path of the manifest JSON file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._coverage: Dict[str, Dict[str, Optional[str]]] = {}
+        self._completed: Dict[str, str] = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    manifest = json.load(f)
+                self._coverage = manifest.get('coverage', {})
+                self._completed = manifest.get('completed', {})
+            except Exception as e:
+                logger.error(f"Failed to read cache manifest {path}. Coverage will be rebuilt. Error: {e}")
+
+    @staticmethod
+    def make_key(tickers: Iterable[str], start: pd.Timestamp, interval: str) -> str:
+        """
+        Builds the content-addressed key of a fetch request.
+
+        Args:
+            tickers (Iterable[str]): The requested universe.
+            start (pd.Timestamp): The first date of the required window.
+            interval (str): The data interval.
+
+        Returns:
+            str: A hex digest that changes whenever the universe, window or interval changes.
+        """
+        payload = json.dumps({'tickers': sorted(set(tickers)), 'start': pd.Timestamp(start).strftime('%Y-%m-%d'),
+                              'interval': interval})
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def exists(self) -> bool:
+        """Checks whether the manifest has been written to disk."""
+        return os.path.exists(self.path)
+
+    def is_complete(self, key: str, as_of: pd.Timestamp) -> bool:
+        """Checks whether the request with the given key was fully satisfied on the as_of date."""
+        with self._lock:
+            return self._completed.get(key) == pd.Timestamp(as_of).strftime('%Y-%m-%d')
+
+    def mark_complete(self, key: str, as_of: pd.Timestamp) -> None:
+        """
+        Records that the request with the given key was fully satisfied on the
+        as_of date. Keys completed on earlier days are pruned.
+        """
+        as_of_str = pd.Timestamp(as_of).strftime('%Y-%m-%d')
+        with self._lock:
+            self._completed = {k: v for k, v in self._completed.items() if v == as_of_str}
+            self._completed[key] = as_of_str
+            self._save_unlocked()
+
+    def coverage(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Returns the recorded coverage.
+
+        Args:
+            tickers (Optional[List[str]]): The tickers to return. Defaults to all recorded tickers.
+                                           Tickers without coverage are omitted.
+
+        Returns:
+            pd.DataFrame: Indexed by 'Ticker' with 'start', 'end' and 'as_of' Timestamp columns (NaT if unknown).
+        """
+        with self._lock:
+            names = self._coverage.keys() if tickers is None else [t for t in tickers if t in self._coverage]
+            rows = {t: self._coverage[t] for t in names}
+        coverage = pd.DataFrame.from_dict(rows, orient='index', columns=['start', 'end', 'as_of'])
+        for column in coverage.columns:
+            coverage[column] = pd.to_datetime(coverage[column])
+        coverage.index.name = 'Ticker'
+        return coverage
+
+    def record(self, tickers: List[str], start: Optional[pd.Timestamp] = None,
+               last_dates: Optional[pd.Series] = None, as_of: Optional[pd.Timestamp] = None) -> None:
+        """
+        Extends the coverage of the given tickers and saves the manifest.
+
+        Args:
+            tickers (List[str]): The tickers that were downloaded.
+            start (Optional[pd.Timestamp]): The first date that was requested for them. Coverage
+                                            only ever widens, so a later start is ignored.
+            last_dates (Optional[pd.Series]): The last downloaded bar per ticker. Coverage only
+                                              ever extends, so an earlier date is ignored.
+            as_of (Optional[pd.Timestamp]): The day their history was brought up to date.
+        """
+        def as_str(value: Optional[pd.Timestamp]) -> Optional[str]:
+            return None if value is None or pd.isna(value) else pd.Timestamp(value).strftime('%Y-%m-%d')
+
+        start_str, as_of_str = as_str(start), as_str(as_of)
+        last_dates = last_dates if last_dates is not None else pd.Series(dtype='datetime64[ns]')
+        with self._lock:
+            for ticker in tickers:
+                entry = self._coverage.setdefault(ticker, {'start': None, 'end': None, 'as_of': None})
+                # ISO dates compare correctly as strings.
+                if start_str is not None and (entry['start'] is None or start_str < entry['start']):
+                    entry['start'] = start_str
+                end_str = as_str(last_dates.get(ticker))
+                if end_str is not None and (entry['end'] is None or end_str > entry['end']):
+                    entry['end'] = end_str
+                if as_of_str is not None:
+                    entry['as_of'] = as_of_str
+            self._save_unlocked()
+
+    def forget(self, tickers: List[str]) -> None:
+        """Removes the coverage of the given tickers (e.g., after their history was dropped)."""
+        with self._lock:
+            for ticker in tickers:
+                self._coverage.pop(ticker, None)
+            self._save_unlocked()
+
+    def reset(self) -> None:
+        """Clears all coverage and completed requests."""
+        with self._lock:
+            self._coverage = {}
+            self._completed = {}
+            self._save_unlocked()
+
+    def _save_unlocked(self) -> None:
+        """Writes the manifest atomically. Must be called with the lock held."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.VERSION, 'coverage': self._coverage, 'completed': self._completed}, f)
+        os.replace(tmp_path, self.path)
@@ -4,44 +4,76 @@ Data Manager for the Quantitative Momentum Trading System.
 
 This module is responsible for all data acquisition tasks, including:
 - Loading the initial stock universe from a CSV file.
-- Caching and retrieving historical price data.
-- Caching and retrieving company fundamental data (market cap, sector).
+- Caching and retrieving historical price data in a field/year partitioned store.
+- Caching and retrieving company fundamental data (market cap, sector), with a
+  per-ticker time-to-live so only stale entries are re-fetched.
 """
 
 import logging
 import os
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import time
 import json
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, NamedTuple
 
 # Assuming strategy_config is in the configs directory, accessible from the project root
 from configs import strategy_config
+from engine.cache_manifest import CacheManifest
+from engine.price_store import HistoricalPriceStore
+from engine.data_sources import DataSource, YFinanceDataSource
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+
+class _DownloadJob(NamedTuple):
+    """One shard of a historical data download: its tickers and the [start, end) window to fetch."""
+    tickers: List[str]
+    start: pd.Timestamp
+    end: Optional[pd.Timestamp] = None
+    # Updates start at the last stored bar, which is compared to detect restated histories.
+    is_update: bool = False
+
+
 class DataManager:
     """
     Handles fetching and managing all financial data, with a focus on daily caching
-    to minimize API calls to yfinance.
+    to minimize calls to the underlying data source (yfinance by default).
     """
-    def __init__(self, tickers_csv_path: str):
+    def __init__(self, tickers_csv_path: str, info_provider: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 data_source: Optional[DataSource] = None, cache_dir: Optional[str] = None):
         """
         Initializes the DataManager by loading the universe data from the specified CSV.
-        The CSV must contain 'Ticker' and 'Sector' columns.
+        The CSV must contain 'Ticker' and 'Sector' columns. Data sources that provide
+        their own universe (e.g., the synthetic generator) take precedence over the CSV.
 
         Args:
             tickers_csv_path (str): The file path to the CSV containing tickers and sectors.
+            info_provider (Optional[Callable]): Returns the info dictionary (with 'marketCap')
+                                                for a ticker. Defaults to `data_source.fetch_info`.
+            data_source (Optional[DataSource]): The backend to download data from.
+                                                Defaults to yfinance.
+            cache_dir (Optional[str]): The directory for the local caches. Defaults to the
+                                       data source's default cache directory.
         """
         self.tickers_csv_path = tickers_csv_path
+        self.data_source = data_source or YFinanceDataSource()
+        self.info_provider = info_provider or self.data_source.fetch_info
+        self.cache_dir = cache_dir or self.data_source.default_cache_dir
         self.universe_df = pd.DataFrame()
         self.universe_tickers: List[str] = []
         
         try:
-            self.universe_df = pd.read_csv(self.tickers_csv_path)
+            source_universe = self.data_source.load_universe()
+            if source_universe is not None:
+                self.universe_df = source_universe
+                logger.info(f"Using the universe provided by {self.data_source.__class__.__name__}.")
+            else:
+                self.universe_df = pd.read_csv(self.tickers_csv_path)
             if 'Ticker' not in self.universe_df.columns or 'Sector' not in self.universe_df.columns:
                 raise ValueError("CSV must contain 'Ticker' and 'Sector' columns.")
             
@@ -55,19 +87,25 @@ class DataManager:
         self.raw_historical_data: Optional[pd.DataFrame] = None
         self.company_info: Dict[str, Dict] = {}
         
-        # Define paths for both cache files
-        self.historical_data_cache_path = os.path.join('data', 'historical_data.parquet')
-        self.company_info_cache_path = os.path.join('data', 'company_info.json')
+        # Define paths for both caches. The single-file parquet cache is only read
+        # once, to migrate it into the partitioned price store.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.historical_data_cache_path = os.path.join(self.cache_dir, 'historical_data.parquet')
+        self.price_store = HistoricalPriceStore(os.path.join(self.cache_dir, 'historical_store'))
+        # The incremental DAILY signal state is checkpointed next to the daily price store.
+        self.signal_state_path = os.path.join(self.price_store.root_dir, 'signal_state_daily.npz')
+        self.company_info_cache_path = os.path.join(self.cache_dir, 'company_info.parquet')
+        self.legacy_company_info_cache_path = os.path.join(self.cache_dir, 'company_info.json')
 
         logger.info(f"DataManager initialized with {len(self.universe_tickers)} tickers from {tickers_csv_path}.")
 
-    def _get_required_fetch_period(self) -> str:
+    def _get_required_fetch_years(self) -> int:
         """
-        Calculates the required yfinance fetch period based on the longest lookback.
+        Calculates the number of years of history needed for the longest lookback.
         This makes the data fetching robust to changes in strategy lookback configs.
 
         Returns:
-            str: The period string for yfinance download (e.g., "2y", "3y").
+            int: The number of years of history required.
         """
         lookbacks = strategy_config.MOMENTUM_LOOKBACKS
         
@@ -83,96 +121,455 @@ class DataManager:
         fetch_years = int(np.ceil(max_years_required)) + 1
         
         logger.info(f"Determined that {fetch_years} years of data are needed to satisfy all lookback periods.")
-        return f"{fetch_years}y"
+        return fetch_years
+
+    def _get_required_start_date(self, history_years: Optional[int] = None) -> pd.Timestamp:
+        """
+        Args:
+            history_years (Optional[int]): A minimum number of years of history (e.g., for backtests).
+
+        Returns:
+            pd.Timestamp: The first date of the window required by the strategy lookbacks.
+        """
+        today = pd.Timestamp(datetime.today().date())
+        return today - pd.DateOffset(years=max(self._get_required_fetch_years(), history_years or 0))
+
+    def _download_history(self, tickers: List[str], interval: str, start: pd.Timestamp,
+                          end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        """
+        Downloads OHLCV data for the given tickers from the data source.
+
+        Args:
+            tickers (List[str]): The tickers to download.
+            interval (str): The data interval.
+            start (pd.Timestamp): The first date to download (inclusive).
+            end (Optional[pd.Timestamp]): The date to stop at (exclusive). Defaults to the latest bar.
+
+        Returns:
+            Optional[pd.DataFrame]: The downloaded data, or None if nothing was returned.
+        """
+        return self.data_source.download_history(tickers, interval=interval, start=start, end=end)
+
+    def _get_price_store(self, interval: str) -> HistoricalPriceStore:
+        """Returns the price store holding bars of the given interval."""
+        if interval == "1d":
+            return self.price_store
+        return HistoricalPriceStore(os.path.join(self.cache_dir, f'historical_store_{interval}'))
+
+    @staticmethod
+    def _last_bars(data: pd.DataFrame) -> pd.Series:
+        """Returns the date of the last non-NaN 'Adj Close' bar per ticker in a downloaded frame."""
+        if data.empty:
+            return pd.Series(dtype='datetime64[ns]')
+        return data['Adj Close'].apply(pd.Series.last_valid_index).dropna()
+
+    def _find_restated_tickers(self, cached_row: pd.Series, fresh: pd.DataFrame, overlap_date: pd.Timestamp) -> List[str]:
+        """
+        Compares the overlapping bar of the cached and freshly downloaded data.
+        yfinance re-adjusts the whole history after splits and dividends, so a
+        ticker whose overlapping prices no longer match must be re-downloaded in
+        full rather than appended to.
+
+        Args:
+            cached_row (pd.Series): The cached 'Adj Close' prices on the overlap date.
+            fresh (pd.DataFrame): The freshly downloaded data.
+            overlap_date (pd.Timestamp): The date present in both datasets.
+
+        Returns:
+            List[str]: The tickers whose cached history is no longer consistent.
+        """
+        if overlap_date not in fresh.index:
+            return []
+        fresh_row = fresh.loc[overlap_date, 'Adj Close'].reindex(cached_row.index)
+        deviation = (fresh_row / cached_row - 1.0).abs()
+        return deviation[deviation > 1e-4].index.tolist()
 
-    def fetch_historical_data(self, interval: str = "1d") -> Optional[pd.DataFrame]:
+    def _download_shard(self, store: HistoricalPriceStore, job: _DownloadJob,
+                        interval: str, required_start: pd.Timestamp) -> None:
         """
-        Fetches historical OHLCV data. It first checks for a fresh local cache
-        (from the same day) before downloading from yfinance. The download period
-        is dynamically determined by the strategy configurations.
+        Downloads one shard of tickers, merges it into the price store as soon
+        as it arrives and records the new coverage in the store's manifest.
+
+        For updates, the last stored bar is downloaded again: tickers whose
+        history was restated on that date (split or dividend) are dropped from
+        the store and backfilled over the whole required window.
+
+        Args:
+            store (HistoricalPriceStore): The store to write to.
+            job (_DownloadJob): The tickers and the window to download.
+            interval (str): The data interval.
+            required_start (pd.Timestamp): The first date of the required window, used for backfills.
+
+        Raises:
+            RuntimeError: If the data source returned no data for a backfill.
+        """
+        today = pd.Timestamp(datetime.today().date())
+        data = self._download_history(job.tickers, interval, start=job.start, end=job.end)
+        if data is None:
+            if job.end is not None:
+                # Nothing is listed before the stored history begins.
+                store.manifest.record(job.tickers, start=job.start)
+                return
+            if job.is_update:
+                # Delisted or halted tickers have no new bars; they are as up to date as the source allows.
+                logger.info(f"No new bars for {len(job.tickers)} tickers since {job.start.date()}; marking them up to date.")
+                store.manifest.record(job.tickers, as_of=today)
+                return
+            raise RuntimeError(f"No data returned for {len(job.tickers)} tickers since {job.start.date()}.")
+
+        restated: List[str] = []
+        if job.is_update:
+            stored_row = store.read(fields=['Adj Close'], start=job.start, end=job.start, tickers=job.tickers)
+            if stored_row is not None and not stored_row.empty:
+                restated = self._find_restated_tickers(stored_row['Adj Close'].iloc[-1], data, job.start)
+        if restated:
+            logger.info(f"{len(restated)} tickers had their history restated (split/dividend) and will be backfilled.")
+            data = data.drop(columns=restated, level='Ticker')
+            store.drop_tickers(restated)
+            backfill = self._download_history(restated, interval, start=required_start)
+            if backfill is not None:
+                store.write(backfill)
+                store.manifest.record(restated, start=required_start, last_dates=self._last_bars(backfill), as_of=today)
+
+        store.write(data)
+        store.manifest.record([t for t in job.tickers if t not in restated],
+                              start=None if job.is_update else job.start,
+                              last_dates=self._last_bars(data),
+                              as_of=today if job.end is None else None)
+
+    def _run_download_jobs(self, store: HistoricalPriceStore, jobs: List[_DownloadJob],
+                           interval: str, required_start: pd.Timestamp) -> List[str]:
+        """
+        Runs shard downloads concurrently with bounded parallelism. Each shard
+        is written to the store as soon as it completes, so a failed run keeps
+        everything downloaded so far; failed shards alone are retried.
+
+        Args:
+            store (HistoricalPriceStore): The store to write to.
+            jobs (List[_DownloadJob]): The shards to download.
+            interval (str): The data interval.
+            required_start (pd.Timestamp): The first date of the required window.
+
+        Returns:
+            List[str]: The tickers of shards that still failed after all retries.
+        """
+        pending = jobs
+        max_retries = strategy_config.DOWNLOAD_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            if attempt > 0:
+                backoff_s = strategy_config.DOWNLOAD_RETRY_BACKOFF_S * (2 ** (attempt - 1))
+                logger.info(f"Retrying {len(pending)} failed shards in {backoff_s:.0f}s (attempt {attempt}/{max_retries})...")
+                time.sleep(backoff_s)
+
+            failed: List[_DownloadJob] = []
+            with ThreadPoolExecutor(max_workers=strategy_config.DOWNLOAD_MAX_WORKERS) as executor:
+                futures = {executor.submit(self._download_shard, store, job, interval, required_start): job
+                           for job in pending}
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.warning(f"Shard of {len(futures[future].tickers)} tickers failed: {e}")
+                        failed.append(futures[future])
+                    logger.info(f"Progress: {completed}/{len(futures)} download shards finished.")
+            pending = failed
+
+        failed_tickers = [ticker for job in pending for ticker in job.tickers]
+        if failed_tickers:
+            logger.error(f"{len(failed_tickers)} tickers could not be downloaded after {max_retries} retries. "
+                         f"They will be retried on the next run.")
+        return failed_tickers
+
+    @staticmethod
+    def _make_shards(tickers: List[str], start: pd.Timestamp, end: Optional[pd.Timestamp] = None,
+                     is_update: bool = False) -> List[_DownloadJob]:
+        """Splits tickers into download jobs of at most DOWNLOAD_SHARD_SIZE tickers."""
+        size = strategy_config.DOWNLOAD_SHARD_SIZE
+        return [_DownloadJob(tickers[i:i + size], start, end, is_update) for i in range(0, len(tickers), size)]
+
+    def _refresh_historical_data(self, store: HistoricalPriceStore, interval: str,
+                                 required_start: pd.Timestamp) -> List[str]:
+        """
+        Brings the price store up to date with the universe and the required
+        window, downloading only what its manifest says is missing:
+        - Stored tickers not yet refreshed today fetch the bars after their own
+          last stored bar (so tickers left behind by a failed run catch up).
+        - Tickers without coverage are backfilled over the whole window.
+        - Tickers whose coverage starts after the window (e.g., because a
+          lookback was widened) fetch only the missing head of their history.
 
         Args:
+            store (HistoricalPriceStore): The store to refresh.
             interval (str): The data interval.
+            required_start (pd.Timestamp): The first date of the required window.
+
+        Returns:
+            List[str]: The tickers that could not be downloaded.
+        """
+        today = pd.Timestamp(datetime.today().date())
+        coverage = store.manifest.coverage(self.universe_tickers)
+        has_bars = coverage['end'].notna()
+        refreshed_today = coverage['as_of'] == today
+
+        jobs: List[_DownloadJob] = []
+        updates = coverage[has_bars & ~refreshed_today]
+        for start, group in updates.groupby('end'):
+            logger.info(f"Downloading bars since {start.date()} for {len(group)} stored tickers...")
+            jobs.extend(self._make_shards(group.index.tolist(), start, is_update=True))
+        covered = set(coverage.index[has_bars | refreshed_today])
+        new_tickers = [t for t in self.universe_tickers if t not in covered]
+        if new_tickers:
+            logger.info(f"Backfilling history since {required_start.date()} for {len(new_tickers)} new tickers...")
+            jobs.extend(self._make_shards(new_tickers, required_start))
+        failed_tickers = self._run_download_jobs(store, jobs, interval, required_start)
+
+        # Head gaps are planned after the updates, since restated tickers were backfilled in full.
+        coverage = store.manifest.coverage(self.universe_tickers)
+        head_gaps = coverage[coverage['end'].notna() & (coverage['start'] > required_start)]
+        head_jobs: List[_DownloadJob] = []
+        for covered_start, group in head_gaps.groupby('start'):
+            logger.info(f"Extending {len(group)} tickers back from {covered_start.date()} to {required_start.date()}...")
+            head_jobs.extend(self._make_shards(group.index.tolist(), required_start, end=covered_start))
+        return failed_tickers + self._run_download_jobs(store, head_jobs, interval, required_start)
+
+    def _migrate_legacy_cache(self) -> None:
+        """Imports the old single-file parquet cache into the partitioned price store."""
+        if self.price_store.exists() or not os.path.exists(self.historical_data_cache_path):
+            return
+        logger.info(f"Migrating legacy historical data cache {self.historical_data_cache_path} into the price store...")
+        self.price_store.write(pd.read_parquet(self.historical_data_cache_path))
+
+    def _bootstrap_manifest(self, store: HistoricalPriceStore) -> None:
+        """
+        Builds a manifest for a price store written before manifests existed.
+        Stored tickers are assumed to cover the store's whole date range and are
+        updated on the next refresh.
+        """
+        if store.manifest.exists() or not store.exists():
+            return
+        last_dates = store.last_dates()
+        logger.info(f"Recording the coverage of {len(last_dates)} tickers already in the price store...")
+        store.manifest.record(last_dates.index.tolist(), start=store.first_date(), last_dates=last_dates)
+
+    def fetch_historical_data(self, interval: str = "1d", fields: Optional[List[str]] = None,
+                              history_years: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Fetches historical OHLCV data. The required window is determined by the
+        strategy lookbacks, and the price store's manifest decides what is
+        missing: a request for the same universe, window and interval that was
+        already satisfied today is served from the cache without any download.
+        In 'INCREMENTAL' refresh mode only missing bars are downloaded; in
+        'FULL' mode the whole window is downloaded again.
+
+        Only the requested fields and the required date window are loaded from the store.
+
+        Args:
+            interval (str): The data interval.
+            fields (Optional[List[str]]): The price fields to load (e.g., ['Adj Close']).
+                                          Defaults to all stored fields.
+            history_years (Optional[int]): Widens the window to at least this many years
+                                           (e.g., for backtests). Defaults to the lookback window.
 
         Returns:
             Optional[pd.DataFrame]: The historical data DataFrame.
         """
-        if os.path.exists(self.historical_data_cache_path):
-            file_mod_time = datetime.fromtimestamp(os.path.getmtime(self.historical_data_cache_path))
-            if file_mod_time.date() == datetime.today().date():
-                logger.info(f"Loading fresh historical data from cache: {self.historical_data_cache_path}")
-                self.raw_historical_data = pd.read_parquet(self.historical_data_cache_path)
-                return self.raw_historical_data
+        store = self._get_price_store(interval)
+        if store is self.price_store:
+            self._migrate_legacy_cache()
+        self._bootstrap_manifest(store)
 
-        # Dynamically determine the required period
-        fetch_period = self._get_required_fetch_period()
-        logger.info(f"Cache not found or stale. Downloading {fetch_period} of fresh historical data from yfinance...")
-        
-        if not self.universe_tickers:
+        today = pd.Timestamp(datetime.today().date())
+        required_start = self._get_required_start_date(history_years)
+        request_key = CacheManifest.make_key(self.universe_tickers, required_start, interval)
+
+        if not self.data_source.refreshable:
+            logger.info(f"{self.data_source.__class__.__name__} is offline. Loading from the local price store only.")
+        elif store.manifest.is_complete(request_key, today):
+            logger.info(f"Price store at {store.root_dir} already covers this universe and window as of today. Loading from cache.")
+        elif not self.universe_tickers:
             logger.warning("Cannot fetch historical data: ticker universe is empty.")
             return None
+        else:
+            try:
+                if strategy_config.HISTORICAL_DATA_REFRESH_MODE == 'FULL':
+                    logger.info(f"Downloading fresh historical data since {required_start.date()} from the data source...")
+                    store.manifest.reset()
+                else:
+                    logger.info("Refreshing the price store incrementally from the data source...")
+                failed_tickers = self._refresh_historical_data(store, interval, required_start)
+                if not failed_tickers:
+                    store.manifest.mark_complete(request_key, today)
+                elif not store.exists():
+                    logger.warning("Data source download returned no data.")
+                    return None
+            except Exception as e:
+                logger.error(f"An error occurred during the historical data download: {e}", exc_info=True)
+                return None
+
+        data = store.read(fields=fields, start=required_start, tickers=self.universe_tickers)
+        if data is None or data.empty:
+            logger.warning("No historical data available in the price store.")
+            return None
+
+        self.raw_historical_data = data.dropna(axis=1, how='all')
+        logger.info(f"Loaded {self.raw_historical_data.shape[0]} rows of {sorted(set(self.raw_historical_data.columns.get_level_values('Price')))} "
+                    f"for {self.raw_historical_data.columns.get_level_values('Ticker').nunique()} tickers.")
+        return self.raw_historical_data
+
+    def _fetch_market_cap(self, ticker: str, rate_limiter: TokenBucket) -> Optional[float]:
+        """
+        Fetches the market cap of a single ticker, retrying failed requests with
+        exponential backoff. Every attempt draws from the shared rate limiter.
 
+        Args:
+            ticker (str): The ticker to look up.
+            rate_limiter (TokenBucket): The rate limiter shared by all workers.
+
+        Returns:
+            Optional[float]: The market cap, or None if the provider has none for this ticker.
+
+        Raises:
+            Exception: The last provider error if every attempt failed.
+        """
+        max_retries = strategy_config.COMPANY_INFO_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            rate_limiter.acquire()
+            try:
+                return self.info_provider(ticker).get('marketCap')
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                # Exponential backoff with jitter so throttled workers don't retry in lockstep
+                backoff_s = strategy_config.COMPANY_INFO_RETRY_BACKOFF_S * (2 ** attempt) * (1 + random.random())
+                logger.debug(f"Market cap request for {ticker} failed ({e}). Retrying in {backoff_s:.1f}s.")
+                time.sleep(backoff_s)
+        return None
+
+    def _fetch_market_caps(self, tickers: List[str],
+                           progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Optional[float]]:
+        """
+        Fetches market caps for many tickers with a bounded worker pool. All
+        workers share one token bucket, so the aggregate request rate never
+        exceeds COMPANY_INFO_REQUESTS_PER_SECOND.
+
+        Args:
+            tickers (List[str]): The tickers to look up.
+            progress_callback (Optional[Callable[[int, int], None]]): Called with
+                (completed, total) after each ticker finishes.
+
+        Returns:
+            Dict[str, Optional[float]]: The market cap of each successfully looked-up
+                                        ticker. Tickers whose lookup failed are omitted.
+        """
+        rate_limiter = TokenBucket(rate=strategy_config.COMPANY_INFO_REQUESTS_PER_SECOND)
+        market_caps: Dict[str, Optional[float]] = {}
+        total = len(tickers)
+
+        with ThreadPoolExecutor(max_workers=strategy_config.COMPANY_INFO_MAX_WORKERS) as executor:
+            futures = {executor.submit(self._fetch_market_cap, ticker, rate_limiter): ticker for ticker in tickers}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                ticker = futures[future]
+                try:
+                    market_caps[ticker] = future.result()
+                except Exception as e:
+                    logger.warning(f"Could not fetch market cap for ticker {ticker}: {e}")
+                if progress_callback:
+                    progress_callback(completed, total)
+        return market_caps
+
+    @staticmethod
+    def _log_progress(completed: int, total: int) -> None:
+        """Default progress callback for market cap fetching."""
+        if completed % 50 == 0 or completed == total:
+            logger.info(f"Progress: Fetched market cap for {completed}/{total} tickers.")
+
+    def _load_company_info_cache(self) -> pd.DataFrame:
+        """
+        Loads the per-ticker company info cache. If only the legacy JSON cache
+        exists, it is imported with its file modification time as fetch time.
+
+        Returns:
+            pd.DataFrame: Indexed by 'Ticker' with 'marketCap' and 'fetchedAt' columns.
+        """
+        empty_cache = pd.DataFrame({'marketCap': pd.Series(dtype='float64'),
+                                    'fetchedAt': pd.Series(dtype='datetime64[ns]')},
+                                   index=pd.Index([], name='Ticker', dtype='object'))
         try:
-            # Use the dynamically calculated period for the download
-            data = yf.download(self.universe_tickers, period=fetch_period, interval=interval, auto_adjust=False)
-            if data is None or data.empty:
-                logger.warning("yfinance download returned no data.")
-                return None
+            if os.path.exists(self.company_info_cache_path):
+                return pd.read_parquet(self.company_info_cache_path)
 
-            data = data.dropna(axis=1, how='all')
-            self.raw_historical_data = data
-            
-            logger.info(f"Saving fresh historical data to cache: {self.historical_data_cache_path}")
-            self.raw_historical_data.to_parquet(self.historical_data_cache_path)
-            return self.raw_historical_data
+            if os.path.exists(self.legacy_company_info_cache_path):
+                logger.info(f"Importing legacy company info cache from {self.legacy_company_info_cache_path}")
+                with open(self.legacy_company_info_cache_path, 'r') as f:
+                    legacy_info = json.load(f)
+                fetched_at = pd.Timestamp(datetime.fromtimestamp(os.path.getmtime(self.legacy_company_info_cache_path)))
+                cache = pd.DataFrame.from_dict(legacy_info, orient='index')[['marketCap']].astype('float64')
+                cache['fetchedAt'] = fetched_at
+                cache.index.name = 'Ticker'
+                return cache.dropna(subset=['marketCap'])
         except Exception as e:
-            logger.error(f"An error occurred during yfinance download: {e}", exc_info=True)
-            return None
+            logger.error(f"Failed to read the company info cache. All tickers will be re-fetched. Error: {e}")
+        return empty_cache
 
-    def fetch_company_info(self) -> Dict[str, Dict]:
+    def fetch_company_info(self, progress_callback: Optional[Callable[[int, int], None]] = None,
+                           include_market_cap: bool = True) -> Dict[str, Dict]:
         """
-        Fetches company info. Checks for a fresh local cache (from the same day)
-        before fetching market caps from yfinance. Sector data is always sourced
-        from the local CSV file.
+        Fetches company info. Every cached market cap carries its own fetch
+        time, and only tickers whose entry is missing or older than
+        COMPANY_INFO_TTL_DAYS are re-fetched from the data source. Sector data is
+        always sourced from the local CSV file.
+
+        Args:
+            progress_callback (Optional[Callable[[int, int], None]]): Called with
+                (completed, total) while market caps are fetched. Defaults to
+                logging progress every 50 tickers.
+            include_market_cap (bool): If False, the market cap crawl is skipped and
+                only sectors are returned (e.g., when liquidity is measured by dollar volume).
 
         Returns:
             Dict[str, Dict]: A dictionary containing 'marketCap' and 'sector' for each ticker.
         """
-        if os.path.exists(self.company_info_cache_path):
-            file_mod_time = datetime.fromtimestamp(os.path.getmtime(self.company_info_cache_path))
-            if file_mod_time.date() == datetime.today().date():
-                logger.info(f"Loading fresh company info from cache: {self.company_info_cache_path}")
-                with open(self.company_info_cache_path, 'r') as f:
-                    self.company_info = json.load(f)
-                return self.company_info
-        
-        logger.info("Company info cache not found or stale. Processing fresh info...")
-        info_df = self.universe_df.set_index('Ticker')['Sector'].to_dict()
-        final_info_dict = {ticker: {'sector': sector, 'marketCap': None} for ticker, sector in info_df.items()}
-
-        logger.info("Fetching market caps from yfinance...")
-        for i, ticker in enumerate(self.universe_tickers):
-            try:
-                if (i + 1) % 50 == 0:
-                    logger.info(f"Progress: Fetched market cap for {i+1}/{len(self.universe_tickers)} tickers.")
+        if not include_market_cap:
+            logger.info("Skipping market cap fetch. Company info will contain sectors only.")
+            sector_map = self.universe_df.set_index('Ticker')['Sector'].to_dict()
+            self.company_info = {ticker: {'sector': sector, 'marketCap': None} for ticker, sector in sector_map.items()}
+            return self.company_info
 
-                t = yf.Ticker(ticker)
-                market_cap = t.info.get('marketCap')
-                time.sleep(0.05) # Small delay to be polite to the API
+        cache = self._load_company_info_cache()
+        now = pd.Timestamp.now()
+        ttl = pd.Timedelta(days=strategy_config.COMPANY_INFO_TTL_DAYS)
+        fresh_tickers = set(cache.index[(now - cache['fetchedAt']) <= ttl])
+        stale_tickers = [t for t in self.universe_tickers if t not in fresh_tickers]
+        if not self.data_source.refreshable:
+            stale_tickers = []
+        logger.info(f"Company info cache: {len(self.universe_tickers) - len(stale_tickers)} fresh entries, "
+                    f"{len(stale_tickers)} missing or older than {strategy_config.COMPANY_INFO_TTL_DAYS} days.")
 
-                if ticker in final_info_dict:
-                    final_info_dict[ticker]['marketCap'] = market_cap
-                
-            except Exception as e:
-                logger.warning(f"Could not fetch market cap for ticker {ticker}: {e}")
-                if ticker in final_info_dict:
-                    final_info_dict[ticker]['marketCap'] = None
+        if stale_tickers:
+            logger.info(f"Fetching market caps from {self.data_source.__class__.__name__} with {strategy_config.COMPANY_INFO_MAX_WORKERS} workers "
+                        f"at up to {strategy_config.COMPANY_INFO_REQUESTS_PER_SECOND} requests/s...")
+            market_caps = self._fetch_market_caps(stale_tickers, progress_callback or self._log_progress)
+            if market_caps:
+                fetched = pd.DataFrame({'marketCap': pd.Series(market_caps, dtype='float64'),
+                                        'fetchedAt': pd.Timestamp.now()})
+                fetched.index.name = 'Ticker'
+                cache = pd.concat([cache.drop(index=fetched.index, errors='ignore'), fetched]).sort_index()
+                try:
+                    logger.info(f"Saving {len(fetched)} refreshed entries to company info cache: {self.company_info_cache_path}")
+                    cache.to_parquet(self.company_info_cache_path)
+                except Exception as e:
+                    logger.error(f"Failed to save company info cache: {e}", exc_info=True)
 
-        self.company_info = final_info_dict
-        
-        logger.info(f"Saving fresh company info to cache: {self.company_info_cache_path}")
-        with open(self.company_info_cache_path, 'w') as f:
-            json.dump(self.company_info, f, indent=4)
+        # A failed refresh keeps the previously cached (stale) market cap, if any.
+        market_cap_map = cache['marketCap'].to_dict()
+        sector_map = self.universe_df.set_index('Ticker')['Sector'].to_dict()
+        self.company_info = {
+            ticker: {'sector': sector,
+                     'marketCap': None if pd.isna(market_cap_map.get(ticker)) else market_cap_map[ticker]}
+            for ticker, sector in sector_map.items()
+        }
 
         logger.info("Finished processing all company info.")
-        return self.company_info
\ No newline at end of file
+        return self.company_info
@@ -0,0 +1,301 @@
+# engine/data_sources.py
+"""
+Data Source Backends for the Quantitative Momentum Trading System.
+
+The DataManager fetches prices and company info through a DataSource, which
+decouples caching from where the data actually comes from:
+- YFinanceDataSource: live downloads from yfinance (the default).
+- LocalCacheDataSource: reads the on-disk price store and company info cache
+  only, so runs work without any network access.
+- SyntheticDataSource: a deterministic generator of arbitrarily large
+  universes (tickers, sectors, market caps and OHLCV history) for
+  benchmarking and load testing.
+"""
+
+import logging
+import os
+import re
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Optional, Any
+
+from engine.price_store import HistoricalPriceStore
+
+logger = logging.getLogger(__name__)
+
+
+def _period_to_start(period: str, end: pd.Timestamp) -> pd.Timestamp:
+    """Converts a yfinance-style period string (e.g., '3y', '6mo', '10d') to a start date."""
+    match = re.fullmatch(r'(\d+)(y|mo|wk|d)', period.strip().lower())
+    if not match:
+        raise ValueError(f"Unsupported period string '{period}'.")
+    count, unit = int(match.group(1)), match.group(2)
+    offsets = {'y': pd.DateOffset(years=count), 'mo': pd.DateOffset(months=count),
+               'wk': pd.DateOffset(weeks=count), 'd': pd.DateOffset(days=count)}
+    return end - offsets[unit]
+
+
+class DataSource(ABC):
+    """
+    Interface for the backends the DataManager downloads data from.
+    """
+    # Where the DataManager keeps the caches built from this source.
+    default_cache_dir: str = 'data'
+    # Whether the DataManager should refresh its caches from this source. Sources that
+    # read the caches themselves set this to False.
+    refreshable: bool = True
+
+    def load_universe(self) -> Optional[pd.DataFrame]:
+        """
+        Returns the source's own universe as a DataFrame with 'Ticker' and
+        'Sector' columns, or None if the universe comes from the tickers CSV.
+        """
+        return None
+
+    @abstractmethod
+    def download_history(self, tickers: List[str], interval: str = "1d", period: Optional[str] = None,
+                         start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        """
+        Downloads OHLCV data, either for a relative period (e.g., "3y") or for
+        an explicit date range.
+
+        Args:
+            tickers (List[str]): The tickers to download.
+            interval (str): The data interval.
+            period (Optional[str]): The period string. Ignored if start is given.
+            start (Optional[pd.Timestamp]): The first date to download (inclusive).
+            end (Optional[pd.Timestamp]): The date to stop at (exclusive). Defaults to the latest bar.
+
+        Returns:
+            Optional[pd.DataFrame]: A (Price, Ticker) MultiIndex frame, or None if nothing was returned.
+        """
+
+    @abstractmethod
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        """
+        Returns the info dictionary for a ticker. It must contain 'marketCap'
+        (which may be None).
+        """
+
+    @abstractmethod
+    def fetch_latest_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Returns the most recent closing price of each ticker. Tickers without
+        a price are omitted.
+        """
+
+
+class YFinanceDataSource(DataSource):
+    """
+    Downloads data from yfinance.
+    """
+    def download_history(self, tickers: List[str], interval: str = "1d", period: Optional[str] = None,
+                         start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        # The DataManager downloads shards concurrently, so each call stays single-threaded.
+        if start is not None:
+            data = yf.download(tickers, start=start.strftime('%Y-%m-%d'),
+                               end=end.strftime('%Y-%m-%d') if end is not None else None,
+                               interval=interval, auto_adjust=False, threads=False, progress=False)
+        else:
+            data = yf.download(tickers, period=period, interval=interval, auto_adjust=False,
+                               threads=False, progress=False)
+        if data is None or data.empty:
+            return None
+        return data.dropna(axis=1, how='all')
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        return yf.Ticker(ticker).info
+
+    def fetch_latest_prices(self, tickers: List[str]) -> Dict[str, float]:
+        latest_prices: Dict[str, float] = {}
+        # Requesting a short history one ticker at a time is more reliable than a batch download.
+        for ticker in tickers:
+            try:
+                hist = yf.Ticker(ticker).history(period="5d", auto_adjust=True)  # auto_adjust=True gives adjusted prices
+                if not hist.empty:
+                    latest_prices[ticker] = float(hist['Close'].iloc[-1])
+                else:
+                    logger.warning(f"yfinance returned no historical data for {ticker}.")
+            except Exception as e:
+                logger.error(f"An exception occurred while fetching price for {ticker} from yfinance: {e}")
+        return latest_prices
+
+
+class LocalCacheDataSource(DataSource):
+    """
+    Serves data from the local caches only. No network access is made.
+    """
+    refreshable = False
+
+    def __init__(self, cache_dir: str = 'data'):
+        """
+        Args:
+            cache_dir (str): The directory holding the price store and company info cache.
+        """
+        self.default_cache_dir = cache_dir
+        self.price_store = HistoricalPriceStore(os.path.join(cache_dir, 'historical_store'))
+        self.company_info_cache_path = os.path.join(cache_dir, 'company_info.parquet')
+        self._market_caps: Optional[Dict[str, float]] = None
+
+    def download_history(self, tickers: List[str], interval: str = "1d", period: Optional[str] = None,
+                         start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        if start is None and period is not None:
+            start = _period_to_start(period, pd.Timestamp(datetime.today().date()))
+        data = self.price_store.read(start=start, tickers=tickers)
+        if data is not None and end is not None:
+            data = data[data.index < end]
+        return data
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        if self._market_caps is None:
+            self._market_caps = {}
+            if os.path.exists(self.company_info_cache_path):
+                self._market_caps = pd.read_parquet(self.company_info_cache_path)['marketCap'].dropna().to_dict()
+        return {'marketCap': self._market_caps.get(ticker)}
+
+    def fetch_latest_prices(self, tickers: List[str]) -> Dict[str, float]:
+        last_date = self.price_store.last_date()
+        if last_date is None:
+            return {}
+        recent = self.price_store.read(fields=['Adj Close'], start=last_date - pd.Timedelta(days=10), tickers=tickers)
+        if recent is None:
+            return {}
+        return recent['Adj Close'].ffill().iloc[-1].dropna().to_dict()
+
+
+class SyntheticDataSource(DataSource):
+    """
+    Deterministically generates a synthetic universe and its price history.
+
+    Every ticker's history is generated from its own random streams (derived
+    from the seed and the ticker's index), so any subset of tickers can be
+    requested in any order, from a universe of any size, and always produces
+    identical data. Histories are
+    anchored to a fixed epoch rather than to the end date, so moving the end
+    date forward only appends bars and never restates existing ones.
+    """
+    default_cache_dir = os.path.join('data', 'synthetic')
+
+    SECTORS: List[str] = ['Information Technology', 'Health Care', 'Financials', 'Consumer Discretionary',
+                          'Communication Services', 'Industrials', 'Consumer Staples', 'Energy',
+                          'Utilities', 'Real Estate', 'Materials']
+    EPOCH: pd.Timestamp = pd.Timestamp('2000-01-03')
+
+    def __init__(self, num_tickers: int = 1000, num_years: int = 5, seed: int = 42,
+                 end_date: Optional[pd.Timestamp] = None):
+        """
+        Args:
+            num_tickers (int): The size of the generated universe.
+            num_years (int): The years of daily history available per ticker.
+            seed (int): The seed that determines all generated data.
+            end_date (Optional[pd.Timestamp]): The last generated date. Defaults to today.
+        """
+        self.num_tickers = num_tickers
+        self.num_years = num_years
+        self.seed = seed
+        self.end_date = pd.Timestamp(end_date or datetime.today().date())
+        self._all_dates = pd.bdate_range(self.EPOCH, self.end_date, name='Date')
+        self.dates = self._all_dates[self._all_dates >= self.end_date - pd.DateOffset(years=num_years)]
+
+        # Each parameter has its own stream, so a larger universe only appends tickers.
+        self.tickers = [f"SYN{i:05d}" for i in range(num_tickers)]
+        self.sectors = self._stream(0, 0).choice(self.SECTORS, size=num_tickers)
+        self.market_caps = np.exp(self._stream(0, 1).normal(np.log(5e9), 1.5, size=num_tickers))
+        # Larger companies tend to trade more and move less.
+        size_score = (np.log(self.market_caps) - np.log(5e9)) / 1.5
+        self.annual_drifts = self._stream(0, 2).normal(0.07, 0.15, size=num_tickers)
+        self.annual_vols = np.clip(0.30 - 0.05 * size_score + self._stream(0, 3).normal(0, 0.05, size=num_tickers), 0.10, 0.90)
+        self.start_prices = np.exp(self._stream(0, 4).uniform(np.log(5), np.log(500), size=num_tickers))
+        self.turnover = np.clip(self._stream(0, 5).normal(0.008, 0.003, size=num_tickers), 0.001, None)
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+        logger.info(f"SyntheticDataSource: {num_tickers} tickers x {len(self.dates)} days (seed={seed}).")
+
+    def load_universe(self) -> Optional[pd.DataFrame]:
+        return pd.DataFrame({'Ticker': self.tickers, 'Sector': self.sectors})
+
+    def _stream(self, *key: int) -> np.random.Generator:
+        """Returns the random stream identified by key, independent of the streams of all other keys."""
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=key))
+
+    def _generate_ticker(self, i: int, n_days: int) -> Dict[str, np.ndarray]:
+        """
+        Generates the first n_days bars (counted from the epoch) of the ticker
+        with index i. Each component draws from its own stream, so a longer
+        history always extends a shorter one exactly.
+        """
+        streams = [self._stream(1, i, component) for component in range(4)]
+        daily_vol = self.annual_vols[i] / np.sqrt(252)
+        log_returns = streams[0].normal(self.annual_drifts[i] / 252 - 0.5 * daily_vol ** 2, daily_vol, size=n_days)
+        adj_close = self.start_prices[i] * np.exp(np.cumsum(log_returns))
+        # A ~2% dividend yield: the unadjusted price lags the total-return series over time.
+        close = adj_close * np.exp(-0.02 * np.arange(n_days) / 252)
+        open_ = close * np.exp(streams[1].normal(0, daily_vol * 0.3, size=n_days))
+        spread = np.abs(streams[2].normal(0, daily_vol * 0.5, size=n_days))
+        shares_outstanding = self.market_caps[i] / self.start_prices[i]
+        volume = np.round(shares_outstanding * self.turnover[i] * np.exp(streams[3].normal(0, 0.4, size=n_days)))
+        return {'Adj Close': adj_close, 'Close': close,
+                'High': np.maximum(open_, close) * (1 + spread),
+                'Low': np.minimum(open_, close) * (1 - spread),
+                'Open': open_, 'Volume': volume}
+
+    def download_history(self, tickers: List[str], interval: str = "1d", period: Optional[str] = None,
+                         start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        if interval != "1d":
+            raise ValueError(f"SyntheticDataSource only generates daily data, got interval '{interval}'.")
+        known = [t for t in tickers if t in self._index]
+        if not known:
+            return None
+        if start is None and period is not None:
+            start = _period_to_start(period, self.end_date)
+
+        n_days = len(self._all_dates)
+        first_row = n_days - len(self.dates)
+        if start is not None:
+            first_row = max(first_row, self._all_dates.searchsorted(start))
+        last_row = min(n_days, self._all_dates.searchsorted(end)) if end is not None else n_days
+        if last_row <= first_row:
+            return None
+        row_slice = slice(first_row, last_row)
+        fields = HistoricalPriceStore.PRICE_FIELDS
+        arrays = {field: np.empty((row_slice.stop - row_slice.start, len(known))) for field in fields}
+        for col, ticker in enumerate(known):
+            generated = self._generate_ticker(self._index[ticker], last_row)
+            for field in fields:
+                arrays[field][:, col] = generated[field][row_slice]
+
+        columns = pd.MultiIndex.from_product([fields, known], names=['Price', 'Ticker'])
+        return pd.DataFrame(np.hstack([arrays[field] for field in fields]), index=self._all_dates[row_slice],
+                            columns=columns)
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        i = self._index.get(ticker)
+        if i is None:
+            return {'marketCap': None}
+        return {'marketCap': float(self.market_caps[i]), 'sector': str(self.sectors[i])}
+
+    def fetch_latest_prices(self, tickers: List[str]) -> Dict[str, float]:
+        history = self.download_history(tickers, start=self.dates[-1])
+        if history is None:
+            return {}
+        return history['Adj Close'].iloc[-1].to_dict()
+
+
+def create_data_source(name: str, **kwargs: Any) -> DataSource:
+    """
+    Creates a data source by name.
+
+    Args:
+        name (str): One of 'YFINANCE', 'LOCAL' or 'SYNTHETIC'.
+        **kwargs: Passed to the data source's constructor.
+
+    Returns:
+        DataSource: The requested data source.
+    """
+    sources = {'YFINANCE': YFinanceDataSource, 'LOCAL': LocalCacheDataSource, 'SYNTHETIC': SyntheticDataSource}
+    if name.upper() not in sources:
+        raise ValueError(f"Unknown data source '{name}'. Expected one of {list(sources)}.")
+    return sources[name.upper()](**kwargs)
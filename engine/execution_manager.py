@@ -3,16 +3,20 @@
 Handles the calculation and execution of rebalancing trades.
 """
 import logging
-import math
+import time
 import asyncio
-from typing import Dict, List, Any
+import pandas as pd
+from typing import Dict, List, Any, Set, Tuple
 
 # --- NEW: Imports for creating IBKR Contracts and Orders ---
 from ibapi.contract import Contract
 from ibapi.order import Order
 
 # --- Project-specific Imports ---
+from engine.rebalance_engine import RebalanceEngine
 from handlers.ibkr_stock_handler import IBKRStockHandler
+from handlers.ibkr_order_tracker import TERMINAL_STATES
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,10 @@ class ExecutionManager:
     """
     Calculates rebalancing orders and executes them via the IBKR handler.
     """
+    # The columns of the submission report returned by execute_rebalance_orders.
+    SUBMISSION_REPORT_COLUMNS = ['Ticker', 'Action', 'Quantity', 'OrderId', 'Status', 'Filled', 'AvgFillPrice',
+                                 'Commission', 'QueueWaitS', 'LatencyS', 'FillTimeS', 'Error']
+
     # --- MODIFIED: __init__ now requires an IBKRStockHandler instance ---
     def __init__(self, ibkr_handler: IBKRStockHandler, config: Any):
         """
@@ -41,6 +49,11 @@ class ExecutionManager:
         """
         Calculates the orders needed to rebalance the current portfolio to the target.
 
+        Every position is brought to its equal target weight (see engine/rebalance_engine.py):
+        holdings that left the target are closed, new names are opened and names that stay
+        in the target are resized, in whole ORDER_LOT_SIZE lots and skipping resizes worth
+        less than MIN_TRADE_FRACTION of the portfolio value.
+
         Args:
             target_portfolio (Dict[str, List[str]]): Dict with 'longs' and 'shorts' lists.
             current_positions (Dict[str, int]): Dict of current tickers and quantities.
@@ -48,127 +61,152 @@ class ExecutionManager:
             current_prices (Dict[str, float]): Dict of tickers and their live prices.
 
         Returns:
-            Dict containing a list of all order details.
+            Dict containing a list of all order details, sells first.
         """
-        all_orders: List[Dict[str, Any]] = []
-        
-        target_longs = set(target_portfolio.get('longs', []))
-        target_shorts = set(target_portfolio.get('shorts', []))
-        current_holdings = set(current_positions.keys())
-
-        # --- Step 1: Calculate Sell Orders ---
-        # Sell longs that are no longer in the target long portfolio.
-        longs_to_sell = current_holdings.intersection(
-            {t for t, q in current_positions.items() if q > 0}
-        ) - target_longs
-        
-        for ticker in longs_to_sell:
-            quantity_to_sell = current_positions[ticker]
-            all_orders.append({
-                'action': 'SELL', 'ticker': ticker, 'quantity': quantity_to_sell,
-                'orderType': self.config.ORDER_TYPE
-            })
-            logger.info(f"Calculated SELL order for {quantity_to_sell} shares of {ticker}.")
-
-        # Cover shorts that are no longer in the target short portfolio.
-        shorts_to_cover = current_holdings.intersection(
-            {t for t, q in current_positions.items() if q < 0}
-        ) - target_shorts
-        
-        for ticker in shorts_to_cover:
-            # Quantity will be negative, so we take its absolute value
-            quantity_to_buy_back = abs(current_positions[ticker])
-            all_orders.append({
-                'action': 'BUY', 'ticker': ticker, 'quantity': quantity_to_buy_back,
-                'orderType': self.config.ORDER_TYPE
-            })
-            logger.info(f"Calculated BUY to cover order for {quantity_to_buy_back} shares of {ticker}.")
-
-        # --- Step 2: Calculate Buy/Short Orders ---
-        # The total number of positions we want to hold (long and short)
-        total_target_positions = len(target_longs) + len(target_shorts)
-        if total_target_positions == 0:
-            logger.info("Target portfolio is empty, no new buy/short orders to calculate.")
-            return {'all_orders': all_orders}
-
-        # Calculate position size, assuming equal weight for simplicity
-        # For a long/short portfolio, total value is used to size each leg.
-        # A more complex model might allocate 100% to longs and 100% to shorts.
-        # Here we use a simpler equal weight across all positions.
-        position_size_per_stock = total_portfolio_value / total_target_positions
-
-        # Buy new longs that are not in the current portfolio.
-        longs_to_buy = target_longs - current_holdings
-        for ticker in longs_to_buy:
-            price = current_prices.get(ticker)
-            if price and price > 0:
-                quantity_to_buy = math.floor(position_size_per_stock / price)
-                if quantity_to_buy > 0:
-                    all_orders.append({
-                        'action': 'BUY', 'ticker': ticker, 'quantity': quantity_to_buy,
-                        'orderType': self.config.ORDER_TYPE
-                    })
-                    logger.info(f"Calculated BUY order for {quantity_to_buy} shares of {ticker}.")
-            else:
-                logger.warning(f"Could not get a valid price for {ticker}, cannot calculate buy order.")
-        
-        # Short new shorts that are not in the current portfolio.
-        shorts_to_add = target_shorts - current_holdings
-        for ticker in shorts_to_add:
-            price = current_prices.get(ticker)
-            if price and price > 0:
-                quantity_to_short = math.floor(position_size_per_stock / price)
-                if quantity_to_short > 0:
-                     all_orders.append({
-                        'action': 'SELL', 'ticker': ticker, 'quantity': quantity_to_short,
-                        'orderType': self.config.ORDER_TYPE
-                    })
-                     logger.info(f"Calculated SELL (short) order for {quantity_to_short} shares of {ticker}.")
-            else:
-                logger.warning(f"Could not get a valid price for {ticker}, cannot calculate short order.")
-                
+        all_orders = RebalanceEngine(self.config).calculate_orders(target_portfolio, current_positions,
+                                                                   total_portfolio_value, current_prices)
         return {'all_orders': all_orders}
 
+    def _build_ibkr_order(self, order_details: Dict[str, Any]) -> Tuple[Contract, Order]:
+        """Creates the IBKR Contract and Order objects of a calculated order."""
+        contract = Contract()
+        contract.symbol = order_details['ticker']
+        contract.secType = "STK"
+        contract.exchange = "SMART"
+        contract.currency = "USD"
+
+        order = Order()
+        order.action = order_details['action']
+        order.orderType = self.config.ORDER_TYPE
+        order.totalQuantity = order_details['quantity']
+        order.outsideRth = self.config.EXECUTE_ORDERS_OUTSIDE_RTH
+        return contract, order
+
+    async def _submit_order(self, order_details: Dict[str, Any], rate_limiter: TokenBucket,
+                            in_flight: asyncio.Semaphore, queued_at: float) -> Dict[str, Any]:
+        """
+        Places one order once a slot is free and the pacing budget allows it,
+        and records how long it waited and how long TWS took to confirm it.
+        """
+        contract, order = self._build_ibkr_order(order_details)
+        # Contracts qualified while fetching prices are reused from the contract cache, without a request.
+        contract = self.ibkr_handler.cached_contract(contract)
+        async with in_flight:
+            await rate_limiter.acquire_async()
+            sent_at = time.perf_counter()
+            record = {'Ticker': order_details['ticker'], 'Action': order.action, 'Quantity': order.totalQuantity,
+                      'OrderId': None, 'Status': None, 'Filled': None, 'AvgFillPrice': None, 'Commission': None,
+                      'QueueWaitS': sent_at - queued_at, 'LatencyS': None, 'FillTimeS': None, 'Error': None}
+            print(f"  - Submitting {order.action} order for {order.totalQuantity} shares of {contract.symbol}...")
+            try:
+                result = await self.ibkr_handler.execute_order_async(contract, order)
+                record.update(Status=result.get('status'), Filled=result.get('filled'))
+            except Exception as e:
+                logger.error(f"Failed to place order for {contract.symbol}: {e}", exc_info=True)
+                print(f"  - ERROR placing order for {contract.symbol}. Check logs.")
+                record.update(Status='Error', Error=str(e) or type(e).__name__)
+            record['OrderId'] = order.orderId if order.orderId else None
+            record['LatencyS'] = time.perf_counter() - sent_at
+        return record
+
+    async def _await_fills(self, events: asyncio.Queue, order_ids: List[int]) -> Set[int]:
+        """
+        Consumes the order tracker's events, printing each fill of the given orders, until all of
+        them reached a terminal state or ORDER_FILL_TIMEOUT_S passed.
 
-    # --- NEW: Method to execute trades ---
-    async def execute_rebalance_orders(self, calculated_orders: List[Dict[str, Any]]):
+        Returns:
+            Set[int]: The IDs of the orders that are still working.
+        """
+        tracker = self.ibkr_handler.order_tracker
+        order_ids = set(order_ids)
+        working = {order_id for order_id in order_ids if not tracker.get(order_id).is_done}
+        deadline = time.perf_counter() + self.config.ORDER_FILL_TIMEOUT_S
+        # Events of orders that finished during submission are already queued and are printed too.
+        # Queued events are always drained first, so fills received before the deadline are never dropped.
+        while working or not events.empty():
+            if not events.empty():
+                event = events.get_nowait()
+            else:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if event.order_id not in order_ids:
+                continue
+            if event.shares:
+                print(f"  - Filled {event.action} {event.shares:g} {event.ticker} @ {event.price:.4f} "
+                      f"({event.filled:g} filled, {event.state})")
+            if event.state in TERMINAL_STATES:
+                working.discard(event.order_id)
+        return working
+
+    async def execute_rebalance_orders(self, calculated_orders: List[Dict[str, Any]]) -> pd.DataFrame:
         """
-        Executes a list of calculated orders in TWS.
+        Executes a list of calculated orders in TWS and waits for their fills.
+
+        Orders are submitted concurrently, up to MAX_ORDERS_IN_FLIGHT awaiting
+        confirmation at once, and paced by a token bucket at
+        ORDER_MESSAGES_PER_SECOND (bursts of ORDER_MESSAGE_BURST), so the total
+        submission time follows the API pacing limit rather than the number of
+        orders. All SELL orders are
+        submitted and confirmed before the first BUY, so the cash they free is
+        available to the buys. The fills are then followed through the handler's
+        order tracker until every order is done or ORDER_FILL_TIMEOUT_S passed.
 
         Args:
             calculated_orders (List[Dict[str, Any]]): The list of orders to execute.
                                                       From the 'all_orders' key.
+
+        Returns:
+            pd.DataFrame: One row per order (SUBMISSION_REPORT_COLUMNS) with its final status, filled
+                          quantity, average fill price and commission, the seconds it waited for a slot
+                          and pacing budget, its submission latency and the seconds until it was done.
         """
         if not calculated_orders:
             logger.info("No orders to execute.")
-            return
+            return pd.DataFrame(columns=self.SUBMISSION_REPORT_COLUMNS)
 
         logger.info(f"Preparing to execute {len(calculated_orders)} orders.")
-        for order_details in calculated_orders:
-            ticker = order_details['ticker']
-            
-            # 1. Create the IBKR Contract object
-            contract = Contract()
-            contract.symbol = ticker
-            contract.secType = "STK"
-            contract.exchange = "SMART"
-            contract.currency = "USD"
-
-            # 2. Create the IBKR Order object
-            order = Order()
-            order.action = order_details['action']
-            order.orderType = self.config.ORDER_TYPE
-            order.totalQuantity = order_details['quantity']
-            order.outsideRth = self.config.EXECUTE_ORDERS_OUTSIDE_RTH
-            
-            # 3. Place the order
-            print(f"  - Submitting {order.action} order for {order.totalQuantity} shares of {ticker}...")
-            try:
-                # --- MODIFIED: Swapped arguments to match the new standardized function signature ---
-                await self.ibkr_handler.execute_order_async(contract, order)
-                
-                # Use configured delay to avoid overwhelming the API
-                await asyncio.sleep(self.config.DELAY_BETWEEN_BUYS_S)
-            except Exception as e:
-                logger.error(f"Failed to place order for {ticker}: {e}", exc_info=True)
-                print(f"  - ERROR placing order for {ticker}. Check logs.")
\ No newline at end of file
+        rate_limiter = TokenBucket(rate=self.config.ORDER_MESSAGES_PER_SECOND, capacity=self.config.ORDER_MESSAGE_BURST)
+        in_flight = asyncio.Semaphore(self.config.MAX_ORDERS_IN_FLIGHT)
+        started_at = time.perf_counter()
+        records: List[Dict[str, Any]] = []
+        sells = [o for o in calculated_orders if o['action'] == 'SELL']
+        buys = [o for o in calculated_orders if o['action'] != 'SELL']
+        tracker = self.ibkr_handler.order_tracker
+        events = tracker.subscribe()
+        try:
+            for phase_orders in (sells, buys):
+                queued_at = time.perf_counter()
+                records += await asyncio.gather(*(self._submit_order(o, rate_limiter, in_flight, queued_at) for o in phase_orders))
+            submitted_at = time.perf_counter()
+            latency = pd.Series([r['LatencyS'] for r in records], dtype='float64')
+            failed = sum(r['Status'] == 'Error' for r in records)
+            logger.info(f"Submitted {len(records) - failed} of {len(records)} orders in {submitted_at - started_at:.2f}s. "
+                        f"Latency median {latency.median():.3f}s, p95 {latency.quantile(0.95):.3f}s, max {latency.max():.3f}s.")
+
+            order_ids = [r['OrderId'] for r in records if r['OrderId'] in tracker]
+            working = await self._await_fills(events, order_ids)
+        finally:
+            tracker.unsubscribe(events)
+
+        for record in records:
+            tracked = tracker.get(record['OrderId']) if record['OrderId'] is not None else None
+            if tracked is None:
+                continue
+            record.update(Status=tracked.state, Filled=tracked.filled, Commission=tracked.commission,
+                          AvgFillPrice=tracked.avg_fill_price if tracked.filled else None,
+                          FillTimeS=tracked.done_at - tracked.placed_at if tracked.done_at is not None else None,
+                          Error=record['Error'] or tracked.error)
+        report = pd.DataFrame(records, columns=self.SUBMISSION_REPORT_COLUMNS)
+        filled = report['Filled'].fillna(0)
+        logger.info(f"{int((filled >= report['Quantity']).sum())} of {len(report)} orders filled completely, "
+                    f"{int(((filled > 0) & (filled < report['Quantity'])).sum())} partially, "
+                    f"{time.perf_counter() - submitted_at:.2f}s after submission.")
+        if working:
+            logger.warning(f"{len(working)} orders are still working after {self.config.ORDER_FILL_TIMEOUT_S}s; "
+                           f"their later fills are not included: {sorted(working)[:10]}")
+        return report
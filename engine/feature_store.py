@@ -0,0 +1,205 @@
+# engine/feature_store.py
+"""
+Feature Store for the Quantitative Momentum Trading System.
+
+A run builds portfolios for several strategy x timeframe combinations from the
+same historical data. The FeatureStore computes the features they share
+(resampled prices, return matrices, momentum and trailing statistics) the first
+time they are requested and serves the memoized result to every subsequent
+PortfolioConstructor, so the expensive work is done once per run.
+
+With a SignalState (see engine/signal_state.py) that is current with the
+data, the latest DAILY momentum, smoothness, volatility and dollar volume are
+read from its incrementally maintained windows instead of the full panel.
+
+The `*_history` features are point-in-time signal matrices: for every date they
+hold the value the live construction would have computed on that date, which
+is what the backtest engine walks through.
+"""
+
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Hashable, Literal, Optional, Sequence
+
+from engine import signals
+from engine.signal_state import SignalState
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureStore:
+    """
+    Computes and memoizes features derived from one historical data frame.
+    Features are read-only: callers must copy a returned frame before modifying it.
+    """
+    # The pandas resample rule of each timeframe. Daily data is used as-is.
+    RESAMPLE_RULES: Dict[str, Optional[str]] = {'DAILY': None, 'WEEKLY': 'W', 'MONTHLY': 'ME'}
+
+    def __init__(self, historical_data: pd.DataFrame, signal_state: Optional[SignalState] = None):
+        """
+        Initializes the store.
+
+        Args:
+            historical_data (pd.DataFrame): DataFrame with historical OHLCV data.
+            signal_state (Optional[SignalState]): The incremental DAILY signal state. Only used
+                                                  if it is current with `historical_data`.
+        """
+        self.historical_data = historical_data
+        if signal_state is not None and not signal_state.is_current(historical_data):
+            logger.warning("The DAILY signal state is not current with the historical data. Ignoring it.")
+            signal_state = None
+        self.signal_state = signal_state
+        self._cache: Dict[Hashable, Any] = {}
+        # One lock per feature, so threads computing different features do not wait on
+        # each other. Features only depend on features with other keys, so nesting is safe.
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def _memoize(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached feature for key, computing it on first use."""
+        if key in self._cache:
+            return self._cache[key]
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._cache:
+                logger.debug(f"Computing feature {key}...")
+                self._cache[key] = compute()
+            return self._cache[key]
+
+    def resampled(self, rule: Optional[str]) -> pd.DataFrame:
+        """
+        Returns the adjusted closing prices resampled to the last price of each
+        period of the given pandas rule (e.g., 'W'), or the daily prices if rule is None.
+        """
+        adj_close = self.historical_data['Adj Close']
+        if rule is None:
+            return adj_close
+        return self._memoize(('resampled', rule), lambda: adj_close.resample(rule).last())
+
+    def prices(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> pd.DataFrame:
+        """Returns the adjusted closing prices of the given timeframe."""
+        if timeframe not in self.RESAMPLE_RULES:
+            raise ValueError(f"Invalid timeframe '{timeframe}'. Expected one of {list(self.RESAMPLE_RULES)}.")
+        return self.resampled(self.RESAMPLE_RULES[timeframe])
+
+    def returns(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> pd.DataFrame:
+        """Returns the simple period returns of the given timeframe."""
+        return self._memoize(('returns', timeframe),
+                             lambda: self.prices(timeframe).pct_change(fill_method=None))
+
+    def daily_returns(self) -> pd.DataFrame:
+        """Returns the simple daily returns."""
+        return self.returns('DAILY')
+
+    def momentum(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], lookback: int, lag: int) -> pd.DataFrame:
+        """
+        Returns the momentum over `lookback` periods of the given timeframe,
+        skipping the most recent `lag` periods.
+        """
+        return self._memoize(('momentum', timeframe, lookback, lag),
+                             lambda: self.prices(timeframe).pct_change(periods=lookback - lag, fill_method=None).shift(lag))
+
+    def momentum_grid(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'],
+                      lookbacks: Sequence[int], lags: Sequence[int]) -> pd.DataFrame:
+        """
+        Returns the latest momentum for every lookback and lag combination,
+        indexed by (Lookback, Lag) with one column per ticker.
+        """
+        def compute() -> pd.DataFrame:
+            prices = self.prices(timeframe)
+            grid = signals.momentum_grid(prices, lookbacks, lags)
+            return signals.momentum_grid_frame(grid, lookbacks, lags, prices.columns)
+        return self._memoize(('momentum_grid', timeframe, tuple(lookbacks), tuple(lags)), compute)
+
+    def latest_momentum(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], lookback: int, lag: int) -> pd.Series:
+        """Returns each ticker's momentum on the last date (see `momentum`)."""
+        state = self.signal_state
+        if timeframe == 'DAILY' and state is not None and (state.momentum_lookback, state.momentum_lag) == (lookback, lag):
+            return state.momentum()
+        return self.momentum(timeframe, lookback, lag).iloc[-1]
+
+    def positive_periods(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], lookback: int) -> pd.DataFrame:
+        """
+        Returns the number of positive returns in the trailing `lookback`
+        periods of the timeframe, for every period. Uses the same resampled
+        prices as `momentum`.
+        """
+        return self._memoize(('positive_periods', timeframe, lookback),
+                             lambda: signals.positive_period_counts(self.returns(timeframe), lookback))
+
+    def latest_positive_periods(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], lookback: int) -> pd.Series:
+        """Returns each ticker's count of positive periods on the last date (see `positive_periods`)."""
+        state = self.signal_state
+        if timeframe == 'DAILY' and state is not None and state.momentum_lookback == lookback:
+            return state.positive_periods()
+        return self.positive_periods(timeframe, lookback).iloc[-1]
+
+    def trailing_volatility(self, window: int) -> pd.Series:
+        """Returns each ticker's standard deviation of daily returns over the last `window` days."""
+        if self.signal_state is not None and self.signal_state.volatility_window == window:
+            return self.signal_state.volatility()
+        return self.volatility_history(window).iloc[-1]
+
+    def average_dollar_volume(self, window: int) -> pd.Series:
+        """Returns each ticker's latest average daily dollar volume over `window` days."""
+        if self.signal_state is not None and self.signal_state.dollar_volume_window == window:
+            return self.signal_state.average_dollar_volume()
+
+        def compute() -> pd.Series:
+            close = self.historical_data['Close'].iloc[-window:]
+            volume = self.historical_data['Volume'].iloc[-window:]
+            return signals.average_dollar_volume(close, volume, window).iloc[-1]
+        return self._memoize(('average_dollar_volume', window), compute)
+
+    # --- Point-in-time signal matrices (one row per daily date) ---
+
+    def filled_prices(self) -> np.ndarray:
+        """Returns the daily adjusted closing prices with missing bars filled by the last known price."""
+        return self._memoize('filled_prices',
+                             lambda: self.historical_data['Adj Close'].ffill().to_numpy(dtype='float64'))
+
+    def period_positions(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> np.ndarray:
+        """Returns the position of each daily date's period in `prices(timeframe)`."""
+        return self._memoize(('period_positions', timeframe),
+                             lambda: signals.period_positions(self.historical_data.index, self.prices(timeframe).index))
+
+    def current_period_prices(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> np.ndarray:
+        """Returns the daily prices forward-filled within their period: each open period's price so far."""
+        def compute() -> np.ndarray:
+            daily = self.historical_data['Adj Close'].to_numpy(dtype='float64')
+            if self.RESAMPLE_RULES[timeframe] is None:
+                return daily
+            return signals.ffill_within_periods(daily, self.period_positions(timeframe))
+        return self._memoize(('current_period_prices', timeframe), compute)
+
+    def momentum_history(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], lookback: int, lag: int) -> pd.DataFrame:
+        """Returns the momentum every date would have seen, as a (date x ticker) frame."""
+        def compute() -> pd.DataFrame:
+            values = signals.point_in_time_momentum(self.current_period_prices(timeframe),
+                                                    self.prices(timeframe).to_numpy(dtype='float64'),
+                                                    self.period_positions(timeframe), lookback, lag)
+            return pd.DataFrame(values, index=self.historical_data.index, columns=self.prices(timeframe).columns)
+        return self._memoize(('momentum_history', timeframe, lookback, lag), compute)
+
+    def positive_periods_history(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], lookback: int) -> pd.DataFrame:
+        """Returns the count of positive periods among the last `lookback` periods for every date."""
+        def compute() -> pd.DataFrame:
+            values = signals.point_in_time_positive_periods(self.current_period_prices(timeframe),
+                                                            self.prices(timeframe).to_numpy(dtype='float64'),
+                                                            self.period_positions(timeframe), lookback)
+            return pd.DataFrame(values, index=self.historical_data.index, columns=self.prices(timeframe).columns)
+        return self._memoize(('positive_periods_history', timeframe, lookback), compute)
+
+    def volatility_history(self, window: int) -> pd.DataFrame:
+        """Returns the standard deviation of daily returns over the trailing `window` days for every date."""
+        return self._memoize(('volatility_history', window),
+                             lambda: signals.rolling_volatility(self.daily_returns(), window))
+
+    def dollar_volume_history(self, window: int) -> pd.DataFrame:
+        """Returns the average daily dollar volume over the trailing `window` days for every date."""
+        return self._memoize(('dollar_volume_history', window),
+                             lambda: signals.average_dollar_volume(self.historical_data['Close'],
+                                                                   self.historical_data['Volume'], window))
@@ -0,0 +1,115 @@
+# engine/order_netting.py
+"""
+Order Netting for the Quantitative Momentum Trading System.
+
+All strategy x timeframe portfolios of a run trade in the same TWS account, and
+one strategy often sells a ticker that another buys. Instead of submitting
+every portfolio's orders separately, their orders (the child orders) are
+netted per ticker into one parent order for the net quantity; tickers whose
+children cancel out are not traded at all. After execution, each parent's
+fill is allocated back to the children: children on the opposite side of the
+parent are crossed internally and filled in full, and the children on the
+parent's side share the crossed quantity plus the parent's fill in proportion
+to their size.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Mapping, Tuple
+
+from engine import signals
+from engine.rebalance_engine import deltas_to_orders
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NettedOrders:
+    """
+    The parent orders of a run and the child orders they were netted from.
+
+    Attributes:
+        parent_orders (List[Dict[str, Any]]): One order per ticker with a non-zero net quantity, sells first.
+        children (pd.DataFrame): One row per child order: 'Portfolio' (its key), 'Ticker' and the
+                                 signed 'Quantity' (positive = BUY).
+    """
+    parent_orders: List[Dict[str, Any]]
+    children: pd.DataFrame
+
+    def summary(self) -> Dict[str, int]:
+        """Returns the number of child and parent orders and the gross and net shares they trade."""
+        return {
+            'child_orders': len(self.children),
+            'parent_orders': len(self.parent_orders),
+            'child_shares': int(self.children['Quantity'].abs().sum()),
+            'parent_shares': int(sum(order['quantity'] for order in self.parent_orders)),
+        }
+
+    def allocate(self, fills: Mapping[str, Tuple[int, float]],
+                 prices: Mapping[str, float]) -> Dict[Hashable, Tuple[List[Dict[str, Any]], Dict[str, float]]]:
+        """
+        Allocates the parent orders' fills back to the portfolios.
+
+        Args:
+            fills (Mapping[str, Tuple[int, float]]): Per ticker, the filled quantity (unsigned) and
+                average fill price of its parent order. Parents missing here did not fill.
+            prices (Mapping[str, float]): The prices at which children are crossed when their parent
+                did not fill or was netted out entirely (e.g., the live prices).
+
+        Returns:
+            Dict[Hashable, Tuple[List[Dict[str, Any]], Dict[str, float]]]: Per portfolio key, its filled
+                orders ('action', 'ticker', 'quantity') and their prices, as accepted by
+                SimulatedPortfolioManager.simulate_trades. Portfolios without fills are omitted.
+        """
+        allocations: Dict[Hashable, Tuple[List[Dict[str, Any]], Dict[str, float]]] = {}
+        for ticker, group in self.children.groupby('Ticker', sort=False):
+            quantities = group['Quantity'].to_numpy(dtype=np.int64)
+            net = int(quantities.sum())
+            filled, fill_price = fills.get(ticker, (0, np.nan))
+            filled = min(int(filled), abs(net))
+            price = fill_price if filled > 0 else prices.get(ticker, np.nan)
+            if pd.isna(price):
+                logger.error(f"No fill or reference price for {ticker}. Its child orders are not allocated.")
+                continue
+
+            # Children against the parent's side are crossed in full; the parent's side shares the rest.
+            allocated = quantities.copy()
+            same_side = np.sign(quantities) == np.sign(net)
+            if net != 0:
+                available = int(np.abs(quantities[~same_side]).sum()) + filled
+                allocated[same_side] = np.sign(net) * signals.proportional_quotas(np.abs(quantities[same_side]), available)
+
+            for key, quantity in zip(group['Portfolio'], allocated):
+                if quantity == 0:
+                    continue
+                orders, order_prices = allocations.setdefault(key, ([], {}))
+                orders.append({'action': 'BUY' if quantity > 0 else 'SELL', 'ticker': ticker, 'quantity': int(abs(quantity))})
+                order_prices[ticker] = float(price)
+        return allocations
+
+
+def net_orders(orders_by_portfolio: Mapping[Hashable, List[Dict[str, Any]]], order_type: str) -> NettedOrders:
+    """
+    Nets the orders of several portfolios per ticker into parent orders.
+
+    Args:
+        orders_by_portfolio (Mapping[Hashable, List[Dict[str, Any]]]): The calculated orders ('action',
+            'ticker', 'quantity') of each portfolio, keyed e.g. by (strategy, timeframe).
+        order_type (str): The order type of the parent orders (e.g., 'MKT').
+
+    Returns:
+        NettedOrders: The parent orders and the child orders they were netted from.
+    """
+    rows = [(key, order['ticker'], order['quantity'] if order['action'] == 'BUY' else -order['quantity'])
+            for key, orders in orders_by_portfolio.items() for order in orders if order['quantity'] > 0]
+    children = pd.DataFrame(rows, columns=['Portfolio', 'Ticker', 'Quantity'])
+    children['Quantity'] = children['Quantity'].astype(np.int64)
+    net = children.groupby('Ticker', sort=True)['Quantity'].sum()
+    parent_orders = deltas_to_orders(net.index.to_numpy(), net.to_numpy(), order_type)
+    netted = NettedOrders(parent_orders=parent_orders, children=children)
+    summary = netted.summary()
+    logger.info(f"Netted {summary['child_orders']} orders ({summary['child_shares']} shares) from {len(orders_by_portfolio)} "
+                f"portfolios into {summary['parent_orders']} parent orders ({summary['parent_shares']} shares).")
+    return netted
@@ -0,0 +1,209 @@
+# engine/parameter_sweep.py
+"""
+Parameter Sweep Runner for the Quantitative Momentum Trading System.
+
+Backtests every combination of a parameter grid (e.g., TOP_PERCENTILE_CUTOFF,
+VOLATILITY_CUTOFF_PERCENTILE, SMOOTHNESS_MIN_POSITIVE_PERIODS or a momentum
+lookback) in a pool of worker processes and collects the results in one tidy
+table.
+
+The historical price matrix is copied once into a shared memory block. Workers
+map it read-only as a zero-copy DataFrame instead of each unpickling their own
+copy, and each worker keeps one FeatureStore for all the combinations it runs,
+so signals shared by several combinations are only computed once per worker.
+"""
+
+import itertools
+import logging
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+from engine.backtest_engine import BacktestEngine
+from engine.feature_store import FeatureStore
+from engine.rebalance_calendar import RebalanceCalendar
+
+logger = logging.getLogger(__name__)
+
+# Per-process state of a sweep worker, set up once by _init_worker.
+_worker_state: Dict[str, Any] = {}
+
+
+class SharedPriceMatrix:
+    """
+    A (Price, Ticker) MultiIndex price frame held in a shared memory block.
+    The owning process creates it with `from_frame`; workers attach with
+    `attach` using the picklable `spec`.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, spec: Dict[str, Any], owner: bool):
+        self._shm = shm
+        self.spec = spec
+        self._owner = owner
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'SharedPriceMatrix':
+        """
+        Copies a price frame into a new shared memory block.
+
+        Args:
+            data (pd.DataFrame): A (Price, Ticker) MultiIndex frame of prices.
+
+        Returns:
+            SharedPriceMatrix: The owner of the shared block. Call `close()` when done.
+        """
+        values = np.ascontiguousarray(data.to_numpy(dtype='float64'))
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+        spec = {'name': shm.name, 'shape': values.shape,
+                'index': data.index.to_numpy(), 'columns': data.columns.tolist()}
+        logger.info(f"Placed a {values.shape[0]} x {values.shape[1]} price matrix "
+                    f"({values.nbytes / 1e6:,.0f} MB) in shared memory block {shm.name}.")
+        return cls(shm, spec, owner=True)
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any]) -> 'SharedPriceMatrix':
+        """
+        Attaches to an existing shared block described by `spec`.
+
+        On Python < 3.13, attaching registers the block with the resource
+        tracker as if this process owned it, which can unlink it early or warn
+        about a "leaked shared_memory" when a worker exits. Only the owner may
+        register (and unlink) the block, so the registration is skipped here.
+        Unregistering after attaching is not an option: worker processes share
+        the owner's tracker, so that would drop the owner's registration too.
+        """
+        register = resource_tracker.register
+
+        def register_except_shared_memory(name: str, rtype: str) -> None:
+            if rtype != 'shared_memory':
+                register(name, rtype)
+
+        resource_tracker.register = register_except_shared_memory
+        try:
+            shm = shared_memory.SharedMemory(name=spec['name'])
+        finally:
+            resource_tracker.register = register
+        return cls(shm, spec, owner=False)
+
+    def frame(self) -> pd.DataFrame:
+        """Returns a read-only DataFrame view of the shared block. No data is copied."""
+        values = np.ndarray(self.spec['shape'], dtype='float64', buffer=self._shm.buf)
+        values.flags.writeable = False
+        columns = pd.MultiIndex.from_tuples(self.spec['columns'], names=['Price', 'Ticker'])
+        return pd.DataFrame(values, index=pd.DatetimeIndex(self.spec['index'], name='Date'),
+                            columns=columns, copy=False)
+
+    def close(self) -> None:
+        """Detaches from the block; only the owner frees it."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def config_values(config: Any) -> Dict[str, Any]:
+    """Returns the upper-case settings of a configuration module as a picklable dictionary."""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def apply_overrides(base: Dict[str, Any], overrides: Dict[str, Any]) -> SimpleNamespace:
+    """
+    Builds a configuration object with some settings overridden. A dotted key
+    overrides one entry of a dictionary setting, e.g.
+    'MOMENTUM_LOOKBACKS.MONTHLY' sets MOMENTUM_LOOKBACKS['MONTHLY'].
+
+    Args:
+        base (Dict[str, Any]): The base settings (see `config_values`).
+        overrides (Dict[str, Any]): The settings to override.
+
+    Returns:
+        SimpleNamespace: A configuration object usable in place of the config module.
+    """
+    values = dict(base)
+    for key, value in overrides.items():
+        if '.' in key:
+            name, entry = key.split('.', 1)
+            values[name] = {**values[name], entry: value}
+        else:
+            values[key] = value
+    return SimpleNamespace(**values)
+
+
+def _init_worker(spec: Dict[str, Any], company_info: Dict[str, Dict], base_config: Dict[str, Any]) -> None:
+    """Attaches a worker process to the shared prices and builds its FeatureStore and calendar."""
+    matrix = SharedPriceMatrix.attach(spec)
+    historical_data = matrix.frame()
+    calendar = RebalanceCalendar.from_csv(base_config['EXCHANGE_HOLIDAYS_CSV_PATH'],
+                                          start=historical_data.index[0], end=historical_data.index[-1])
+    _worker_state.update(matrix=matrix, historical_data=historical_data, company_info=company_info,
+                         base_config=base_config, features=FeatureStore(historical_data), calendar=calendar)
+
+
+def _run_combination(strategy: str, timeframe: str, overrides: Dict[str, Any], initial_cash: float) -> Dict[str, Any]:
+    """Backtests one parameter combination in a worker process."""
+    config = apply_overrides(_worker_state['base_config'], overrides)
+    engine = BacktestEngine(_worker_state['historical_data'], _worker_state['company_info'], config,
+                            features=_worker_state['features'], calendar=_worker_state['calendar'])
+    result = engine.run(timeframe, strategy=strategy, initial_cash=initial_cash)
+    return {'strategy': strategy, 'timeframe': timeframe, **overrides, **result.summary()}
+
+
+def parameter_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Expands {setting: [values]} into the list of all combinations."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_parameter_sweep(historical_data: pd.DataFrame, company_info: Dict[str, Dict], config: Any,
+                        grid: Dict[str, Sequence[Any]], strategies: Sequence[str], timeframes: Sequence[str],
+                        initial_cash: float = 10000.0, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Backtests every combination of strategy, timeframe and parameter values in
+    a process pool.
+
+    Args:
+        historical_data (pd.DataFrame): DataFrame with historical OHLCV data (only the
+                                        fields the strategies need, e.g., 'Adj Close').
+        company_info (Dict[str, Dict]): Dictionary with 'marketCap' and 'sector'.
+        config (Any): Configuration module with the base strategy parameters.
+        grid (Dict[str, Sequence[Any]]): The values to sweep per setting, e.g.
+            {'TOP_PERCENTILE_CUTOFF': [0.01, 0.025], 'MOMENTUM_LOOKBACKS.MONTHLY': [6, 12]}.
+        strategies (Sequence[str]): The strategies to backtest.
+        timeframes (Sequence[str]): The timeframes to backtest.
+        initial_cash (float): The starting cash of every backtest.
+        max_workers (Optional[int]): The number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        pd.DataFrame: One row per combination: strategy, timeframe, the swept settings and
+                      the backtest summary statistics.
+    """
+    combinations = [(strategy, timeframe, overrides) for strategy in strategies for timeframe in timeframes
+                    for overrides in parameter_grid(grid)]
+    max_workers = max_workers or os.cpu_count() or 1
+    logger.info(f"Sweeping {len(combinations)} parameter combinations with {max_workers} worker processes...")
+
+    matrix = SharedPriceMatrix.from_frame(historical_data)
+    rows: List[Dict[str, Any]] = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(matrix.spec, company_info, config_values(config))) as executor:
+            futures = {executor.submit(_run_combination, strategy, timeframe, overrides, initial_cash): (strategy, timeframe, overrides)
+                       for strategy, timeframe, overrides in combinations}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                try:
+                    rows.append(future.result())
+                except Exception as e:
+                    strategy, timeframe, overrides = futures[future]
+                    logger.error(f"Backtest failed for {strategy} ({timeframe}) with {overrides}: {e}")
+                if completed % 10 == 0 or completed == len(futures):
+                    logger.info(f"Progress: {completed}/{len(futures)} parameter combinations finished.")
+    finally:
+        matrix.close()
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    return results.sort_values(['strategy', 'timeframe', *grid]).reset_index(drop=True)
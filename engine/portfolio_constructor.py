@@ -9,18 +9,339 @@ strategy's rules. This version generates both long and short positions.
 """
 
 import logging
-import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Tuple, Literal
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Dict, Any, Tuple, Literal, Optional, Sequence
+
+from engine import signals
+from engine.feature_store import FeatureStore
 
 # Initialize a logger for this module
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class StrategyParameters:
+    """
+    The settings one portfolio construction reads, captured from the
+    configuration at a point in time. Constructions never read the
+    configuration module directly, so strategies with different parameters
+    can be built side by side.
+    """
+    strategy: Literal['CORE', 'SMOOTH', 'FROG_IN_PAN']
+    top_percentile_cutoff: float
+    liquidity_measure: Literal['MARKET_CAP', 'DOLLAR_VOLUME']
+    liquidity_filter_percentile: float
+    dollar_volume_lookback_days: int
+    sectors_to_exclude: Tuple[str, ...]
+    momentum_lookbacks: Dict[str, int]
+    momentum_lags: Dict[str, int]
+    smoothness_min_positive_periods: int
+    volatility_lookback_days: int
+    volatility_cutoff_percentile: float
+    sector_ranking_mode: Literal['NONE', 'NEUTRAL', 'CAPPED'] = 'NONE'
+    max_names_per_sector: int = 5
+
+    @classmethod
+    def from_config(cls, config: Any, strategy: Optional[str] = None) -> 'StrategyParameters':
+        """
+        Reads the strategy parameters from a configuration object.
+
+        Args:
+            config (Any): Configuration module with strategy parameters.
+            strategy (Optional[str]): 'CORE', 'SMOOTH' or 'FROG_IN_PAN'. Defaults to config.STRATEGY_NAME.
+
+        Returns:
+            StrategyParameters: The parameters (dictionaries are copied, so later config changes do not leak in).
+        """
+        return cls(strategy=strategy or config.STRATEGY_NAME,
+                   top_percentile_cutoff=config.TOP_PERCENTILE_CUTOFF,
+                   liquidity_measure=config.LIQUIDITY_MEASURE,
+                   liquidity_filter_percentile=config.LIQUIDITY_FILTER_PERCENTILE,
+                   dollar_volume_lookback_days=config.DOLLAR_VOLUME_LOOKBACK_DAYS,
+                   sectors_to_exclude=tuple(config.SECTORS_TO_EXCLUDE),
+                   momentum_lookbacks=dict(config.MOMENTUM_LOOKBACKS),
+                   momentum_lags=dict(config.MOMENTUM_LAGS),
+                   smoothness_min_positive_periods=config.SMOOTHNESS_MIN_POSITIVE_PERIODS,
+                   volatility_lookback_days=config.VOLATILITY_LOOKBACK_DAYS,
+                   volatility_cutoff_percentile=config.VOLATILITY_CUTOFF_PERCENTILE,
+                   sector_ranking_mode=config.SECTOR_RANKING_MODE,
+                   max_names_per_sector=config.MAX_NAMES_PER_SECTOR)
+
+
+@dataclass(frozen=True)
+class PortfolioResult:
+    """
+    The outcome of one portfolio construction.
+
+    Attributes:
+        strategy (str): The strategy that was applied.
+        timeframe (str): The calculation timeframe.
+        longs (Tuple[str, ...]): The long tickers, best first.
+        shorts (Tuple[str, ...]): The short tickers, in rank order.
+        eligible (pd.DataFrame): The stocks that passed every filter, with their signals, unranked.
+    """
+    # The columns written by save_report, where present.
+    REPORT_COLUMNS = ['Rank', 'Decile', 'Momentum', 'Volatility', 'PositivePeriods', 'marketCap', 'DollarVolume', 'sector']
+
+    strategy: str
+    timeframe: str
+    longs: Tuple[str, ...]
+    shorts: Tuple[str, ...]
+    eligible: pd.DataFrame
+
+    @property
+    def target_portfolio(self) -> Dict[str, List[str]]:
+        """Returns the target portfolio in the {'longs': [...], 'shorts': [...]} form ExecutionManager expects."""
+        return {'longs': list(self.longs), 'shorts': list(self.shorts)}
+
+    @cached_property
+    def report(self) -> pd.DataFrame:
+        """
+        Returns the eligible stocks ranked by momentum, with their decile,
+        sorted by rank. Built on first access only, since selecting the longs
+        and shorts does not need the full ranking. Read-only: copy it before modifying.
+        """
+        report_df = self.eligible.assign(Rank=self.eligible['Momentum'].rank(ascending=False, method='first'))
+        # Use dropna() when creating deciles to handle cases with fewer than 10 stocks
+        if len(report_df) >= 10:
+            report_df = report_df.assign(Decile=pd.qcut(report_df['Rank'], 10, labels=False, duplicates='drop') + 1)
+        else:
+            report_df = report_df.assign(Decile=1)
+        return report_df.sort_values(by='Rank')
+
+    def save_report(self, path: str) -> bool:
+        """
+        Writes the ranked report's REPORT_COLUMNS to a CSV file.
+
+        Args:
+            path (str): The CSV file to write.
+
+        Returns:
+            bool: True if a report was written, False if no stock was eligible.
+        """
+        if self.eligible.empty:
+            return False
+        report_df = self.report
+        report_df[[col for col in self.REPORT_COLUMNS if col in report_df.columns]].to_csv(path)
+        return True
+
+
+def _apply_universe_filters(features: FeatureStore, company_info: Dict[str, Dict],
+                            params: StrategyParameters) -> pd.DataFrame:
+    """Applies liquidity and sector filters to the stock universe and returns the eligible stocks."""
+    logger.info("Applying universe filters (liquidity and sector)...")
+    info_df = pd.DataFrame.from_dict(company_info, orient='index').dropna(subset=['sector'])
+    info_df.index.name = 'Ticker'
+
+    # Liquidity Filter
+    if params.liquidity_measure == 'DOLLAR_VOLUME':
+        dollar_volume = features.average_dollar_volume(params.dollar_volume_lookback_days)
+        info_df = info_df.assign(DollarVolume=dollar_volume.reindex(info_df.index))
+        liquidity_column, liquidity_label = 'DollarVolume', f"{params.dollar_volume_lookback_days}-day dollar volume"
+    else:
+        liquidity_column, liquidity_label = 'marketCap', "market cap"
+    info_df = info_df.dropna(subset=[liquidity_column])
+
+    liquidity_cutoff = info_df[liquidity_column].quantile(params.liquidity_filter_percentile)
+    initial_count = len(info_df)
+    info_df = info_df[info_df[liquidity_column] >= liquidity_cutoff]
+    logger.info(f"Liquidity filter: Removed {initial_count - len(info_df)} stocks below the "
+                f"{params.liquidity_filter_percentile:.0%} {liquidity_label} percentile (cutoff: ${liquidity_cutoff:,.0f}).")
+
+    # Sector Filter
+    initial_count = len(info_df)
+    info_df = info_df[~info_df['sector'].str.strip().isin(params.sectors_to_exclude)]
+    logger.info(f"Sector filter: Removed {initial_count - len(info_df)} stocks from excluded sectors "
+                f"({list(params.sectors_to_exclude)}).")
+
+    logger.info(f"Finished universe filtering. {len(info_df)} stocks eligible.")
+    return info_df
+
+
+def _calculate_momentum(eligible: pd.DataFrame, features: FeatureStore, params: StrategyParameters,
+                        timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> pd.DataFrame:
+    """
+    Adds the latest momentum of the timeframe to the eligible stocks and
+    drops stocks where it could not be calculated. Daily data is used
+    without resampling.
+    """
+    logger.info(f"Calculating momentum for timeframe: {timeframe}...")
+    lookback = params.momentum_lookbacks[timeframe]
+    lag = params.momentum_lags[timeframe]
+
+    # Weekly and monthly prices are resampled once per run by the shared feature store;
+    # daily data is used as-is.
+    latest_momentum = features.latest_momentum(timeframe, lookback, lag)
+    eligible = eligible.assign(Momentum=latest_momentum.reindex(eligible.index)).dropna(subset=['Momentum'])
+    logger.info(f"Momentum calculated for {len(eligible)} stocks using {timeframe} data.")
+    return eligible
+
+
+def _apply_smoothness_filter(eligible: pd.DataFrame, features: FeatureStore, params: StrategyParameters,
+                             timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> pd.DataFrame:
+    """Applies the smoothness filter for the 'SMOOTH' strategy."""
+    logger.info("Applying smoothness filter...")
+    initial_count = len(eligible)
+    eligible = eligible[eligible['Momentum'] > 0]
+    logger.info(f"Removed {initial_count - len(eligible)} stocks with negative momentum.")
+
+    # Counted on the same resampled prices as the momentum (trading days for DAILY).
+    lookback = params.momentum_lookbacks[timeframe]
+    positive_periods_count = features.latest_positive_periods(timeframe, lookback)
+    eligible = eligible.assign(PositivePeriods=positive_periods_count.reindex(eligible.index))
+
+    min_periods = params.smoothness_min_positive_periods
+    initial_count = len(eligible)
+    eligible = eligible[eligible['PositivePeriods'] >= min_periods]
+    logger.info(f"Removed {initial_count - len(eligible)} stocks with fewer than {min_periods} positive {timeframe.lower()} periods.")
+    return eligible
+
+
+def _apply_volatility_screen(eligible: pd.DataFrame, features: FeatureStore, params: StrategyParameters) -> pd.DataFrame:
+    """Applies the low volatility screen for the 'FROG_IN_PAN' strategy."""
+    logger.info("Applying low volatility screen...")
+    volatility = features.trailing_volatility(params.volatility_lookback_days)
+    eligible = eligible.assign(Volatility=volatility.reindex(eligible.index)).dropna(subset=['Volatility'])
+
+    volatility_cutoff = eligible['Volatility'].quantile(params.volatility_cutoff_percentile)
+    initial_count = len(eligible)
+    eligible = eligible[eligible['Volatility'] <= volatility_cutoff]
+    logger.info(f"Volatility screen: Removed {initial_count - len(eligible)} stocks above the "
+                f"{params.volatility_cutoff_percentile:.0%} volatility percentile.")
+    return eligible
+
+
+def select_extremes(momentum: np.ndarray, sectors: Sequence[str],
+                    params: StrategyParameters) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Selects the long and short positions among the eligible stocks:
+    TOP_PERCENTILE_CUTOFF of them (at least one) from each end of the momentum
+    ranking, treating sectors as set by SECTOR_RANKING_MODE. Sectors are
+    grouped with integer codes, so no mode loops over sectors in Python.
+
+    Args:
+        momentum (np.ndarray): The momentum of each eligible stock (no NaNs).
+        sectors (Sequence[str]): The sector of each eligible stock.
+        params (StrategyParameters): The strategy and its parameters.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The positions of the longs and of the shorts, best-ranked first.
+    """
+    cutoff_n = int(len(momentum) * params.top_percentile_cutoff)
+    if cutoff_n == 0 and len(momentum) > 0:
+        cutoff_n = 1
+
+    if params.sector_ranking_mode == 'NONE':
+        # Only the tails are needed to trade; the full ranking is left to PortfolioResult.report.
+        return (signals.extreme_positions(momentum, cutoff_n, largest=True),
+                signals.extreme_positions(momentum, cutoff_n, largest=False))
+    codes = pd.factorize(pd.Series(sectors, dtype='object').str.strip())[0]
+    if params.sector_ranking_mode == 'NEUTRAL':
+        return (signals.sector_neutral_positions(momentum, codes, cutoff_n, largest=True),
+                signals.sector_neutral_positions(momentum, codes, cutoff_n, largest=False))
+    if params.sector_ranking_mode == 'CAPPED':
+        cap = params.max_names_per_sector
+        return (signals.sector_capped_positions(momentum, codes, cutoff_n, cap, largest=True),
+                signals.sector_capped_positions(momentum, codes, cutoff_n, cap, largest=False))
+    raise ValueError(f"Invalid SECTOR_RANKING_MODE '{params.sector_ranking_mode}'. Expected 'NONE', 'NEUTRAL' or 'CAPPED'.")
+
+
+def construct_portfolio(features: FeatureStore, company_info: Dict[str, Dict], params: StrategyParameters,
+                        timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> PortfolioResult:
+    """
+    Builds the target portfolio of one strategy and timeframe.
+
+    The construction only reads its arguments (the feature store memoizes
+    features thread-safely), so several constructions can run concurrently.
+
+    Args:
+        features (FeatureStore): The feature store over the historical data.
+        company_info (Dict[str, Dict]): Dictionary with 'marketCap' and 'sector'.
+        params (StrategyParameters): The strategy and its parameters.
+        timeframe (str): The calculation timeframe ('DAILY', 'WEEKLY', 'MONTHLY').
+
+    Returns:
+        PortfolioResult: The long and short tickers and the eligible stocks (ranked on demand).
+    """
+    strategy = params.strategy
+    logger.info(f"--- Starting portfolio construction for strategy: {strategy}, Timeframe: {timeframe} ---")
+
+    # Initial filtering based on liquidity and sector
+    eligible = _apply_universe_filters(features, company_info, params)
+
+    # Apply volatility screen FIRST if the strategy is FROG_IN_PAN
+    if strategy == 'FROG_IN_PAN':
+        eligible = _apply_volatility_screen(eligible, features, params)
+    else:
+        eligible = eligible.assign(Volatility=None)  # Ensure column exists for reporting
+
+    # Calculate momentum based on the specified timeframe
+    eligible = _calculate_momentum(eligible, features, params, timeframe)
+
+    # Apply smoothness filter if the strategy is SMOOTH
+    if strategy == 'SMOOTH':
+        eligible = _apply_smoothness_filter(eligible, features, params, timeframe)
+
+    logger.info(f"Selecting top/bottom percentiles (sector ranking: {params.sector_ranking_mode})...")
+    long_positions, short_positions = select_extremes(eligible['Momentum'].to_numpy(dtype='float64'),
+                                                      eligible['sector'].to_numpy(), params)
+    tickers = eligible.index.to_numpy()
+    long_tickers = tuple(tickers[long_positions])
+    short_tickers = tuple(tickers[short_positions])
+
+    logger.info(f"Final target portfolio generated. Longs: {len(long_tickers)}, Shorts: {len(short_tickers)}.")
+    return PortfolioResult(strategy=strategy, timeframe=timeframe, longs=long_tickers, shorts=short_tickers,
+                           eligible=eligible)
+
+
+def construct_portfolios(features: FeatureStore, company_info: Dict[str, Dict], config: Any,
+                         combinations: Sequence[Tuple[str, str]],
+                         max_workers: Optional[int] = None) -> Dict[Tuple[str, str], PortfolioResult]:
+    """
+    Builds the portfolios of several strategy x timeframe combinations
+    concurrently in a thread pool. The threads share the feature store, so a
+    feature needed by several combinations is still computed only once.
+
+    Args:
+        features (FeatureStore): The feature store over the historical data.
+        company_info (Dict[str, Dict]): Dictionary with 'marketCap' and 'sector'.
+        config (Any): Configuration module with strategy parameters.
+        combinations (Sequence[Tuple[str, str]]): The (strategy, timeframe) pairs to build.
+        max_workers (Optional[int]): The number of threads. Defaults to one per combination.
+
+    Returns:
+        Dict[Tuple[str, str], PortfolioResult]: The result of every combination that succeeded.
+    """
+    if not combinations:
+        return {}
+    results: Dict[Tuple[str, str], PortfolioResult] = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(combinations)) as executor:
+        futures = {executor.submit(construct_portfolio, features, company_info,
+                                   StrategyParameters.from_config(config, strategy), timeframe): (strategy, timeframe)
+                   for strategy, timeframe in combinations}
+        for future, (strategy, timeframe) in futures.items():
+            try:
+                results[(strategy, timeframe)] = future.result()
+            except Exception as e:
+                logger.error(f"Portfolio construction failed for {strategy} ({timeframe}): {e}", exc_info=True)
+    return results
+
+
 class PortfolioConstructor:
     """
     Constructs a target portfolio based on a specified momentum strategy and timeframe.
+    Holds no per-construction state; see `construct_portfolio`.
     """
-    def __init__(self, historical_data: pd.DataFrame, company_info: Dict[str, Dict], config: Any):
+    # The historical price fields the constructor always reads. Use required_fields()
+    # to get the complete list for a given configuration.
+    REQUIRED_FIELDS: List[str] = ['Adj Close']
+
+    def __init__(self, historical_data: pd.DataFrame, company_info: Dict[str, Dict], config: Any,
+                 features: Optional[FeatureStore] = None):
         """
         Initializes the PortfolioConstructor.
 
@@ -28,160 +349,59 @@ class PortfolioConstructor:
             historical_data (pd.DataFrame): DataFrame with historical OHLCV data.
             company_info (Dict[str, Dict]): Dictionary with 'marketCap' and 'sector'.
             config (Any): Configuration module with strategy parameters.
+            features (Optional[FeatureStore]): A feature store over `historical_data` shared
+                                               by the constructors of one run. Defaults to a
+                                               private store.
         """
         self.historical_data = historical_data
         self.company_info = company_info
         self.config = config
-        self.eligible_stocks = pd.DataFrame()
+        self.features = features or FeatureStore(historical_data)
         logger.info("PortfolioConstructor initialized.")
 
-    def _apply_universe_filters(self) -> None:
-        """Applies liquidity and sector filters to the stock universe."""
-        logger.info("Applying universe filters (liquidity and sector)...")
-        info_df = pd.DataFrame.from_dict(self.company_info, orient='index').dropna(subset=['marketCap', 'sector'])
-        info_df.index.name = 'Ticker'
-        
-        # Liquidity Filter
-        liquidity_cutoff = info_df['marketCap'].quantile(self.config.LIQUIDITY_FILTER_PERCENTILE)
-        initial_count = len(info_df)
-        info_df = info_df[info_df['marketCap'] >= liquidity_cutoff]
-        logger.info(f"Liquidity filter: Removed {initial_count - len(info_df)} stocks below the "
-                    f"{self.config.LIQUIDITY_FILTER_PERCENTILE:.0%} market cap percentile (cutoff: ${liquidity_cutoff:,.0f}).")
-
-        # Sector Filter
-        initial_count = len(info_df)
-        info_df = info_df[~info_df['sector'].str.strip().isin(self.config.SECTORS_TO_EXCLUDE)]
-        logger.info(f"Sector filter: Removed {initial_count - len(info_df)} stocks from excluded sectors "
-                    f"({self.config.SECTORS_TO_EXCLUDE}).")
-
-        self.eligible_stocks = info_df
-        logger.info(f"Finished universe filtering. {len(self.eligible_stocks)} stocks eligible.")
-
-    def _calculate_momentum(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> None:
+    @classmethod
+    def required_fields(cls, config: Any) -> List[str]:
         """
-        Calculates momentum for a given timeframe based on the configuration.
-        This version correctly handles daily data without resampling.
+        Returns the historical price fields needed for the given configuration.
+        Pass these to DataManager.fetch_historical_data() to avoid loading
+        unused OHLCV columns.
 
         Args:
-            timeframe (str): The timeframe to use ('DAILY', 'WEEKLY', 'MONTHLY').
+            config (Any): Configuration module with strategy parameters.
+
+        Returns:
+            List[str]: The required price fields (e.g., ['Adj Close']).
         """
-        logger.info(f"Calculating momentum for timeframe: {timeframe}...")
-        
-        timeframe_map = {'WEEKLY': 'W', 'MONTHLY': 'ME'}
-        lookback = self.config.MOMENTUM_LOOKBACKS[timeframe]
-        lag = self.config.MOMENTUM_LAGS[timeframe]
-
-        adj_close = self.historical_data['Adj Close']
-        
-        # --- START OF FIX ---
-        # Only resample if the timeframe is not daily.
-        if timeframe in timeframe_map:
-            resample_code = timeframe_map[timeframe]
-            prices = adj_close.resample(resample_code).last()
-        elif timeframe == 'DAILY':
-            # For daily, use the data as-is, no resampling needed.
-            prices = adj_close
-        else:
-            raise ValueError(f"Invalid timeframe '{timeframe}' specified for momentum calculation.")
-        # --- END OF FIX ---
-
-        # Calculate momentum on the correctly prepared price series
-        momentum = prices.pct_change(periods=lookback - lag, fill_method=None).shift(lag)
-        
-        latest_momentum = momentum.iloc[-1]
-        self.eligible_stocks['Momentum'] = latest_momentum
-        
-        # Drop stocks where momentum could not be calculated
-        self.eligible_stocks.dropna(subset=['Momentum'], inplace=True)
-        
-        logger.info(f"Momentum calculated for {len(self.eligible_stocks)} stocks using {timeframe} data.")
-
-    def _apply_smoothness_filter(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> None:
-        """Applies the smoothness filter for the 'SMOOTH' strategy."""
-        logger.info("Applying smoothness filter...")
-        initial_count = len(self.eligible_stocks)
-        self.eligible_stocks = self.eligible_stocks[self.eligible_stocks['Momentum'] > 0]
-        logger.info(f"Removed {initial_count - len(self.eligible_stocks)} stocks with negative momentum.")
-        
-        timeframe_map = {'DAILY': 'D', 'WEEKLY': 'W', 'MONTHLY': 'M'}
-        resample_code = timeframe_map[timeframe]
-        lookback = self.config.MOMENTUM_LOOKBACKS[timeframe]
-
-        adj_close = self.historical_data['Adj Close']
-        resampled_prices = adj_close.resample(resample_code).last()
-        resampled_returns = resampled_prices.pct_change()
-        
-        positive_periods_count = resampled_returns.iloc[-lookback:].apply(lambda x: np.sum(x > 0))
-        self.eligible_stocks['PositivePeriods'] = positive_periods_count
-        
-        min_periods = self.config.SMOOTHNESS_MIN_POSITIVE_PERIODS
-        initial_count = len(self.eligible_stocks)
-        self.eligible_stocks = self.eligible_stocks[self.eligible_stocks['PositivePeriods'] >= min_periods]
-        logger.info(f"Removed {initial_count - len(self.eligible_stocks)} stocks with fewer than {min_periods} positive {timeframe.lower()} periods.")
-        
-    def _apply_volatility_screen(self) -> None:
-        """Applies the low volatility screen for the 'FROG_IN_PAN' strategy."""
-        logger.info("Applying low volatility screen...")
-        adj_close = self.historical_data['Adj Close']
-        daily_returns = adj_close[self.eligible_stocks.index].pct_change()
-        volatility = daily_returns.iloc[-self.config.VOLATILITY_LOOKBACK_DAYS:].std()
-        self.eligible_stocks['Volatility'] = volatility
-        self.eligible_stocks.dropna(subset=['Volatility'], inplace=True)
-        
-        volatility_cutoff = self.eligible_stocks['Volatility'].quantile(self.config.VOLATILITY_CUTOFF_PERCENTILE)
-        initial_count = len(self.eligible_stocks)
-        self.eligible_stocks = self.eligible_stocks[self.eligible_stocks['Volatility'] <= volatility_cutoff]
-        logger.info(f"Volatility screen: Removed {initial_count - len(self.eligible_stocks)} stocks above the "
-                    f"{self.config.VOLATILITY_CUTOFF_PERCENTILE:.0%} volatility percentile.")
-
-    def generate_target_portfolio(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> Tuple[Dict[str, List[str]], pd.DataFrame]:
+        if config.LIQUIDITY_MEASURE == 'DOLLAR_VOLUME':
+            return cls.REQUIRED_FIELDS + ['Close', 'Volume']
+        return list(cls.REQUIRED_FIELDS)
+
+    def generate_target_portfolio(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'],
+                                  strategy: Optional[str] = None) -> Tuple[Dict[str, List[str]], pd.DataFrame]:
         """
         Main public method to generate the target portfolio and a detailed report.
 
         Args:
             timeframe (str): The calculation timeframe ('DAILY', 'WEEKLY', 'MONTHLY').
+            strategy (Optional[str]): 'CORE', 'SMOOTH' or 'FROG_IN_PAN'. Defaults to config.STRATEGY_NAME.
 
         Returns:
             A dictionary of long/short ticker lists and a detailed report DataFrame.
         """
-        strategy = self.config.STRATEGY_NAME
-        logger.info(f"--- Starting portfolio construction for strategy: {strategy}, Timeframe: {timeframe} ---")
-
-        # Initial filtering based on liquidity and sector
-        self._apply_universe_filters()
-        
-        # Apply volatility screen FIRST if the strategy is FROG_IN_PAN
-        if strategy == 'FROG_IN_PAN':
-            self._apply_volatility_screen()
-        else:
-            self.eligible_stocks['Volatility'] = None # Ensure column exists for reporting
+        result = self.construct(timeframe, strategy)
+        return result.target_portfolio, result.report
 
-        # Calculate momentum based on the specified timeframe
-        self._calculate_momentum(timeframe)
+    def construct(self, timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], strategy: Optional[str] = None) -> PortfolioResult:
+        """
+        Builds the target portfolio, leaving the ranked report to be built
+        only if it is read (see PortfolioResult.report).
 
-        # Apply smoothness filter if the strategy is SMOOTH
-        if strategy == 'SMOOTH':
-            self._apply_smoothness_filter(timeframe)
+        Args:
+            timeframe (str): The calculation timeframe ('DAILY', 'WEEKLY', 'MONTHLY').
+            strategy (Optional[str]): 'CORE', 'SMOOTH' or 'FROG_IN_PAN'. Defaults to config.STRATEGY_NAME.
 
-        logger.info("Ranking stocks and selecting top/bottom percentiles...")
-        self.eligible_stocks['Rank'] = self.eligible_stocks['Momentum'].rank(ascending=False, method='first')
-        
-        # Use dropna() when creating deciles to handle cases with fewer than 10 stocks
-        if len(self.eligible_stocks) >= 10:
-            self.eligible_stocks['Decile'] = pd.qcut(self.eligible_stocks['Rank'], 10, labels=False, duplicates='drop') + 1
-        else:
-            self.eligible_stocks['Decile'] = 1
-            
-        report_df = self.eligible_stocks.sort_values(by='Rank')
-        
-        cutoff_n = int(len(report_df) * self.config.TOP_PERCENTILE_CUTOFF)
-        if cutoff_n == 0 and len(report_df) > 0:
-            cutoff_n = 1
-        
-        long_tickers = report_df.head(cutoff_n).index.tolist()
-        short_tickers = report_df.tail(cutoff_n).index.tolist()
-        
-        logger.info(f"Final target portfolio generated. Longs: {len(long_tickers)}, Shorts: {len(short_tickers)}.")
-        target_portfolio = {'longs': long_tickers, 'shorts': short_tickers}
-        
-        return target_portfolio, report_df
\ No newline at end of file
+        Returns:
+            PortfolioResult: The long and short tickers and the eligible stocks.
+        """
+        params = StrategyParameters.from_config(self.config, strategy)
+        return construct_portfolio(self.features, self.company_info, params, timeframe)
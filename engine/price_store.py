@@ -0,0 +1,255 @@
+# engine/price_store.py
+"""
+Partitioned Historical Price Store for the Quantitative Momentum Trading System.
+
+Historical OHLCV data is stored on disk partitioned by price field and by
+calendar year, one wide (date x ticker) parquet file per partition:
+
+    data/historical_store/adj_close/2024.parquet
+    data/historical_store/volume/2024.parquet
+    ...
+
+Reads can be projected onto a subset of fields, tickers and a date range, so
+only the partitions (and parquet columns) a caller actually needs are loaded.
+Writes only touch the partitions covered by the new data, which keeps daily
+incremental refreshes cheap. Writes are serialized and atomic (each partition
+is written to a temporary file and then swapped in), so concurrent download
+workers can write into the store while others read from it. A manifest next
+to the partitions records which dates each ticker's stored history covers.
+"""
+
+import logging
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import List, Optional
+
+from engine.cache_manifest import CacheManifest
+
+logger = logging.getLogger(__name__)
+
+
+class HistoricalPriceStore:
+    """
+    Reads and writes yfinance-style (Price, Ticker) MultiIndex frames to a
+    field- and year-partitioned parquet directory.
+    """
+    PRICE_FIELDS: List[str] = ['Adj Close', 'Close', 'High', 'Low', 'Open', 'Volume']
+
+    def __init__(self, root_dir: str):
+        """
+        Initializes the store.
+
+        Args:
+            root_dir (str): The directory holding the field/year partitions.
+        """
+        self.root_dir = root_dir
+        self._write_lock = threading.Lock()
+        self.manifest = CacheManifest(os.path.join(root_dir, 'manifest.json'))
+
+    @staticmethod
+    def _field_dir_name(field: str) -> str:
+        """Converts a price field (e.g., 'Adj Close') to its directory name ('adj_close')."""
+        return re.sub(r'\W+', '_', field.strip().lower())
+
+    def _partition_path(self, field: str, year: int) -> str:
+        return os.path.join(self.root_dir, self._field_dir_name(field), f"{year}.parquet")
+
+    @staticmethod
+    def _merge_partition(new: pd.DataFrame, stored: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merges new values into a stored partition, preferring non-NaN new values.
+        Equivalent to `new.combine_first(stored)` but done in one numpy pass,
+        which matters for partitions with thousands of ticker columns.
+        """
+        index = stored.index.union(new.index)
+        columns = stored.columns.union(new.columns)
+        new_values = new.reindex(index=index, columns=columns).to_numpy(dtype='float64')
+        stored_values = stored.reindex(index=index, columns=columns).to_numpy(dtype='float64')
+        merged = np.where(np.isnan(new_values), stored_values, new_values)
+        return pd.DataFrame(merged, index=index, columns=columns)
+
+    @staticmethod
+    def _write_partition(frame: pd.DataFrame, path: str) -> None:
+        """Writes a partition atomically, so readers never see a half-written file."""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _partition_years(self, field: str) -> List[int]:
+        """Returns the sorted years for which a partition of the given field exists."""
+        field_dir = os.path.join(self.root_dir, self._field_dir_name(field))
+        if not os.path.isdir(field_dir):
+            return []
+        return sorted(int(name[:-len('.parquet')]) for name in os.listdir(field_dir)
+                      if name.endswith('.parquet') and name[:-len('.parquet')].isdigit())
+
+    def exists(self) -> bool:
+        """Checks whether the store holds any data."""
+        return bool(self._partition_years('Adj Close'))
+
+    def fields(self) -> List[str]:
+        """Returns the price fields that are present in the store."""
+        return [field for field in self.PRICE_FIELDS if self._partition_years(field)]
+
+    def tickers(self) -> List[str]:
+        """
+        Returns all tickers present in the store. Only the parquet schemas of
+        the 'Adj Close' partitions are read, not the data itself.
+        """
+        tickers = set()
+        for year in self._partition_years('Adj Close'):
+            schema = pq.read_schema(self._partition_path('Adj Close', year))
+            tickers.update(name for name in schema.names if name != 'Date' and not name.startswith('__'))
+        return sorted(tickers)
+
+    def first_date(self) -> Optional[pd.Timestamp]:
+        """Returns the earliest date stored, or None if the store is empty."""
+        years = self._partition_years('Adj Close')
+        if not years:
+            return None
+        earliest = pd.read_parquet(self._partition_path('Adj Close', years[0]), columns=[])
+        return earliest.index.min() if len(earliest.index) else None
+
+    def last_date(self) -> Optional[pd.Timestamp]:
+        """Returns the most recent date stored, or None if the store is empty."""
+        years = self._partition_years('Adj Close')
+        if not years:
+            return None
+        latest = pd.read_parquet(self._partition_path('Adj Close', years[-1]), columns=[])
+        return latest.index.max() if len(latest.index) else None
+
+    def last_dates(self, tickers: Optional[List[str]] = None) -> pd.Series:
+        """
+        Returns the date of each ticker's most recent stored bar. Only the two
+        most recent 'Adj Close' partitions are read, so tickers without data in
+        that span are treated as missing.
+
+        Args:
+            tickers (Optional[List[str]]): The tickers to look up. Defaults to all stored tickers.
+
+        Returns:
+            pd.Series: The last stored date per ticker (missing tickers are omitted).
+        """
+        years = self._partition_years('Adj Close')[-2:]
+        if not years:
+            return pd.Series(dtype='datetime64[ns]')
+        recent = self.read(fields=['Adj Close'], start=pd.Timestamp(year=years[0], month=1, day=1), tickers=tickers)
+        if recent is None:
+            return pd.Series(dtype='datetime64[ns]')
+        prices = recent['Adj Close']
+        has_data = prices.notna().to_numpy()
+        # Position of the last non-NaN row per column, found by scanning the reversed mask.
+        last_positions = len(prices) - 1 - np.argmax(has_data[::-1], axis=0)
+        last_dates = pd.Series(prices.index[last_positions], index=prices.columns)
+        return last_dates[has_data.any(axis=0)]
+
+    def last_modified(self) -> Optional[datetime]:
+        """Returns the modification time of the most recently written partition."""
+        mtimes = [os.path.getmtime(self._partition_path(field, year))
+                  for field in self.fields() for year in self._partition_years(field)]
+        return datetime.fromtimestamp(max(mtimes)) if mtimes else None
+
+    def write(self, data: pd.DataFrame) -> None:
+        """
+        Merges a (Price, Ticker) MultiIndex frame into the store. Values in
+        `data` take precedence over stored values for the same date and ticker.
+        Only the partitions covered by `data` are rewritten.
+
+        Args:
+            data (pd.DataFrame): The historical data to store.
+        """
+        if data is None or data.empty:
+            return
+
+        with self._write_lock:
+            self._write_unlocked(data)
+        logger.info(f"Wrote {len(data)} rows x {data.shape[1]} columns to price store at {self.root_dir}.")
+
+    def _write_unlocked(self, data: pd.DataFrame) -> None:
+        """Merges `data` into its partitions. Must be called with the write lock held."""
+        for field in data.columns.get_level_values(0).unique():
+            field_frame = data[field].dropna(axis=1, how='all')
+            if field_frame.empty:
+                continue
+            field_frame.columns = field_frame.columns.astype(str)
+            os.makedirs(os.path.join(self.root_dir, self._field_dir_name(field)), exist_ok=True)
+
+            for year, year_frame in field_frame.groupby(field_frame.index.year):
+                path = self._partition_path(field, int(year))
+                if os.path.exists(path):
+                    year_frame = self._merge_partition(year_frame, pd.read_parquet(path))
+                year_frame = year_frame.sort_index().sort_index(axis=1)
+                year_frame.index.name = 'Date'
+                self._write_partition(year_frame, path)
+
+    def drop_tickers(self, tickers: List[str]) -> None:
+        """
+        Removes the complete history (and the recorded coverage) of the given
+        tickers from every partition.
+
+        Args:
+            tickers (List[str]): The tickers to remove.
+        """
+        to_drop = set(tickers)
+        with self._write_lock:
+            for field in self.fields():
+                for year in self._partition_years(field):
+                    path = self._partition_path(field, year)
+                    stored_columns = [name for name in pq.read_schema(path).names if name in to_drop]
+                    if stored_columns:
+                        self._write_partition(pd.read_parquet(path).drop(columns=stored_columns), path)
+        self.manifest.forget(list(to_drop))
+        logger.info(f"Dropped {len(to_drop)} tickers from the price store.")
+
+    def read(self,
+             fields: Optional[List[str]] = None,
+             start: Optional[pd.Timestamp] = None,
+             end: Optional[pd.Timestamp] = None,
+             tickers: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Loads a projection of the stored data. Only the partitions overlapping
+        [start, end] are opened and only the requested ticker columns are read.
+
+        Args:
+            fields (Optional[List[str]]): The price fields to load. Defaults to all stored fields.
+            start (Optional[pd.Timestamp]): The first date to load (inclusive).
+            end (Optional[pd.Timestamp]): The last date to load (inclusive).
+            tickers (Optional[List[str]]): The tickers to load. Defaults to all stored tickers.
+
+        Returns:
+            Optional[pd.DataFrame]: A (Price, Ticker) MultiIndex frame, or None if nothing matched.
+        """
+        fields = fields or self.fields()
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        field_frames = {}
+        for field in fields:
+            years = [year for year in self._partition_years(field)
+                     if (start is None or year >= start.year) and (end is None or year <= end.year)]
+            if not years:
+                continue
+
+            year_frames = []
+            for year in years:
+                path = self._partition_path(field, year)
+                columns = None
+                if tickers is not None:
+                    stored = set(pq.read_schema(path).names)
+                    columns = [t for t in tickers if t in stored]
+                year_frames.append(pd.read_parquet(path, columns=columns))
+
+            field_frame = pd.concat(year_frames).sort_index()
+            field_frames[field] = field_frame.loc[start:end]
+
+        if not field_frames:
+            return None
+
+        data = pd.concat(field_frames, axis=1, names=['Price', 'Ticker'])
+        data.index.name = 'Date'
+        return data
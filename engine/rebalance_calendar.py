@@ -0,0 +1,176 @@
+# engine/rebalance_calendar.py
+"""
+Rebalance Calendar for the Quantitative Momentum Trading System.
+
+Precomputes the exchange's trading days from a local holiday table
+(data/exchange_holidays.csv) and, per rebalance period, the Nth trading day of
+every period (REBALANCE_DAY_OF_PERIOD). The schedules are built once with
+vectorized operations and held as sorted date arrays plus hash sets, so the
+live scheduler and the backtester can ask "is this a rebalance day?" in O(1)
+however often they ask.
+"""
+
+import logging
+import os
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Any, Dict, FrozenSet, Iterable, Literal, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+RebalancePeriod = Literal['DAILY', 'WEEKLY', 'MONTHLY', 'QUARTERLY']
+DateLike = Union[str, date, pd.Timestamp]
+
+
+def rebalance_period(timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], config: Any) -> RebalancePeriod:
+    """
+    Returns how often a strategy timeframe rebalances: DAILY and WEEKLY
+    portfolios every day or week, MONTHLY portfolios every REBALANCE_PERIOD
+    ('MONTHLY' or 'QUARTERLY').
+    """
+    if timeframe == 'MONTHLY':
+        return config.REBALANCE_PERIOD
+    return timeframe
+
+
+class RebalanceCalendar:
+    """
+    The trading days and rebalance days of an exchange between two dates.
+    """
+    # The pandas period frequency of each rebalance period (weeks run Monday to Sunday).
+    PERIOD_FREQUENCIES: Dict[str, str] = {'WEEKLY': 'W-SUN', 'MONTHLY': 'M', 'QUARTERLY': 'Q'}
+
+    def __init__(self, holidays: Iterable[DateLike], start: DateLike, end: DateLike):
+        """
+        Initializes the calendar.
+
+        Args:
+            holidays (Iterable[DateLike]): The weekdays on which the exchange is closed.
+            start (DateLike): The first date of the calendar.
+            end (DateLike): The last date of the calendar.
+        """
+        self.holidays = pd.DatetimeIndex(sorted(set(pd.to_datetime(list(holidays))))).normalize()
+        self.start = pd.Timestamp(start).normalize()
+        self.end = pd.Timestamp(end).normalize()
+        self.trading_days = pd.bdate_range(self.start, self.end).difference(self.holidays)
+        self._trading_day_set = self._as_set(self.trading_days)
+        self._schedules: Dict[Tuple[str, int], Tuple[pd.DatetimeIndex, FrozenSet[int]]] = {}
+        logger.info(f"RebalanceCalendar initialized with {len(self.trading_days)} trading days "
+                    f"from {self.start.date()} to {self.end.date()}.")
+
+    @classmethod
+    def from_csv(cls, path: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> 'RebalanceCalendar':
+        """
+        Builds a calendar from a holiday table with a 'date' column.
+
+        The calendar spans the years of the table by default, and at least
+        until a year from today. Past the end of the table only weekends are
+        skipped, so extend the table as new holiday schedules are published.
+        If the table does not exist, the calendar only skips weekends.
+
+        Args:
+            path (str): The holiday CSV file (e.g., data/exchange_holidays.csv).
+            start (Optional[DateLike]): The first date. Defaults to the start of the table's first year.
+            end (Optional[DateLike]): The last date. Defaults to the end of the table's last year.
+
+        Returns:
+            RebalanceCalendar: The calendar.
+        """
+        if os.path.exists(path):
+            holidays = pd.to_datetime(pd.read_csv(path, comment='#')['date'])
+        else:
+            logger.warning(f"Holiday table {path} not found. The rebalance calendar only skips weekends.")
+            holidays = pd.DatetimeIndex([])
+        today = pd.Timestamp.today().normalize()
+        table_start = pd.Timestamp(year=holidays.min().year, month=1, day=1) if len(holidays) else today
+        table_end = pd.Timestamp(year=holidays.max().year, month=12, day=31) if len(holidays) else today
+        start = pd.Timestamp(start) if start is not None else min(table_start, today - pd.DateOffset(years=1))
+        end = pd.Timestamp(end) if end is not None else max(table_end, today + pd.DateOffset(years=1))
+        if len(holidays) and end > table_end:
+            logger.warning(f"Holiday table {path} ends in {table_end.year}. Later dates only skip weekends.")
+        return cls(holidays, start, end)
+
+    @staticmethod
+    def _as_set(dates: pd.DatetimeIndex) -> FrozenSet[int]:
+        """Converts dates to a set of day numbers for O(1) membership tests."""
+        return frozenset(dates.to_numpy(dtype='datetime64[D]').astype(np.int64).tolist())
+
+    def _day_number(self, day: DateLike) -> int:
+        """Returns the day number of a date, checking that it lies within the calendar."""
+        timestamp = pd.Timestamp(day).normalize()
+        if not self.start <= timestamp <= self.end:
+            raise ValueError(f"{timestamp.date()} is outside the rebalance calendar "
+                             f"({self.start.date()} to {self.end.date()}).")
+        return int(timestamp.to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+    def _schedule(self, period: RebalancePeriod, day_of_period: int) -> Tuple[pd.DatetimeIndex, FrozenSet[int]]:
+        """
+        Returns the rebalance days of a period, computed on first use.
+
+        The Nth trading day of each period is found with one pass over the
+        trading days: the position where each period starts plus N - 1
+        (clipped to the period's last trading day). A negative N counts from
+        the end of the period (-1 is its last trading day).
+        """
+        key = (period, day_of_period)
+        if key not in self._schedules:
+            if day_of_period == 0:
+                raise ValueError("REBALANCE_DAY_OF_PERIOD must be 1 or more (or negative to count from the period end).")
+            if period == 'DAILY':
+                days = self.trading_days
+            elif period in self.PERIOD_FREQUENCIES:
+                periods = self.trading_days.to_period(self.PERIOD_FREQUENCIES[period]).asi8
+                is_start = np.ones(len(periods), dtype=bool)
+                is_start[1:] = periods[1:] != periods[:-1]
+                starts = np.flatnonzero(is_start)
+                ends = np.append(starts[1:], len(periods)) - 1
+                offsets = starts + day_of_period - 1 if day_of_period > 0 else ends + day_of_period + 1
+                days = self.trading_days[np.clip(offsets, starts, ends)]
+            else:
+                raise ValueError(f"Invalid rebalance period '{period}'. Expected 'DAILY' or one of {list(self.PERIOD_FREQUENCIES)}.")
+            self._schedules[key] = (days, self._as_set(days))
+        return self._schedules[key]
+
+    def is_trading_day(self, day: DateLike) -> bool:
+        """Checks whether the exchange is open on a date."""
+        return self._day_number(day) in self._trading_day_set
+
+    def is_rebalance_day(self, day: DateLike, period: RebalancePeriod, day_of_period: int = 1) -> bool:
+        """
+        Checks whether a date is a rebalance day in O(1).
+
+        Args:
+            day (DateLike): The date to check.
+            period (str): 'DAILY', 'WEEKLY', 'MONTHLY' or 'QUARTERLY'.
+            day_of_period (int): Which trading day of the period rebalances (1 = the first).
+
+        Returns:
+            bool: True if the date is the period's rebalance day.
+        """
+        return self._day_number(day) in self._schedule(period, day_of_period)[1]
+
+    def rebalance_dates(self, period: RebalancePeriod, day_of_period: int = 1,
+                        start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> pd.DatetimeIndex:
+        """
+        Returns the rebalance days of a period between two dates.
+
+        Args:
+            period (str): 'DAILY', 'WEEKLY', 'MONTHLY' or 'QUARTERLY'.
+            day_of_period (int): Which trading day of the period rebalances (1 = the first).
+            start (Optional[DateLike]): The first date to include. Defaults to the calendar start.
+            end (Optional[DateLike]): The last date to include. Defaults to the calendar end.
+
+        Returns:
+            pd.DatetimeIndex: The sorted rebalance days.
+        """
+        days = self._schedule(period, day_of_period)[0]
+        first = days.searchsorted(pd.Timestamp(start)) if start is not None else 0
+        last = days.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(days)
+        return days[first:last]
+
+    def next_rebalance_day(self, day: DateLike, period: RebalancePeriod, day_of_period: int = 1) -> Optional[pd.Timestamp]:
+        """Returns the first rebalance day on or after a date, or None past the end of the calendar."""
+        days = self._schedule(period, day_of_period)[0]
+        position = days.searchsorted(pd.Timestamp(day).normalize())
+        return days[position] if position < len(days) else None
@@ -0,0 +1,163 @@
+# engine/rebalance_engine.py
+"""
+Rebalance Engine for the Quantitative Momentum Trading System.
+
+Turns target portfolios into orders. The current quantities, target weights
+and prices of one or many portfolios are aligned into numpy arrays over the
+union of their tickers, and the trades that bring every position to its
+target weight (opening, closing and resizing) are computed in one vectorized
+step, with quantities rounded to whole lots and resizes below a minimum trade
+size skipped. Both the live run (through ExecutionManager) and the backtest
+engine size their trades here.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Hashable, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def equal_target_weights(tickers: pd.Index, target_portfolio: Dict[str, List[str]]) -> np.ndarray:
+    """
+    Returns the target weight of every ticker: each long receives +1/N and
+    each short -1/N of the portfolio value, where N is the number of targets.
+
+    Args:
+        tickers (pd.Index): The tickers to return weights for.
+        target_portfolio (Dict[str, List[str]]): Dict with 'longs' and 'shorts' lists.
+
+    Returns:
+        np.ndarray: The weights, aligned with `tickers` (0 for tickers outside the target).
+    """
+    longs, shorts = target_portfolio.get('longs', []), target_portfolio.get('shorts', [])
+    weights = np.zeros(len(tickers))
+    num_targets = len(longs) + len(shorts)
+    if num_targets == 0:
+        return weights
+    for names, weight in ((longs, 1.0 / num_targets), (shorts, -1.0 / num_targets)):
+        positions = tickers.get_indexer(list(names))
+        weights[positions[positions >= 0]] = weight
+    return weights
+
+
+def rebalance_deltas(current: np.ndarray, weights: np.ndarray, prices: np.ndarray, total_values: Any,
+                     lot_size: int = 1, min_trade_fraction: float = 0.0) -> np.ndarray:
+    """
+    Computes the quantity every position must trade to reach its target weight.
+
+    Works on one portfolio (1-D arrays) or a stack of portfolios (2-D arrays
+    of shape (portfolios, tickers) with a price row shared by all of them).
+    Target quantities are rounded toward zero to whole lots. Positions whose
+    price is missing or not positive are left unchanged. Resizes of a
+    position kept on the same side that are worth less than
+    `min_trade_fraction` of its portfolio's value are skipped; opening,
+    closing and flipping positions always trade.
+
+    Args:
+        current (np.ndarray): The current signed quantities (negative for shorts).
+        weights (np.ndarray): The signed target weights.
+        prices (np.ndarray): The prices, aligned with the last axis.
+        total_values (Any): The value of each portfolio (a scalar, or one value per portfolio row).
+        lot_size (int): The number of shares per lot.
+        min_trade_fraction (float): The smallest resize to trade, as a fraction of the portfolio value.
+
+    Returns:
+        np.ndarray: The signed int64 quantities to trade (positive = BUY, negative = SELL).
+    """
+    current = np.asarray(current, dtype=np.int64)
+    weights = np.asarray(weights, dtype='float64')
+    prices = np.asarray(prices, dtype='float64')
+    total_values = np.asarray(total_values, dtype='float64')
+    if current.ndim == 2 and total_values.ndim == 1:
+        total_values = total_values[:, np.newaxis]
+
+    has_price = np.isfinite(prices) & (prices > 0)
+    safe_prices = np.where(has_price, prices, 1.0)
+    lots = np.trunc(total_values * weights / (safe_prices * lot_size))
+    target = np.where(has_price, lots.astype(np.int64) * lot_size, current)
+    deltas = target - current
+
+    # A resize keeps a held position on the same side of the target (even if it rounds to zero lots).
+    is_resize = (current != 0) & (np.sign(weights) == np.sign(current))
+    is_small = np.abs(deltas) * np.where(has_price, prices, 0.0) < min_trade_fraction * np.abs(total_values)
+    deltas[is_resize & is_small] = 0
+    return deltas
+
+
+def deltas_to_orders(tickers: np.ndarray, deltas: np.ndarray, order_type: str) -> List[Dict[str, Any]]:
+    """
+    Converts the trade quantities of one portfolio into order dictionaries,
+    SELL orders first so the cash they free is available to the buys.
+    """
+    sells, buys = np.flatnonzero(deltas < 0), np.flatnonzero(deltas > 0)
+    return ([{'action': 'SELL', 'ticker': tickers[i], 'quantity': int(-deltas[i]), 'orderType': order_type} for i in sells]
+            + [{'action': 'BUY', 'ticker': tickers[i], 'quantity': int(deltas[i]), 'orderType': order_type} for i in buys])
+
+
+class RebalanceEngine:
+    """
+    Calculates the orders that rebalance portfolios to their equal-weighted
+    targets, using the lot size and minimum trade size of the configuration.
+    """
+    def __init__(self, config: Any):
+        """
+        Initializes the engine.
+
+        Args:
+            config (Any): Configuration module with ORDER_TYPE, ORDER_LOT_SIZE and MIN_TRADE_FRACTION.
+        """
+        self.config = config
+
+    def calculate_orders_batch(self, portfolios: Mapping[Hashable, Tuple[Dict[str, List[str]], Dict[str, int], float]],
+                               prices: Dict[str, float]) -> Dict[Hashable, List[Dict[str, Any]]]:
+        """
+        Calculates the rebalancing orders of several portfolios in one vectorized step.
+
+        Args:
+            portfolios (Mapping[Hashable, Tuple]): Per portfolio key (e.g., (strategy, timeframe)): its
+                target portfolio ('longs' and 'shorts'), current positions and total value.
+            prices (Dict[str, float]): The live price of each ticker.
+
+        Returns:
+            Dict[Hashable, List[Dict[str, Any]]]: The orders of each portfolio, sells first.
+        """
+        keys = list(portfolios)
+        if not keys:
+            return {}
+        tickers = pd.Index(sorted({t for target, positions, _ in portfolios.values()
+                                   for t in [*positions, *target.get('longs', []), *target.get('shorts', [])]}))
+        current = np.zeros((len(keys), len(tickers)), dtype=np.int64)
+        weights = np.zeros((len(keys), len(tickers)))
+        for row, key in enumerate(keys):
+            target, positions, _ = portfolios[key]
+            current[row, tickers.get_indexer(list(positions))] = list(positions.values())
+            weights[row] = equal_target_weights(tickers, target)
+        price_row = pd.Series(prices, dtype='float64').reindex(tickers).to_numpy()
+        total_values = np.array([portfolios[key][2] for key in keys], dtype='float64')
+
+        deltas = rebalance_deltas(current, weights, price_row, total_values,
+                                  lot_size=self.config.ORDER_LOT_SIZE, min_trade_fraction=self.config.MIN_TRADE_FRACTION)
+
+        unpriced = ((current != 0) | (weights != 0)) & ~(price_row > 0)
+        if unpriced.any():
+            missing = tickers[unpriced.any(axis=0)]
+            logger.warning(f"No valid price for {len(missing)} tickers; their positions are left unchanged: {list(missing[:10])}")
+
+        ticker_names = tickers.to_numpy()
+        orders = {key: deltas_to_orders(ticker_names, deltas[row], self.config.ORDER_TYPE) for row, key in enumerate(keys)}
+        logger.info(f"Calculated {sum(len(o) for o in orders.values())} rebalancing orders for {len(keys)} portfolios "
+                    f"over {len(tickers)} tickers.")
+        return orders
+
+    def calculate_orders(self, target_portfolio: Dict[str, List[str]], current_positions: Dict[str, int],
+                         total_portfolio_value: float, current_prices: Dict[str, float]) -> List[Dict[str, Any]]:
+        """
+        Calculates the orders that rebalance one portfolio to its target (see `calculate_orders_batch`).
+
+        Returns:
+            List[Dict[str, Any]]: The orders, sells first.
+        """
+        return self.calculate_orders_batch({None: (target_portfolio, current_positions, total_portfolio_value)},
+                                           current_prices)[None]
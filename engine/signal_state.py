@@ -0,0 +1,285 @@
+# engine/signal_state.py
+"""
+Incremental DAILY Signal State for the Quantitative Momentum Trading System.
+
+A daily run only adds one bar to the price history, yet recomputing momentum,
+smoothness, volatility and dollar volume from the full panel re-crunches
+years of data. The SignalState keeps what those signals need instead: the
+last `lookback + 1` prices for momentum, and rolling windows with running sums
+(see signals.RollingMoments) for the positive-day count, the volatility of
+daily returns and the average dollar volume. Advancing it by one bar costs
+O(tickers).
+
+The state is checkpointed as an .npz file next to the price store. On the
+next run it is caught up with the bars added since, or rebuilt from the
+history if the universe, the parameters or the stored prices changed.
+"""
+
+import logging
+import os
+import threading
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence
+
+from engine.signals import RollingMoments
+
+logger = logging.getLogger(__name__)
+
+
+def _tracks_dollar_volume(historical_data: pd.DataFrame, config: Any) -> bool:
+    """Checks whether the configuration ranks liquidity on dollar volume and the history has its fields."""
+    fields = set(historical_data.columns.get_level_values('Price'))
+    return config.LIQUIDITY_MEASURE == 'DOLLAR_VOLUME' and {'Close', 'Volume'} <= fields
+
+
+class SignalState:
+    """
+    The latest DAILY signals of a fixed ticker set, advanced one bar at a time.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, tickers: Sequence[str], momentum_lookback: int, momentum_lag: int,
+                 volatility_window: int, dollar_volume_window: Optional[int] = None,
+                 return_offset: Optional[np.ndarray] = None):
+        """
+        Initializes an empty state.
+
+        Args:
+            tickers (Sequence[str]): The tickers, in the column order of the bars.
+            momentum_lookback (int): The DAILY momentum lookback in trading days.
+            momentum_lag (int): The DAILY momentum lag in trading days.
+            volatility_window (int): The trailing window of the volatility screen.
+            dollar_volume_window (Optional[int]): The trailing window of the average dollar
+                                                  volume, or None if it is not tracked.
+            return_offset (Optional[np.ndarray]): A typical daily return per ticker, used to keep
+                                                  the volatility sums accurate.
+        """
+        self.tickers = pd.Index(tickers, name='Ticker')
+        self.momentum_lookback = momentum_lookback
+        self.momentum_lag = momentum_lag
+        self.volatility_window = volatility_window
+        self.dollar_volume_window = dollar_volume_window
+        self.last_date: Optional[pd.Timestamp] = None
+        n = len(self.tickers)
+        # The last lookback + 1 prices; the newest is at prices[price_position - 1].
+        self.prices = np.full((momentum_lookback + 1, n), np.nan)
+        self.price_position = 0
+        self.positive_days = RollingMoments(self.tickers, momentum_lookback)
+        self.returns = RollingMoments(self.tickers, volatility_window, offset=return_offset)
+        self.dollar_volume = RollingMoments(self.tickers, dollar_volume_window) if dollar_volume_window else None
+
+    @classmethod
+    def from_config(cls, tickers: Sequence[str], config: Any, track_dollar_volume: bool,
+                    return_offset: Optional[np.ndarray] = None) -> 'SignalState':
+        """Creates an empty state with the DAILY parameters of a configuration module."""
+        return cls(tickers, config.MOMENTUM_LOOKBACKS['DAILY'], config.MOMENTUM_LAGS['DAILY'],
+                   config.VOLATILITY_LOOKBACK_DAYS,
+                   config.DOLLAR_VOLUME_LOOKBACK_DAYS if track_dollar_volume else None,
+                   return_offset=return_offset)
+
+    def parameters(self) -> np.ndarray:
+        """Returns the window parameters, e.g., to check a checkpoint against the configuration."""
+        return np.array([self.momentum_lookback, self.momentum_lag, self.volatility_window,
+                         self.dollar_volume_window or 0], dtype=np.int64)
+
+    def _price(self, periods_ago: int) -> np.ndarray:
+        """Returns the prices of `periods_ago` bars before the newest one."""
+        return self.prices[(self.price_position - 1 - periods_ago) % len(self.prices)]
+
+    def advance(self, date: pd.Timestamp, adj_close: np.ndarray, close: Optional[np.ndarray] = None,
+                volume: Optional[np.ndarray] = None) -> None:
+        """
+        Adds one daily bar. All arrays are in ticker order, with NaN for missing values.
+
+        Args:
+            date (pd.Timestamp): The date of the bar.
+            adj_close (np.ndarray): The adjusted closing prices.
+            close (Optional[np.ndarray]): The unadjusted closing prices (for the dollar volume).
+            volume (Optional[np.ndarray]): The share volumes (for the dollar volume).
+        """
+        adj_close = np.asarray(adj_close, dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_return = adj_close / self._price(0) - 1.0
+            self.positive_days.append((daily_return > 0).astype('float64'))
+        self.returns.append(daily_return)
+        if self.dollar_volume is not None:
+            self.dollar_volume.append(np.asarray(close, dtype='float64') * np.asarray(volume, dtype='float64'))
+        self.prices[self.price_position] = adj_close
+        self.price_position = (self.price_position + 1) % len(self.prices)
+        self.last_date = pd.Timestamp(date)
+
+    def _bar_arrays(self, historical_data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Returns the fields the state reads from a history frame, aligned to its tickers."""
+        arrays = {'adj_close': historical_data['Adj Close'].reindex(columns=self.tickers).to_numpy(dtype='float64')}
+        if self.dollar_volume is not None:
+            for field, name in (('Close', 'close'), ('Volume', 'volume')):
+                arrays[name] = historical_data[field].reindex(columns=self.tickers).to_numpy(dtype='float64')
+        return arrays
+
+    def update(self, historical_data: pd.DataFrame) -> int:
+        """
+        Advances the state through the bars of `historical_data` dated after `last_date`.
+
+        Args:
+            historical_data (pd.DataFrame): DataFrame with historical OHLCV data.
+
+        Returns:
+            int: The number of bars added.
+        """
+        first_row = 0 if self.last_date is None else historical_data.index.searchsorted(self.last_date, side='right')
+        new_data = historical_data.iloc[first_row:]
+        if new_data.empty:
+            return 0
+        arrays = self._bar_arrays(new_data)
+        for row, date in enumerate(new_data.index):
+            self.advance(date, **{name: values[row] for name, values in arrays.items()})
+        return len(new_data)
+
+    @classmethod
+    def from_history(cls, historical_data: pd.DataFrame, config: Any) -> 'SignalState':
+        """
+        Builds the state from the trailing bars of a history frame: just
+        enough rows for every window, plus one for the first return.
+
+        Args:
+            historical_data (pd.DataFrame): DataFrame with historical OHLCV data.
+            config (Any): Configuration module with strategy parameters.
+
+        Returns:
+            SignalState: The state as of the last date of the history.
+        """
+        track_dollar_volume = _tracks_dollar_volume(historical_data, config)
+        adj_close = historical_data['Adj Close']
+        span = max(config.MOMENTUM_LOOKBACKS['DAILY'], config.VOLATILITY_LOOKBACK_DAYS,
+                   config.DOLLAR_VOLUME_LOOKBACK_DAYS if track_dollar_volume else 0) + 1
+        recent = historical_data.iloc[-(span + 1):]
+        with warnings.catch_warnings():
+            # Tickers without any return in the span have no mean; their offset becomes zero.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return_offset = np.nanmean(recent['Adj Close'].pct_change(fill_method=None).to_numpy(dtype='float64'), axis=0)
+        state = cls.from_config(adj_close.columns, config, track_dollar_volume, return_offset=return_offset)
+        state.update(recent)
+        logger.info(f"Built the DAILY signal state for {len(state.tickers)} tickers from {len(recent)} bars.")
+        return state
+
+    def is_current(self, historical_data: pd.DataFrame) -> bool:
+        """Checks whether the state describes exactly the last bar of `historical_data`."""
+        return (self.last_date is not None and len(historical_data.index) > 0
+                and historical_data.index[-1] == self.last_date
+                and historical_data['Adj Close'].columns.equals(self.tickers))
+
+    def _matches(self, historical_data: pd.DataFrame, config: Any) -> bool:
+        """
+        Checks whether a restored state can be caught up with `historical_data`:
+        same tickers and parameters, and its newest prices are still the stored
+        prices of that date (a restated or re-downloaded history changes them).
+        """
+        expected = SignalState.from_config([], config, _tracks_dollar_volume(historical_data, config)).parameters()
+        if not np.array_equal(self.parameters(), expected) or not historical_data['Adj Close'].columns.equals(self.tickers):
+            return False
+        if self.last_date not in historical_data.index:
+            return False
+        stored = historical_data['Adj Close'].loc[self.last_date].to_numpy(dtype='float64')
+        return np.array_equal(stored, self._price(0), equal_nan=True)
+
+    # --- Latest signals ---
+
+    def momentum(self) -> pd.Series:
+        """Returns the DAILY momentum: the return from `lookback` to `lag` bars ago."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = self._price(self.momentum_lag) / self._price(self.momentum_lookback) - 1.0
+        return pd.Series(values, index=self.tickers)
+
+    def positive_periods(self) -> pd.Series:
+        """Returns the number of positive daily returns among the last `lookback` days."""
+        return self.positive_days.sum().round().astype(np.int64)
+
+    def volatility(self) -> pd.Series:
+        """Returns the standard deviation of daily returns over the volatility window."""
+        return self.returns.volatility()
+
+    def average_dollar_volume(self) -> Optional[pd.Series]:
+        """Returns the average daily dollar volume, or None if it is not tracked."""
+        if self.dollar_volume is None:
+            return None
+        return self.dollar_volume.mean(min_periods=max(1, self.dollar_volume_window // 2))
+
+    # --- Checkpointing ---
+
+    def save(self, path: str) -> None:
+        """Writes the state to an .npz checkpoint atomically."""
+        arrays: Dict[str, np.ndarray] = {
+            'version': np.asarray(self.FORMAT_VERSION),
+            'tickers': self.tickers.to_numpy(dtype=str),
+            'last_date': np.asarray(self.last_date.value if self.last_date is not None else -1, dtype=np.int64),
+            'parameters': self.parameters(),
+            'prices': self.prices,
+            'price_position': np.asarray(self.price_position),
+        }
+        windows = {'positive_days': self.positive_days, 'returns': self.returns, 'dollar_volume': self.dollar_volume}
+        for name, moments in windows.items():
+            if moments is not None:
+                arrays.update({f"{name}.{key}": value for key, value in moments.state().items()})
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved the DAILY signal state as of {self.last_date.date() if self.last_date is not None else None} to {path}.")
+
+    @classmethod
+    def load(cls, path: str) -> Optional['SignalState']:
+        """Reads a checkpoint written by `save`. Returns None if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as checkpoint:
+                arrays = {key: checkpoint[key] for key in checkpoint.files}
+            if int(arrays['version']) != cls.FORMAT_VERSION:
+                logger.info(f"Signal state checkpoint {path} has an old format. Ignoring it.")
+                return None
+            lookback, lag, volatility_window, dollar_volume_window = (int(v) for v in arrays['parameters'])
+            state = cls(arrays['tickers'].tolist(), lookback, lag, volatility_window, dollar_volume_window or None)
+            state.prices = np.array(arrays['prices'], dtype='float64')
+            state.price_position = int(arrays['price_position'])
+            last_date = int(arrays['last_date'])
+            state.last_date = pd.Timestamp(last_date) if last_date >= 0 else None
+
+            def window_state(name: str) -> Dict[str, np.ndarray]:
+                prefix = f"{name}."
+                return {key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)}
+            state.positive_days = RollingMoments.from_state(state.tickers, window_state('positive_days'))
+            state.returns = RollingMoments.from_state(state.tickers, window_state('returns'))
+            if dollar_volume_window:
+                state.dollar_volume = RollingMoments.from_state(state.tickers, window_state('dollar_volume'))
+            return state
+        except Exception as e:
+            logger.warning(f"Could not read the signal state checkpoint {path}: {e}. It will be rebuilt.")
+            return None
+
+
+def load_signal_state(path: str, historical_data: pd.DataFrame, config: Any) -> SignalState:
+    """
+    Restores the DAILY signal state from its checkpoint and advances it to the
+    last bar of `historical_data`, rebuilding it from the history when the
+    checkpoint is missing or no longer matches. The result is checkpointed again.
+
+    Args:
+        path (str): The checkpoint file (e.g., next to the price store).
+        historical_data (pd.DataFrame): DataFrame with historical OHLCV data.
+        config (Any): Configuration module with strategy parameters.
+
+    Returns:
+        SignalState: The state as of the last date of `historical_data`.
+    """
+    state = SignalState.load(path)
+    if state is not None and state._matches(historical_data, config):
+        added = state.update(historical_data)
+        logger.info(f"Advanced the DAILY signal state by {added} bar(s) to {state.last_date.date()}.")
+    else:
+        if state is not None:
+            logger.info("The DAILY signal state checkpoint no longer matches the price history. Rebuilding it.")
+        state = SignalState.from_history(historical_data, config)
+    state.save(path)
+    return state
@@ -0,0 +1,578 @@
+# engine/signals.py
+"""
+Vectorized signal calculations for the Quantitative Momentum Trading System.
+
+The functions in this module operate on whole (date x ticker) price and volume
+matrices in a single pass, so the same code can serve the daily portfolio
+construction (which only needs the latest row) and historical analysis.
+"""
+
+import logging
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def average_dollar_volume(close: pd.DataFrame, volume: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Calculates the rolling average daily dollar volume (Close x Volume).
+
+    A ticker needs at least half of the window's bars to receive a value, so
+    recently listed stocks are not excluded outright.
+
+    Args:
+        close (pd.DataFrame): Unadjusted closing prices (date x ticker).
+        volume (pd.DataFrame): Daily share volumes (date x ticker).
+        window (int): The number of trading days to average over.
+
+    Returns:
+        pd.DataFrame: The average dollar volume for every date and ticker.
+    """
+    dollar_volume = close * volume.reindex_like(close)
+    return dollar_volume.rolling(window, min_periods=max(1, window // 2)).mean()
+
+
+def log_prices(prices: pd.DataFrame) -> np.ndarray:
+    """
+    Converts a (date x ticker) price matrix to log prices. Missing and
+    non-positive prices become NaN.
+    """
+    values = prices.to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(values > 0, np.log(values), np.nan)
+
+
+def momentum_grid(prices: pd.DataFrame, lookbacks: Sequence[int], lags: Sequence[int],
+                  at: int = -1, log_returns: bool = False) -> np.ndarray:
+    """
+    Calculates momentum for every combination of lookback and lag in one
+    vectorized pass over the price matrix.
+
+    The momentum for lookback L and lag G on row t is the return from row
+    t - L to row t - G, i.e. the same value as
+    `prices.pct_change(periods=L - G).shift(G).iloc[t]`. It is computed as a
+    difference of log prices, so the whole grid is two fancy-indexed gathers
+    and one broadcast subtraction.
+
+    Args:
+        prices (pd.DataFrame): Prices (date x ticker), already resampled to the desired timeframe.
+        lookbacks (Sequence[int]): The lookbacks in periods (e.g., 1 to 24 months).
+        lags (Sequence[int]): The lags in periods (e.g., 0 to 3 months).
+        at (int): The row position to calculate momentum on. Defaults to the latest row.
+        log_returns (bool): If True, returns log returns instead of simple returns.
+
+    Returns:
+        np.ndarray: A (lookback x lag x ticker) array. Combinations with a lag that is not
+                    shorter than the lookback, or that reach before the first row, are NaN.
+    """
+    logp = log_prices(prices)
+    n_rows = logp.shape[0]
+    row = at if at >= 0 else n_rows + at
+    if not 0 <= row < n_rows:
+        raise IndexError(f"Row position {at} is out of bounds for {n_rows} rows.")
+    lookbacks = np.asarray(lookbacks, dtype=int)
+    lags = np.asarray(lags, dtype=int)
+
+    start_rows = row - lookbacks
+    end_rows = row - lags
+    # Out-of-range rows are clipped for the gather and masked afterwards.
+    starts = logp[np.clip(start_rows, 0, n_rows - 1)]
+    ends = logp[np.clip(end_rows, 0, n_rows - 1)]
+    grid = ends[np.newaxis, :, :] - starts[:, np.newaxis, :]
+
+    valid = (start_rows[:, np.newaxis] >= 0) & (end_rows[np.newaxis, :] >= 0) & (lags[np.newaxis, :] < lookbacks[:, np.newaxis])
+    grid[~valid] = np.nan
+    return grid if log_returns else np.expm1(grid)
+
+
+def momentum_grid_frame(grid: np.ndarray, lookbacks: Sequence[int], lags: Sequence[int],
+                        tickers: Sequence[str]) -> pd.DataFrame:
+    """
+    Converts a momentum grid to a DataFrame indexed by (Lookback, Lag) with one column per ticker.
+
+    Args:
+        grid (np.ndarray): A (lookback x lag x ticker) array from `momentum_grid`.
+        lookbacks (Sequence[int]): The lookbacks of the grid's first axis.
+        lags (Sequence[int]): The lags of the grid's second axis.
+        tickers (Sequence[str]): The tickers of the grid's third axis.
+
+    Returns:
+        pd.DataFrame: The grid as a tidy-indexed frame.
+    """
+    index = pd.MultiIndex.from_product([list(lookbacks), list(lags)], names=['Lookback', 'Lag'])
+    return pd.DataFrame(grid.reshape(len(index), len(tickers)), index=index, columns=pd.Index(tickers, name='Ticker'))
+
+
+def positive_period_counts(returns: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Counts the positive returns in the trailing `window` periods for every
+    date and ticker, as a rolling sum of a boolean matrix taken from its
+    cumulative sum. Missing returns count as not positive, and the first
+    rows count over the periods available so far.
+
+    Args:
+        returns (pd.DataFrame): Period returns (date x ticker).
+        window (int): The number of periods to count over.
+
+    Returns:
+        pd.DataFrame: The number of positive periods for every date and ticker.
+    """
+    with np.errstate(invalid='ignore'):
+        positive = (returns.to_numpy(dtype='float64') > 0).astype(np.int64)
+    cumulative = np.vstack([np.zeros((1, positive.shape[1]), dtype=np.int64), np.cumsum(positive, axis=0)])
+    rows = np.arange(1, len(positive) + 1)
+    counts = cumulative[rows] - cumulative[np.maximum(rows - window, 0)]
+    return pd.DataFrame(counts, index=returns.index, columns=returns.columns)
+
+
+# --- Point-in-time signal matrices ---
+# The functions below produce, for every daily row, the value the live portfolio
+# construction would have seen had it run on that day with the data up to that
+# day. Resampled timeframes are handled with two inputs: the prices at the end of
+# each period, and the daily prices standing in for the (still open) current period.
+
+def period_positions(index: pd.DatetimeIndex, period_index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Maps each daily date to the position of the period containing it.
+
+    Args:
+        index (pd.DatetimeIndex): The daily dates.
+        period_index (pd.DatetimeIndex): The period labels of a resampled frame (period end dates).
+
+    Returns:
+        np.ndarray: The period position of every daily date.
+    """
+    return np.searchsorted(period_index.to_numpy(), index.to_numpy(), side='left')
+
+
+def ffill_within_periods(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Forward-fills a (date x ticker) array, but only within each period, so a
+    row holds the last value seen so far in its period (like a resample's
+    `last()` would if the period ended on that row).
+
+    Args:
+        values (np.ndarray): The daily values.
+        positions (np.ndarray): The period position of every row (non-decreasing).
+
+    Returns:
+        np.ndarray: The forward-filled values.
+    """
+    n_rows = values.shape[0]
+    rows = np.arange(n_rows)
+    valid = ~np.isnan(values)
+    last_valid_row = np.maximum.accumulate(np.where(valid, rows[:, np.newaxis], -1), axis=0)
+    period_start_row = np.searchsorted(positions, positions, side='left')
+    filled = values[np.maximum(last_valid_row, 0), np.arange(values.shape[1])]
+    filled[last_valid_row < period_start_row[:, np.newaxis]] = np.nan
+    return filled
+
+
+def _gather_periods(period_values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Gathers period rows by position, returning NaN rows for negative positions."""
+    gathered = period_values[np.clip(rows, 0, None)]
+    gathered[rows < 0] = np.nan
+    return gathered
+
+
+def point_in_time_momentum(current: np.ndarray, period_prices: np.ndarray, positions: np.ndarray,
+                           lookback: int, lag: int) -> np.ndarray:
+    """
+    Calculates the momentum every daily row would have seen, matching
+    `resampled.pct_change(periods=lookback - lag).shift(lag).iloc[-1]` on the
+    data up to that row.
+
+    Args:
+        current (np.ndarray): Daily prices forward-filled within their period (see `ffill_within_periods`).
+        period_prices (np.ndarray): The prices at the end of each period.
+        positions (np.ndarray): The period position of every daily row.
+        lookback (int): The lookback in periods.
+        lag (int): The lag in periods.
+
+    Returns:
+        np.ndarray: A (date x ticker) array of momentum values.
+    """
+    if lag >= lookback:
+        return np.full(current.shape, np.nan)
+    end = current if lag == 0 else _gather_periods(period_prices, positions - lag)
+    start = _gather_periods(period_prices, positions - lookback)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return end / start - 1.0
+
+
+def point_in_time_positive_periods(current: np.ndarray, period_prices: np.ndarray, positions: np.ndarray,
+                                   lookback: int) -> np.ndarray:
+    """
+    Counts the positive period returns among the last `lookback` periods
+    (the open current period included) that every daily row would have seen.
+
+    Args:
+        current (np.ndarray): Daily prices forward-filled within their period.
+        period_prices (np.ndarray): The prices at the end of each period.
+        positions (np.ndarray): The period position of every daily row.
+        lookback (int): The number of periods to count over.
+
+    Returns:
+        np.ndarray: A (date x ticker) array of positive-period counts.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        completed_positive = np.zeros(period_prices.shape)
+        completed_positive[1:] = period_prices[1:] / period_prices[:-1] - 1.0 > 0
+        current_positive = current / _gather_periods(period_prices, positions - 1) - 1.0 > 0
+    # Completed periods k-lookback+1 .. k-1 via a cumulative count, plus the open period k.
+    cumulative = np.vstack([np.zeros((1, period_prices.shape[1])), np.cumsum(completed_positive, axis=0)])
+    upper = cumulative[np.clip(positions, 0, None)]
+    lower = cumulative[np.clip(positions - lookback + 1, 0, None)]
+    return upper - lower + current_positive
+
+
+# --- Rolling volatility ---
+
+def rolling_volatility(returns: pd.DataFrame, window: int, min_periods: int = 2) -> pd.DataFrame:
+    """
+    Calculates the rolling standard deviation (ddof=1) of returns for every
+    date and ticker in one pass, from cumulative sums of the returns, their
+    squares and the count of non-missing values. Missing returns are skipped,
+    as in `returns.iloc[-window:].std()`.
+
+    Args:
+        returns (pd.DataFrame): Daily returns (date x ticker).
+        window (int): The number of rows in the trailing window.
+        min_periods (int): The minimum number of non-missing returns for a value.
+
+    Returns:
+        pd.DataFrame: The rolling volatility (NaN where fewer than min_periods returns exist).
+    """
+    values = returns.to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+    # Returns are centred on their column mean first; the variance does not change,
+    # but the cumulative sums stay small, which keeps the differences accurate.
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        offset = np.nan_to_num(np.nanmean(values, axis=0))
+    centred = values - offset
+    centred[~valid] = 0.0
+
+    def trailing_sum(x: np.ndarray) -> np.ndarray:
+        total = np.cumsum(x, axis=0)
+        total[window:] -= total[:-window].copy()
+        return total
+
+    count = trailing_sum(valid.astype('float64'))
+    total = trailing_sum(centred)
+    total_sq = trailing_sum(np.square(centred, out=centred))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (total_sq - total * total / count) / (count - 1)
+    volatility = np.sqrt(np.clip(variance, 0.0, None, out=variance), out=variance)
+    volatility[count < max(min_periods, 2)] = np.nan
+    return pd.DataFrame(volatility, index=returns.index, columns=returns.columns)
+
+
+class RollingMoments:
+    """
+    Incrementally maintained rolling moments of a fixed ticker set.
+
+    Keeps the last `window` rows (e.g., of returns) in a ring buffer together
+    with their running count, sum and sum of squares, so appending a new bar
+    and reading the volatility, sum or mean cost O(tickers) instead of
+    rescanning the window.
+    """
+    def __init__(self, tickers: Sequence[str], window: int, offset: Optional[np.ndarray] = None):
+        """
+        Args:
+            tickers (Sequence[str]): The tickers (columns) being tracked.
+            window (int): The number of rows in the trailing window.
+            offset (Optional[np.ndarray]): A per-ticker value subtracted before accumulating
+                                           (e.g., the mean return), to keep the sums accurate.
+        """
+        self.tickers = list(tickers)
+        self.window = window
+        n = len(self.tickers)
+        self.offset = np.zeros(n) if offset is None else np.nan_to_num(np.asarray(offset, dtype='float64'))
+        self.buffer = np.full((window, n), np.nan)
+        self.position = 0
+        self.appended = 0
+        self.count = np.zeros(n)
+        self.total = np.zeros(n)
+        self.total_sq = np.zeros(n)
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, window: int) -> 'RollingMoments':
+        """Builds the rolling moments from the trailing rows of a (date x ticker) returns frame."""
+        values = returns.to_numpy(dtype='float64')
+        with np.errstate(invalid='ignore'):
+            offset = np.nanmean(values, axis=0) if len(values) else None
+        moments = cls(returns.columns, window, offset=offset)
+        for row in values[-window:]:
+            moments.append(row)
+        return moments
+
+    def append(self, row: np.ndarray) -> None:
+        """
+        Adds the returns of a new bar (in ticker order; NaN if missing) and
+        drops the bar that falls out of the window.
+        """
+        row = np.asarray(row, dtype='float64')
+        outgoing = self.buffer[self.position]
+        self._accumulate(outgoing, sign=-1.0)
+        self._accumulate(row, sign=1.0)
+        self.buffer[self.position] = row
+        self.position = (self.position + 1) % self.window
+        self.appended += 1
+        # Running sums pick up rounding error with every update; rebuild them once per window.
+        if self.appended % self.window == 0:
+            self._rebuild()
+
+    def _accumulate(self, row: np.ndarray, sign: float) -> None:
+        valid = ~np.isnan(row)
+        centred = np.where(valid, row - self.offset, 0.0)
+        self.count += sign * valid
+        self.total += sign * centred
+        self.total_sq += sign * centred * centred
+
+    def _rebuild(self) -> None:
+        """Recomputes the running sums from the ring buffer."""
+        valid = ~np.isnan(self.buffer)
+        centred = np.where(valid, self.buffer - self.offset, 0.0)
+        self.count = valid.sum(axis=0).astype('float64')
+        self.total = centred.sum(axis=0)
+        self.total_sq = (centred * centred).sum(axis=0)
+
+    def volatility(self, min_periods: int = 2) -> pd.Series:
+        """Returns the standard deviation (ddof=1) of the returns in the current window."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        volatility = np.sqrt(np.clip(variance, 0.0, None))
+        volatility[self.count < max(min_periods, 2)] = np.nan
+        return pd.Series(volatility, index=self.tickers)
+
+    def sum(self) -> pd.Series:
+        """Returns the sum of the non-missing values in the current window."""
+        return pd.Series(self.total + self.offset * self.count, index=self.tickers)
+
+    def mean(self, min_periods: int = 1) -> pd.Series:
+        """Returns the mean of the non-missing values in the current window."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = self.offset + self.total / self.count
+        mean[self.count < max(min_periods, 1)] = np.nan
+        return pd.Series(mean, index=self.tickers)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Returns the arrays that fully describe the rolling window, e.g., for np.savez."""
+        return {'window': np.asarray(self.window), 'position': np.asarray(self.position),
+                'appended': np.asarray(self.appended), 'offset': self.offset, 'buffer': self.buffer,
+                'count': self.count, 'total': self.total, 'total_sq': self.total_sq}
+
+    @classmethod
+    def from_state(cls, tickers: Sequence[str], state: Dict[str, np.ndarray]) -> 'RollingMoments':
+        """Restores rolling moments saved with `state`."""
+        moments = cls(tickers, int(state['window']), offset=state['offset'])
+        moments.position = int(state['position'])
+        moments.appended = int(state['appended'])
+        moments.buffer = np.array(state['buffer'], dtype='float64')
+        moments.count = np.array(state['count'], dtype='float64')
+        moments.total = np.array(state['total'], dtype='float64')
+        moments.total_sq = np.array(state['total_sq'], dtype='float64')
+        return moments
+
+
+# --- Ranking ---
+
+def extreme_positions(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Returns the positions of the first k (largest=True) or last k (largest=False)
+    entries of a stable descending sort of `values`, in that sort's order,
+    without sorting everything: a partial selection (argpartition) finds the
+    k-th value and only the selected entries are sorted. Ties are broken by
+    position, as in `rank(ascending=False, method='first')`.
+
+    Args:
+        values (np.ndarray): A 1-D array without NaNs (e.g., momentum).
+        k (int): The number of entries to select.
+        largest (bool): Whether to select the top (True) or the bottom (False) of the ranking.
+
+    Returns:
+        np.ndarray: The selected positions, best-ranked first.
+    """
+    values = np.asarray(values, dtype='float64')
+    k = min(max(k, 0), len(values))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k == len(values):
+        chosen = np.arange(len(values))
+    elif largest:
+        threshold = -np.partition(-values, k - 1)[k - 1]
+        beyond = np.flatnonzero(values > threshold)
+        # Among ties at the threshold, a stable descending sort puts the earliest first.
+        ties = np.flatnonzero(values == threshold)[:k - len(beyond)]
+        chosen = np.sort(np.concatenate([beyond, ties]))
+    else:
+        threshold = np.partition(values, k - 1)[k - 1]
+        beyond = np.flatnonzero(values < threshold)
+        ties = np.flatnonzero(values == threshold)
+        ties = ties[len(ties) - (k - len(beyond)):]
+        chosen = np.sort(np.concatenate([beyond, ties]))
+    return chosen[np.argsort(-values[chosen], kind='stable')]
+
+
+def group_cumcount(codes: np.ndarray) -> np.ndarray:
+    """
+    Returns the position of every entry among the entries with the same group
+    code, in array order (like `groupby(...).cumcount()`), using one stable sort.
+
+    Args:
+        codes (np.ndarray): Non-negative integer group codes (e.g., from pd.factorize).
+
+    Returns:
+        np.ndarray: The 0-based position of each entry within its group.
+    """
+    codes = np.asarray(codes)
+    by_group = np.argsort(codes, kind='stable')
+    sorted_codes = codes[by_group]
+    is_start = np.ones(len(codes), dtype=bool)
+    is_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, np.arange(len(codes)), 0))
+    positions = np.empty(len(codes), dtype=np.int64)
+    positions[by_group] = np.arange(len(codes)) - group_start
+    return positions
+
+
+def proportional_quotas(sizes: np.ndarray, k: int) -> np.ndarray:
+    """
+    Splits k picks across groups in proportion to their sizes, handing out the
+    rounding remainder by the largest fractional share (largest remainder method).
+
+    Args:
+        sizes (np.ndarray): The number of entries in each group.
+        k (int): The total number of picks.
+
+    Returns:
+        np.ndarray: The picks per group; never more than the group's size.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    total = int(sizes.sum())
+    k = min(max(k, 0), total)
+    if total == 0:
+        return np.zeros(len(sizes), dtype=np.int64)
+    exact = sizes * k / total
+    quotas = np.floor(exact).astype(np.int64)
+    shortfall = k - int(quotas.sum())
+    if shortfall > 0:
+        quotas[np.argsort(-(exact - quotas), kind='stable')[:shortfall]] += 1
+    return quotas
+
+
+def sector_neutral_positions(values: np.ndarray, codes: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Selects about k entries with each group contributing its proportional
+    share (see `proportional_quotas`): the best-ranked (largest=True) or
+    worst-ranked (largest=False) entries within each group.
+
+    Args:
+        values (np.ndarray): A 1-D array without NaNs (e.g., momentum).
+        codes (np.ndarray): The group code of each entry (e.g., its sector).
+        k (int): The total number of entries to select.
+        largest (bool): Whether to select the top (True) or the bottom (False) of each group.
+
+    Returns:
+        np.ndarray: The selected positions, in the order of a stable descending sort of values.
+    """
+    codes = np.asarray(codes)
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.intp)
+    order = np.argsort(-np.asarray(values, dtype='float64'), kind='stable')
+    ranked_codes = codes[order]
+    rank_in_group = group_cumcount(ranked_codes)
+    sizes = np.bincount(codes)
+    quotas = proportional_quotas(sizes, k)[ranked_codes]
+    keep = rank_in_group < quotas if largest else rank_in_group >= sizes[ranked_codes] - quotas
+    return order[keep]
+
+
+def sector_capped_positions(values: np.ndarray, codes: np.ndarray, k: int, cap: int,
+                            largest: bool = True) -> np.ndarray:
+    """
+    Walks the ranking from the top (largest=True) or the bottom (largest=False)
+    and selects the first k entries, skipping entries whose group already
+    contributed `cap` entries.
+
+    Args:
+        values (np.ndarray): A 1-D array without NaNs (e.g., momentum).
+        codes (np.ndarray): The group code of each entry (e.g., its sector).
+        k (int): The number of entries to select (fewer if the caps run out).
+        cap (int): The maximum number of entries per group.
+        largest (bool): Whether to walk the ranking from the top (True) or the bottom (False).
+
+    Returns:
+        np.ndarray: The selected positions, in the order of a stable descending sort of values.
+    """
+    order = np.argsort(-np.asarray(values, dtype='float64'), kind='stable')
+    walk = order if largest else order[::-1]
+    allowed = walk[group_cumcount(np.asarray(codes)[walk]) < cap][:max(k, 0)]
+    return allowed if largest else allowed[::-1]
+
+
+def cross_sectional_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Ranks every row of a (date x ticker) matrix in one argsort: 1 is the
+    largest value, ties are broken by column order (like
+    `rank(ascending=False, method='first')`) and NaN values are not ranked.
+
+    Args:
+        values (np.ndarray): A (date x ticker) matrix, NaN where a ticker is not eligible.
+
+    Returns:
+        np.ndarray: The (date x ticker) ranks as floats, NaN where the value is NaN.
+    """
+    values = np.asarray(values, dtype='float64')
+    # NaNs sort to the end of every row.
+    order = np.argsort(-values, axis=1, kind='stable')
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, np.arange(1, values.shape[1] + 1, dtype='float64')[np.newaxis, :], axis=1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def rank_deciles(ranks: np.ndarray) -> np.ndarray:
+    """
+    Converts cross-sectional ranks to deciles (1 = best), matching
+    `pd.qcut(rank, 10, labels=False) + 1` on every row. Rows with fewer than
+    ten ranked entries are all decile 1, as in the portfolio report.
+
+    Args:
+        ranks (np.ndarray): (date x ticker) ranks from `cross_sectional_ranks`.
+
+    Returns:
+        np.ndarray: The (date x ticker) deciles as floats, NaN where the rank is NaN.
+    """
+    ranks = np.asarray(ranks, dtype='float64')
+    counts = np.sum(~np.isnan(ranks), axis=1, keepdims=True)
+    with np.errstate(invalid='ignore'):
+        # The qcut edges of ranks 1..n fall at 1 + i * (n - 1) / 10; integer division avoids rounding.
+        offset = np.nan_to_num(ranks - 1).astype(np.int64)
+        deciles = np.maximum(1, -(-(10 * offset) // np.maximum(counts - 1, 1))).astype('float64')
+    deciles[np.broadcast_to(counts < 10, deciles.shape)] = 1.0
+    deciles[np.isnan(ranks)] = np.nan
+    return deciles
+
+
+def leg_turnover(membership: np.ndarray) -> np.ndarray:
+    """
+    Calculates the turnover of an equally weighted leg on every rebalance:
+    the sum of the absolute weight changes, so 1.0 means the whole leg was
+    bought (e.g., the first rebalance) and 2.0 that it was fully replaced.
+
+    Args:
+        membership (np.ndarray): A (rebalance date x ticker) boolean matrix of the leg's names.
+
+    Returns:
+        np.ndarray: The turnover of every rebalance date.
+    """
+    membership = np.asarray(membership, dtype=bool)
+    sizes = membership.sum(axis=1, keepdims=True)
+    weights = np.divide(membership, sizes, out=np.zeros(membership.shape), where=sizes > 0)
+    previous = np.vstack([np.zeros((1, weights.shape[1])), weights[:-1]])
+    return np.abs(weights - previous).sum(axis=1)
@@ -9,6 +9,8 @@ from ibapi.utils import iswrapper
 from ibapi.common import BarData, TickAttrib
 from ibapi.contract import Contract, ContractDetails # <-- Added Contract
 from ibapi.ticktype import TickTypeEnum
+from ibapi.execution import Execution
+from ibapi.commission_report import CommissionReport
 
 # Logger for this module
 logger = logging.getLogger(__name__)
@@ -90,10 +92,24 @@ class IBKROfficialAPIWrapper(EWrapper):
             else:
                 future.set_result(result)
 
+    def _dispatch_to_tracker(self, method_name: str, *args: Any):
+        """Hands an order callback to the base handler's OrderTracker on the event loop."""
+        tracker = getattr(self.base_handler_ref, 'order_tracker', None)
+        if tracker is None:
+            return
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(getattr(tracker, method_name), *args)
+        else:
+            getattr(tracker, method_name)(*args)
+
     @iswrapper
     def error(self, reqId: int, errorCode: int, errorString: str, advancedOrderRejectJson: str = ""):
         """Handles errors and informational messages from TWS."""
-        super().error(reqId, errorCode, errorString, advancedOrderRejectJson)
+        try:
+            super().error(reqId, errorCode, errorString, advancedOrderRejectJson)
+        except TypeError:
+            # ibapi releases before 10.x have no advancedOrderRejectJson argument.
+            super().error(reqId, errorCode, errorString)
 
         # List of informational codes that should not be treated as fatal errors for a request.
         # 10167: Market data is not subscribed, delayed data displayed.
@@ -105,6 +121,12 @@ class IBKROfficialAPIWrapper(EWrapper):
             self._log_wrapper_status("warning", f"IBKR Info (Code {errorCode}): {errorString}")
             return
 
+        tracker = getattr(self.base_handler_ref, 'order_tracker', None)
+        if tracker is not None and reqId in tracker:
+            # Order errors (the reqId is the orderId) also update the order's tracked state. Request IDs
+            # are drawn from a separate range (IBKRBaseHandler.REQUEST_ID_BASE), so they never match an order.
+            self._dispatch_to_tracker('on_error', reqId, errorCode, errorString)
+
         # For actual errors, fail the corresponding future.
         if reqId != -1 and reqId in self.futures:
             future = self.futures.get(reqId)
@@ -345,6 +367,7 @@ class IBKROfficialAPIWrapper(EWrapper):
         """Callback for order status updates."""
         super().orderStatus(orderId, status, filled, remaining, avgFillPrice, permId, parentId, lastFillPrice, clientId, whyHeld, mktCapPrice)
         # self._log_wrapper_status("info", f"orderStatus - Id: {orderId}, Status: {status}, Filled: {filled}")
+        self._dispatch_to_tracker('on_order_status', orderId, status, filled, avgFillPrice, lastFillPrice)
 
         # Check if this orderId is one we are waiting for
         if orderId in self.futures:
@@ -358,6 +381,19 @@ class IBKROfficialAPIWrapper(EWrapper):
                 # We also consider "Submitted" as a success for fire-and-forget execution
                  self._safe_set_future_result(self.futures.get(orderId), {"status": status, "filled": filled})
 
+    @iswrapper
+    def execDetails(self, reqId: int, contract: Contract, execution: Execution):
+        """Callback for each execution (fill) of an order."""
+        super().execDetails(reqId, contract, execution)
+        self._dispatch_to_tracker('on_execution', execution.orderId, execution.execId, execution.shares,
+                                  execution.price, execution.cumQty, execution.avgPrice)
+
+    @iswrapper
+    def commissionReport(self, commissionReport: CommissionReport):
+        """Callback for the commission of an execution."""
+        super().commissionReport(commissionReport)
+        self._dispatch_to_tracker('on_commission', commissionReport.execId, commissionReport.commission)
+
     @iswrapper
     def _safe_set_future_result(self, future: asyncio.Future, result: Any):
         """Helper to safely set future results from the API thread."""
@@ -1,7 +1,6 @@
 # handlers/ibkr_base_handler.py
 
 import threading
-import time
 import logging
 import asyncio
 from typing import List, Dict, Any, Optional, Union, Callable
@@ -13,7 +12,10 @@ from ibapi.contract import Contract, ContractDetails
 from ibapi.common import BarData
 from ibapi.order import Order
 
+from configs import ibkr_config
 from handlers.ibkr_api_wrapper import IBKROfficialAPIWrapper, IBKRApiError
+from handlers.ibkr_contract_cache import ContractCache
+from handlers.ibkr_order_tracker import OrderTracker
 
 # Logger for this module
 logger = logging.getLogger(__name__)
@@ -26,8 +28,19 @@ if not logger.hasHandlers():
     logger.propagate = False
 
 class IBKRBaseHandler:
-    def __init__(self, status_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+    # Request IDs (market data, contract details, ...) start here, far above the order IDs TWS
+    # hands out from nextValidId, as both are reported through the same error callback.
+    REQUEST_ID_BASE: int = 1_000_000_000
+
+    def __init__(self, status_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 contract_cache: Optional[ContractCache] = None):
         self.status_callback = status_callback
+        # Qualified contracts are shared with every other handler of the process and persisted on disconnect.
+        if contract_cache is None:
+            contract_cache = ContractCache.shared(ibkr_config.CONTRACT_CACHE_PATH, ibkr_config.CONTRACT_CACHE_TTL_DAYS)
+        self.contract_cache = contract_cache
+        # The states and fills of the orders placed through this handler (fed by the wrapper's callbacks).
+        self.order_tracker = OrderTracker()
         self.wrapper = IBKROfficialAPIWrapper(status_callback=self.status_callback, base_handler_ref=self)
         self.client = EClient(self.wrapper)
         self._req_id_counter: int = 0
@@ -55,20 +68,15 @@ class IBKRBaseHandler:
                 logger.error(f"Error in status_callback from {actual_class_name}: {e_cb}", exc_info=True)
 
     def _initialize_req_id_counter(self):
-        if self.wrapper.next_valid_order_id is not None and self.wrapper.next_valid_order_id > 0:
-            with self._lock:
-                self._req_id_counter = self.wrapper.next_valid_order_id
-            self._log_status("info", f"Request ID counter initialized. Starting at: {self._req_id_counter}")
-        else:
-            with self._lock:
-                self._req_id_counter = int(time.time() * 1000) % 1000000
-            self._log_status("warning", f"Using time-based fallback for reqId counter starting at {self._req_id_counter}.")
+        # Request IDs never reuse the order ID range, so a late error for a request cannot be
+        # mistaken for an error of the order with the same ID. The counter is never moved back.
+        with self._lock:
+            self._req_id_counter = max(self._req_id_counter, self.REQUEST_ID_BASE)
+        self._log_status("info", f"Request ID counter initialized. Next ID: {self._req_id_counter + 1}")
 
     def get_next_req_id(self) -> int:
         with self._lock:
-            if self._req_id_counter == 0:
-                self._initialize_req_id_counter()
-            self._req_id_counter += 1
+            self._req_id_counter = max(self._req_id_counter, self.REQUEST_ID_BASE) + 1
             return self._req_id_counter
             
     def get_next_order_id(self) -> int:
@@ -139,12 +147,25 @@ class IBKRBaseHandler:
 
         self.api_thread = None
         self._is_connected_flag = False
+        try:
+            self.contract_cache.save()
+        except Exception as e:
+            self._log_status("error", f"Failed to save the contract cache: {e}")
         self._log_status("info", "IBKR disconnection process complete.")
 
     def is_connected(self) -> bool:
         return self._is_connected_flag
 
-    async def resolve_contract_details_async(self, contract: Contract, timeout_sec: int = 10) -> Optional[Contract]:
+    async def request_contract_details_async(self, contract_input: Contract, timeout_sec: int = 10) -> List[ContractDetails]:
+        """
+        Requests the contract details of all contracts matching `contract_input`.
+        Bypasses the contract cache; use `resolve_contract_details_async` for a single qualified contract.
+
+        Raises:
+            ConnectionError: If not connected.
+            IBKRApiError: If TWS rejects the request (e.g., code 200, no security definition).
+            asyncio.TimeoutError: If TWS does not answer within `timeout_sec`.
+        """
         if not self.is_connected() or not self.loop:
             raise ConnectionError("Not connected to IBKR.")
 
@@ -152,27 +173,54 @@ class IBKRBaseHandler:
         api_future = self.loop.create_future()
         self.wrapper.futures[req_id] = api_future
 
-        self._log_status("info", f"Resolving contract details for {contract.symbol} (ReqId: {req_id})...")
-        self.client.reqContractDetails(req_id, contract)
+        self._log_status("info", f"Requesting contract details for {contract_input.symbol} (ReqId: {req_id})...")
+        self.client.reqContractDetails(req_id, contract_input)
+        try:
+            return await asyncio.wait_for(api_future, timeout=timeout_sec)
+        finally:
+            self.wrapper.futures.pop(req_id, None)
+            self.wrapper.request_data_store.pop(req_id, None)
+
+    @staticmethod
+    def _primary_listing(contract_details_list: List[ContractDetails]) -> Contract:
+        """Returns the contract listed on a major US exchange, or the first contract if there is none."""
+        for details in contract_details_list:
+            if details.contract.primaryExchange in ["NYSE", "NASDAQ", "ARCA"]:
+                return details.contract
+        return contract_details_list[0].contract
+
+    async def resolve_contract_details_async(self, contract: Contract, timeout_sec: int = 10) -> Optional[Contract]:
+        if not self.is_connected() or not self.loop:
+            raise ConnectionError("Not connected to IBKR.")
+
+        cached_contract = self.contract_cache.get(contract)
+        if cached_contract is not None:
+            self._log_status("debug", f"Resolved {contract.symbol} to conId: {cached_contract.conId} from the contract cache.")
+            return cached_contract
 
         try:
-            contract_details_list = await asyncio.wait_for(api_future, timeout=timeout_sec)
+            contract_details_list = await self.request_contract_details_async(contract, timeout_sec=timeout_sec)
             if not contract_details_list:
                 return None
             
-            primary_contract = contract_details_list[0].contract
-            for details in contract_details_list:
-                if details.contract.primaryExchange in ["NYSE", "NASDAQ", "ARCA"]:
-                    primary_contract = details.contract
-                    break
-            
+            primary_contract = self._primary_listing(contract_details_list)
             self._log_status("info", f"Resolved {contract.symbol} to conId: {primary_contract.conId} on {primary_contract.primaryExchange}")
+            self.contract_cache.put(contract, primary_contract)
             return primary_contract
         except (asyncio.TimeoutError, IBKRApiError) as e:
             self._log_status("error", f"Error/timeout resolving contract for {contract.symbol}: {e}")
             return None
-        finally:
-            self.wrapper.futures.pop(req_id, None)
+
+    def cached_contract(self, contract: Contract) -> Contract:
+        """
+        Returns the cached qualified contract for `contract` without a TWS request, keeping
+        the requested exchange (e.g., SMART routing), or `contract` itself if it is not cached.
+        """
+        cached_contract = self.contract_cache.get(contract)
+        if cached_contract is None:
+            return contract
+        cached_contract.exchange = contract.exchange or cached_contract.exchange
+        return cached_contract
 
     async def execute_order_async(self, contract: Contract, order: Order, timeout_sec: int = 15) -> Dict[str, Any]:
         if not self.is_connected() or not self.loop:
@@ -183,6 +231,7 @@ class IBKRBaseHandler:
         
         api_future = self.loop.create_future()
         self.wrapper.futures[order_id] = api_future
+        self.order_tracker.register(order_id, contract, order)
 
         self._log_status("info", f"Placing order {order.action} {order.totalQuantity} {contract.symbol} (OrderId: {order_id}).")
         self.client.placeOrder(order_id, contract, order)
@@ -194,6 +243,10 @@ class IBKRBaseHandler:
         except asyncio.TimeoutError:
             self._log_status("error", f"Timeout waiting for order submission confirmation for OrderId {order_id}.")
             raise
+        except IBKRApiError:
+            # The contract may be stale (e.g., a changed conId after a corporate action); re-qualify it next time.
+            self.contract_cache.invalidate(contract)
+            raise
         finally:
             self.wrapper.futures.pop(order_id, None)
 
@@ -214,6 +267,8 @@ class IBKRBaseHandler:
             result = await asyncio.wait_for(api_future, timeout=timeout_sec)
         except (asyncio.TimeoutError, IBKRApiError) as e:
             self._log_status("error", f"Error/timeout requesting snapshot for {contract.symbol}: {e}")
+            if isinstance(e, IBKRApiError):
+                self.contract_cache.invalidate(contract)
         finally:
             self.client.cancelMktData(req_id)
             self.wrapper.futures.pop(req_id, None)
@@ -0,0 +1,171 @@
+# handlers/ibkr_contract_cache.py
+"""
+Contract Cache for the IBKR handlers.
+
+Qualifying a contract (reqContractDetails) costs a TWS round-trip, and every
+run used to re-qualify the same few hundred symbols before each price snapshot
+and order. The ContractCache keeps the qualified contracts (conId, primary
+exchange, trading class, multiplier, ...) in a JSON file, keyed by the fields
+of the contract that was asked for. Entries expire after a TTL, option entries
+also once the option has expired, and callers invalidate an entry when TWS
+rejects a request made with it.
+
+All handlers in a process share one cache per file (see `ContractCache.shared`).
+"""
+
+import json
+import logging
+import os
+import threading
+import pandas as pd
+from typing import Any, Dict, Optional
+
+from ibapi.contract import Contract
+
+logger = logging.getLogger(__name__)
+
+
+class ContractCache:
+    """
+    A thread-safe, file-backed cache of qualified IBKR contracts.
+    Changes are kept in memory and written to disk by `save`.
+    """
+    VERSION: int = 1
+    # The fields of the requested contract that identify an entry.
+    KEY_FIELDS = ('secType', 'symbol', 'currency', 'exchange', 'primaryExchange',
+                  'lastTradeDateOrContractMonth', 'strike', 'right', 'tradingClass', 'multiplier')
+    # The fields of the qualified contract that are stored.
+    CONTRACT_FIELDS = ('conId', 'symbol', 'secType', 'exchange', 'primaryExchange', 'currency', 'localSymbol',
+                       'tradingClass', 'multiplier', 'lastTradeDateOrContractMonth', 'strike', 'right')
+
+    _instances: Dict[str, 'ContractCache'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, ttl_days: float = 7.0):
+        """
+        Loads the cache from disk, dropping expired entries, or starts an empty one.
+
+        Args:
+            path (str): The path of the cache JSON file.
+            ttl_days (float): The number of days a qualified contract is reused.
+        """
+        self.path = path
+        self.ttl = pd.Timedelta(days=ttl_days)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    cache = json.load(f)
+                if cache.get('version') == self.VERSION:
+                    self._entries = {k: v for k, v in cache.get('entries', {}).items() if not self._is_expired(v)}
+            except Exception as e:
+                logger.error(f"Failed to read contract cache {path}. Contracts will be re-qualified. Error: {e}")
+        logger.info(f"Contract cache {path} loaded with {len(self._entries)} qualified contracts.")
+
+    @classmethod
+    def shared(cls, path: str, ttl_days: float = 7.0) -> 'ContractCache':
+        """Returns the process-wide cache of a file, so all handlers read and save the same entries."""
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(path, ttl_days)
+            return cls._instances[key]
+
+    @classmethod
+    def make_key(cls, contract: Contract) -> str:
+        """Builds the cache key of a requested contract from its identifying fields."""
+        values = [str(getattr(contract, name, '') or '').upper() for name in cls.KEY_FIELDS]
+        # The ibapi default strike is 0.0; an unset strike and 0.0 are the same request.
+        values[cls.KEY_FIELDS.index('strike')] = f"{float(getattr(contract, 'strike', 0.0) or 0.0):g}"
+        return '|'.join(values)
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """Checks whether an entry is older than the TTL or describes an option that has expired."""
+        now = pd.Timestamp.now()
+        if now - pd.Timestamp(entry['cached_at']) > self.ttl:
+            return True
+        expiry = entry['contract'].get('lastTradeDateOrContractMonth')
+        if entry['contract'].get('secType') in ('OPT', 'FOP', 'FUT') and expiry:
+            # Expiries are 'YYYYMMDD', or a contract month 'YYYYMM' that lasts until the month end.
+            if len(expiry) >= 8:
+                expiry_date = pd.to_datetime(expiry[:8], format='%Y%m%d', errors='coerce')
+            else:
+                expiry_date = pd.to_datetime(expiry[:6], format='%Y%m', errors='coerce') + pd.offsets.MonthEnd(0)
+            return not pd.isna(expiry_date) and expiry_date < now.normalize()
+        return False
+
+    def get(self, contract: Contract) -> Optional[Contract]:
+        """
+        Returns a copy of the qualified contract cached for a requested contract.
+
+        Args:
+            contract (Contract): The requested (unqualified) contract.
+
+        Returns:
+            Optional[Contract]: The qualified contract, or None if it is not cached or has expired.
+        """
+        key = self.make_key(contract)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry):
+                del self._entries[key]
+                self._dirty = True
+                return None
+        qualified = Contract()
+        for name, value in entry['contract'].items():
+            setattr(qualified, name, value)
+        return qualified
+
+    def put(self, contract: Contract, qualified: Contract) -> None:
+        """
+        Caches the qualified contract of a requested contract.
+
+        Args:
+            contract (Contract): The requested (unqualified) contract.
+            qualified (Contract): The contract TWS qualified it to. Ignored if it has no conId.
+        """
+        if not getattr(qualified, 'conId', 0):
+            return
+        fields = {name: getattr(qualified, name) for name in self.CONTRACT_FIELDS if hasattr(qualified, name)}
+        with self._lock:
+            self._entries[self.make_key(contract)] = {'cached_at': pd.Timestamp.now().isoformat(), 'contract': fields}
+            self._dirty = True
+
+    def invalidate(self, contract: Contract) -> None:
+        """
+        Removes the cached entries of a contract, e.g., after TWS rejected a request made with it.
+        Matches the requested contract's key as well as any entry qualified to the same conId.
+        """
+        key = self.make_key(contract)
+        con_id = getattr(contract, 'conId', 0)
+        with self._lock:
+            stale = [k for k, v in self._entries.items() if k == key or (con_id and v['contract'].get('conId') == con_id)]
+            for k in stale:
+                del self._entries[k]
+            self._dirty = self._dirty or bool(stale)
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached contract(s) for {getattr(contract, 'symbol', '')} (conId {con_id}).")
+
+    def __len__(self) -> int:
+        """Returns the number of cached contracts."""
+        with self._lock:
+            return len(self._entries)
+
+    def save(self) -> None:
+        """Writes the cache atomically if it has changed since it was loaded or last saved."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'entries': self._entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            num_entries = len(self._entries)
+        logger.info(f"Contract cache saved with {num_entries} qualified contracts to {self.path}.")
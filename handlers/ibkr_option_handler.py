@@ -9,6 +9,7 @@ from ibapi.common import BarData
 
 from handlers.ibkr_base_handler import IBKRBaseHandler
 from handlers.ibkr_api_wrapper import IBKRApiError 
+from handlers.ibkr_contract_cache import ContractCache
 
 module_logger = logging.getLogger(__name__)
 if not module_logger.hasHandlers():
@@ -20,8 +21,9 @@ if not module_logger.hasHandlers():
     module_logger.propagate = False
 
 class IBKROptionHandler(IBKRBaseHandler):
-    def __init__(self, status_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
-        super().__init__(status_callback=status_callback)
+    def __init__(self, status_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 contract_cache: Optional[ContractCache] = None):
+        super().__init__(status_callback=status_callback, contract_cache=contract_cache)
         if not hasattr(self, '_is_connected_flag'): 
             self._is_connected_flag: bool = False
         self._log_status("info", f"{self.__class__.__name__} instance created.")
@@ -62,10 +64,16 @@ class IBKROptionHandler(IBKRBaseHandler):
                 if underlying_symbol.upper() in ["SPX", "VIX", "NDX", "RUT"]: 
                     underlying_contract_for_conid.exchange = "CBOE"
 
+            cached_underlying = self.contract_cache.get(underlying_contract_for_conid)
             try:
-                details = await super().request_contract_details_async(underlying_contract_for_conid, timeout_sec=15)
-                if details and isinstance(details, list) and len(details) > 0 and details[0].contract.conId:
-                    actual_con_id = details[0].contract.conId
+                details = None if cached_underlying else await super().request_contract_details_async(underlying_contract_for_conid, timeout_sec=15)
+                if cached_underlying:
+                    actual_con_id = cached_underlying.conId
+                    self._log_status("info", f"Resolved {underlying_symbol} ({underlying_sec_type}) to conId: {actual_con_id} from the contract cache")
+                elif details and isinstance(details, list) and len(details) > 0 and details[0].contract.conId:
+                    primary_contract = self._primary_listing(details)
+                    actual_con_id = primary_contract.conId
+                    self.contract_cache.put(underlying_contract_for_conid, primary_contract)
                     self._log_status("info", f"Resolved {underlying_symbol} ({underlying_sec_type}) to conId: {actual_con_id}")
                 else:
                     msg = f"Could not resolve a valid conId for {underlying_symbol} ({underlying_sec_type}). Details received: {details}"
@@ -151,6 +159,14 @@ class IBKROptionHandler(IBKRBaseHandler):
             "strike": strike, "right": right.upper(), "currency": currency.upper(),
             "tradingClass": tc_to_use, "multiplier": mult_to_use
         }
+        # The cache is keyed by the option as requested, whichever attempt below qualified it.
+        requested_contract = Contract(); vars(requested_contract).update(base_contract_params)
+        requested_contract.exchange = initial_exchange_user_pref.upper() if initial_exchange_user_pref else ""
+        cached_contract = self.contract_cache.get(requested_contract)
+        if cached_contract is not None:
+            self._log_status("info", f"Qualified {symbol} {expiration} K{strike}{right} from the contract cache (ConId: {cached_contract.conId})")
+            return cached_contract
+
         attempt_configs = []
 
         if initial_exchange_user_pref:
@@ -186,6 +202,7 @@ class IBKROptionHandler(IBKRBaseHandler):
                 if details_list: 
                     qualified_contract = details_list[0].contract
                     self._log_status("info", f"Qualification SUCCESS ({desc}) for {qualified_contract.localSymbol if qualified_contract.localSymbol else 'N/A'} (ConId: {qualified_contract.conId}, Exch: {qualified_contract.exchange}, PrimEx: {qualified_contract.primaryExchange})")
+                    self.contract_cache.put(requested_contract, qualified_contract)
                     return qualified_contract
             except IBKRApiError as e:
                 if e.code == 200: 
@@ -0,0 +1,222 @@
+# handlers/ibkr_order_tracker.py
+"""
+Order Tracker for the IBKR handlers.
+
+TWS reports the progress of an order through several callbacks on the API
+thread: orderStatus (cumulative filled quantity and average price),
+execDetails (each execution), commissionReport (the commission of an
+execution) and error (rejections). The OrderTracker folds them into one
+TrackedOrder per order, moving it through a small state machine
+(PendingSubmit -> Submitted -> PartiallyFilled -> Filled, or Cancelled,
+Inactive or Rejected), and publishes an OrderEvent for every state change
+and fill to its subscribers.
+
+The wrapper hands every callback to the event loop (call_soon_threadsafe),
+so the tracker is only ever touched from the loop thread: updates are O(1)
+dictionary operations without locks, and subscribers receive their events
+through unbounded asyncio queues, so hundreds of concurrent orders never
+block the API thread or each other.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from ibapi.contract import Contract
+from ibapi.order import Order
+
+logger = logging.getLogger(__name__)
+
+# --- Order States ---
+PENDING_SUBMIT = 'PendingSubmit'
+SUBMITTED = 'Submitted'
+PARTIALLY_FILLED = 'PartiallyFilled'
+FILLED = 'Filled'
+CANCELLED = 'Cancelled'
+INACTIVE = 'Inactive'
+REJECTED = 'Rejected'
+TERMINAL_STATES = frozenset({FILLED, CANCELLED, INACTIVE, REJECTED})
+
+# The states each state may move to; terminal states never change again.
+_TRANSITIONS: Dict[str, frozenset] = {
+    PENDING_SUBMIT: frozenset({SUBMITTED, PARTIALLY_FILLED, FILLED, CANCELLED, INACTIVE, REJECTED}),
+    SUBMITTED: frozenset({PARTIALLY_FILLED, FILLED, CANCELLED, INACTIVE, REJECTED}),
+    PARTIALLY_FILLED: frozenset({FILLED, CANCELLED, INACTIVE}),
+}
+
+# The TWS order statuses, by the state they map to.
+_TWS_STATUSES: Dict[str, str] = {
+    'ApiPending': PENDING_SUBMIT, 'PendingSubmit': PENDING_SUBMIT, 'PendingCancel': SUBMITTED,
+    'PreSubmitted': SUBMITTED, 'Submitted': SUBMITTED, 'Filled': FILLED,
+    'ApiCancelled': CANCELLED, 'Cancelled': CANCELLED, 'Inactive': INACTIVE,
+}
+
+# Order-related error codes that are warnings rather than rejections (e.g., 399: the order
+# is held until the market opens; 2109: the outside-RTH flag is ignored).
+ORDER_WARNING_CODES = frozenset({399, 404, 2109, 2148, 10167})
+# The error code TWS sends when an order is cancelled.
+ORDER_CANCELLED_CODE = 202
+
+
+@dataclass
+class TrackedOrder:
+    """
+    The state of one order placed through the handler.
+
+    Attributes:
+        order_id (int): The TWS order ID.
+        ticker (str): The symbol of the order's contract.
+        action (str): 'BUY' or 'SELL'.
+        quantity (float): The total quantity of the order.
+        state (str): The order's state (see the module constants).
+        filled (float): The cumulative filled quantity.
+        avg_fill_price (float): The average price of the filled quantity (0 if nothing filled).
+        commission (float): The sum of the commissions reported for the order's executions.
+        error (Optional[str]): The reason of a rejection.
+        placed_at (float): time.perf_counter() when the order was placed.
+        done_at (Optional[float]): time.perf_counter() when the order reached a terminal state.
+    """
+    order_id: int
+    ticker: str
+    action: str
+    quantity: float
+    state: str = PENDING_SUBMIT
+    filled: float = 0.0
+    avg_fill_price: float = 0.0
+    commission: float = 0.0
+    error: Optional[str] = None
+    placed_at: float = field(default_factory=time.perf_counter)
+    done_at: Optional[float] = None
+
+    @property
+    def remaining(self) -> float:
+        return max(self.quantity - self.filled, 0.0)
+
+    @property
+    def is_done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    """
+    A change of one order, as published to the tracker's subscribers.
+
+    Attributes:
+        order_id (int): The TWS order ID.
+        ticker (str): The symbol of the order's contract.
+        action (str): 'BUY' or 'SELL'.
+        state (str): The order's state after the change.
+        shares (float): The quantity filled by this change (0 for a change of state only).
+        price (float): The price of that fill (0 if none).
+        filled (float): The cumulative filled quantity.
+        avg_fill_price (float): The average price of the filled quantity.
+    """
+    order_id: int
+    ticker: str
+    action: str
+    state: str
+    shares: float
+    price: float
+    filled: float
+    avg_fill_price: float
+
+
+class OrderTracker:
+    """
+    Tracks the orders placed through a handler and streams their state changes and fills.
+    All methods must be called from the event loop thread.
+    """
+    def __init__(self):
+        self._orders: Dict[int, TrackedOrder] = {}
+        # The execution IDs already counted, and the order each belongs to (for its commission).
+        self._executions: Dict[str, int] = {}
+        self._subscribers: List[asyncio.Queue] = []
+
+    def register(self, order_id: int, contract: Contract, order: Order) -> TrackedOrder:
+        """Starts tracking an order. Must be called before the order is placed."""
+        tracked = TrackedOrder(order_id=order_id, ticker=contract.symbol, action=order.action,
+                               quantity=float(order.totalQuantity))
+        self._orders[order_id] = tracked
+        return tracked
+
+    def get(self, order_id: int) -> Optional[TrackedOrder]:
+        return self._orders.get(order_id)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def subscribe(self) -> asyncio.Queue:
+        """Returns a queue that receives an OrderEvent for every change of every tracked order."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    # --- Callbacks (dispatched to the loop by the API wrapper) ---
+
+    def on_order_status(self, order_id: int, status: str, filled: float, avg_fill_price: float,
+                        last_fill_price: float) -> None:
+        """Applies an orderStatus callback (cumulative quantities)."""
+        tracked = self._orders.get(order_id)
+        if tracked is None:
+            return
+        self._update(tracked, _TWS_STATUSES.get(status), float(filled), float(avg_fill_price), float(last_fill_price))
+
+    def on_execution(self, order_id: int, exec_id: str, shares: float, price: float,
+                     cum_qty: float, avg_price: float) -> None:
+        """Applies an execDetails callback. Executions repeated by TWS are counted once."""
+        tracked = self._orders.get(order_id)
+        if tracked is None or exec_id in self._executions:
+            return
+        self._executions[exec_id] = order_id
+        self._update(tracked, None, float(cum_qty), float(avg_price), float(price))
+
+    def on_commission(self, exec_id: str, commission: float) -> None:
+        """Applies a commissionReport callback to the order of the execution."""
+        tracked = self._orders.get(self._executions.get(exec_id))
+        # Unset commissions are reported as a huge sentinel value (ibapi.common.UNSET_DOUBLE).
+        if tracked is not None and 0 <= commission < 1e9:
+            tracked.commission += commission
+
+    def on_error(self, order_id: int, code: int, message: str) -> None:
+        """Applies an error callback for an order: a rejection unless it is only a warning."""
+        tracked = self._orders.get(order_id)
+        if tracked is None or code in ORDER_WARNING_CODES:
+            return
+        tracked.error = f"Code {code}: {message}"
+        self._update(tracked, CANCELLED if code == ORDER_CANCELLED_CODE else REJECTED, tracked.filled,
+                     tracked.avg_fill_price, 0.0)
+
+    def _update(self, tracked: TrackedOrder, state: Optional[str], filled: float, avg_fill_price: float,
+                fill_price: float) -> None:
+        """
+        Moves an order forward. Fills only ever increase (orderStatus and execDetails both report
+        the cumulative quantity and may arrive in any order) and are counted even after a terminal
+        state; states only follow the allowed transitions.
+        """
+        shares = filled - tracked.filled
+        if shares > 0:
+            tracked.filled, tracked.avg_fill_price = filled, avg_fill_price
+        else:
+            shares = 0.0
+        if state in (None, SUBMITTED) and tracked.filled > 0:
+            state = FILLED if tracked.remaining <= 0 else PARTIALLY_FILLED
+        new_state = state if state in _TRANSITIONS.get(tracked.state, ()) else None
+        if new_state is not None:
+            tracked.state = new_state
+        if shares == 0 and new_state is None:
+            return
+
+        event = OrderEvent(order_id=tracked.order_id, ticker=tracked.ticker, action=tracked.action,
+                           state=tracked.state, shares=shares, price=(fill_price or avg_fill_price) if shares else 0.0,
+                           filled=tracked.filled, avg_fill_price=tracked.avg_fill_price)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        if tracked.is_done and tracked.done_at is None:
+            tracked.done_at = time.perf_counter()
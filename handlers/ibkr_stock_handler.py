@@ -11,6 +11,7 @@ from ibapi.ticktype import TickTypeEnum # For parsing snapshot data
 # Assuming these are in the same directory or project structure is handled by PYTHONPATH
 from handlers.ibkr_base_handler import IBKRBaseHandler
 from handlers.ibkr_api_wrapper import IBKRApiError # For specific error handling
+from handlers.ibkr_contract_cache import ContractCache
 
 # Logger for this module (e.g., "ibkr_stock_handler")
 module_logger = logging.getLogger(__name__)
@@ -23,8 +24,9 @@ if not module_logger.hasHandlers():
     module_logger.propagate = False # Avoid duplicate logs if root logger is also configured
 
 class IBKRStockHandler(IBKRBaseHandler):
-    def __init__(self, status_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
-        super().__init__(status_callback=status_callback)
+    def __init__(self, status_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 contract_cache: Optional[ContractCache] = None):
+        super().__init__(status_callback=status_callback, contract_cache=contract_cache)
         self.module_name = self.__class__.__name__ # Use actual class name e.g. "IBKRStockHandler"
         # Initialize the _is_connected_flag from the base class if it's not already
         if not hasattr(self, '_is_connected_flag'):
@@ -51,6 +53,7 @@ class IBKRStockHandler(IBKRBaseHandler):
     async def get_stock_contract_details(self, ticker_symbol: str, exchange: str = "SMART", currency: str = "USD") -> Optional[Contract]:
         """
         Fetches complete contract details for a given stock ticker.
+        Served from the contract cache when the ticker was qualified recently.
         """
         self._log_status("info", f"Fetching contract details for STK {ticker_symbol} on {exchange} ({currency}).")
         if not self.is_connected(): # is_connected() is from IBKRBaseHandler
@@ -63,13 +66,18 @@ class IBKRStockHandler(IBKRBaseHandler):
         contract.exchange = exchange.upper()
         contract.currency = currency.upper()
         
+        cached_contract = self.contract_cache.get(contract)
+        if cached_contract is not None:
+            return cached_contract
+
         try:
             # request_contract_details_async is from IBKRBaseHandler
             contract_details_list = await super().request_contract_details_async(contract_input=contract)
             if contract_details_list: # It returns a list of ContractDetails objects
-                # Assuming the first result is the primary one for a stock.
-                qualified_contract = contract_details_list[0].contract 
+                # The primary listing, as in resolve_contract_details_async, since both share cache entries.
+                qualified_contract = self._primary_listing(contract_details_list)
                 self._log_status("info", f"Successfully fetched contract details for {ticker_symbol}. ConId: {qualified_contract.conId}")
+                self.contract_cache.put(contract, qualified_contract)
                 return qualified_contract
             else:
                 self._log_status("warning", f"No contract details found for STK {ticker_symbol}.")
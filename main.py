@@ -4,20 +4,24 @@ Main application file for the Quantitative Momentum Trading System.
 
 This script runs a full end-to-end "paper trade" simulation and execution.
 It checks daily to see if a rebalance is due based on the strategy's timeframe
-(daily, weekly, or monthly) and only runs on the first business day of that period.
+(daily, weekly, or monthly) and only runs on that period's rebalance day of the
+exchange calendar (see engine/rebalance_calendar.py).
 
 Its workflow is as follows:
 1.  On its scheduled run, it determines if a rebalance is due.
 2.  If so, it downloads historical data and connects to TWS.
-3.  It loops through strategies and timeframes due for rebalancing.
-4.  For EACH due combination, it:
-    a. Loads the local portfolio state.
-    b. Constructs a new target portfolio.
-    c. Fetches live prices for valuation.
-    d. Calculates the exact rebalancing trades needed.
-    e. Prompts the user for confirmation.
-    f. Executes the trades in the TWS paper account.
-    g. Simulates the trades locally to update the portfolio state file.
+3.  It constructs the target portfolios of all due strategies and timeframes
+    concurrently.
+4.  It loads the local portfolio state of every due combination and saves
+    each target portfolio's detailed report.
+5.  It fetches live prices once for all portfolios and calculates the exact
+    rebalancing trades of each of them.
+6.  It nets the trades of all combinations per ticker into parent orders
+    (see engine/order_netting.py), prompts the user for confirmation and
+    executes the parent orders in the TWS paper account, following their
+    fills through the handler's order tracker.
+7.  It allocates the actual fills back to each combination and books them
+    locally at their fill prices to update the portfolio state files.
 """
 
 import logging
@@ -31,7 +35,12 @@ from typing import List, Literal, Any
 from configs import strategy_config, ibkr_config
 from utils import logging_config
 from engine.data_manager import DataManager
-from engine.portfolio_constructor import PortfolioConstructor
+from engine.feature_store import FeatureStore
+from engine.portfolio_constructor import PortfolioConstructor, construct_portfolios
+from engine.signal_state import load_signal_state
+from engine.rebalance_calendar import RebalanceCalendar, rebalance_period
+from engine.rebalance_engine import RebalanceEngine
+from engine.order_netting import net_orders
 from engine.execution_manager import ExecutionManager
 from engine.simulated_portfolio_manager import SimulatedPortfolioManager
 from handlers.ibkr_stock_handler import IBKRStockHandler
@@ -39,41 +48,23 @@ from handlers.ibkr_stock_handler import IBKRStockHandler
 logger = logging.getLogger(__name__)
 
 
-def is_rebalance_day(timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY']) -> bool:
+def is_rebalance_day(timeframe: Literal['DAILY', 'WEEKLY', 'MONTHLY'], calendar: RebalanceCalendar) -> bool:
     """
-    Checks if today is the first valid business day for the rebalancing period.
-    - DAILY: Always true.
-    - WEEKLY: True if today is the first business day of the week (handles Monday holidays).
-    - MONTHLY: True if today is the first business day of the month.
+    Checks if today is the rebalance day of the timeframe on the exchange calendar.
+    - DAILY: Every trading day.
+    - WEEKLY: The REBALANCE_DAY_OF_PERIOD-th trading day of the week (handles Monday holidays).
+    - MONTHLY: The REBALANCE_DAY_OF_PERIOD-th trading day of each REBALANCE_PERIOD (month or quarter).
     """
     today = pd.to_datetime(datetime.today().date())  # Use pandas for robust date handling
+    period = rebalance_period(timeframe, strategy_config)
+    day_of_period = strategy_config.REBALANCE_DAY_OF_PERIOD
 
-    if timeframe == 'DAILY':
-        logger.info("DAILY timeframe: Rebalancing is always triggered.")
+    if calendar.is_rebalance_day(today, period, day_of_period):
+        logger.info(f"{timeframe} timeframe: Today ({today.date()}) is the {period} rebalance day, triggering rebalance.")
         return True
-
-    if timeframe == 'WEEKLY':
-        # Find the start of the current week (Monday)
-        start_of_week = today - pd.to_timedelta(today.dayofweek, unit='d')
-        # The first business day of a period is the first date in a business-day range
-        first_business_day = pd.bdate_range(start_of_week, start_of_week + pd.DateOffset(days=6))[0]
-        if today == first_business_day:
-            logger.info(f"WEEKLY timeframe: Today ({today.date()}) is the first business day of the week, triggering rebalance.")
-            return True
-        logger.info(f"WEEKLY timeframe: Today ({today.date()}) is not the first business day of the week (which is {first_business_day.date()}), skipping.")
-        return False
-
-    if timeframe == 'MONTHLY':
-        # Find the start of the current month
-        start_of_month = today.to_period('M').to_timestamp()
-        # The first business day of a period is the first date in a business-day range
-        first_business_day = pd.bdate_range(start_of_month, start_of_month + pd.DateOffset(days=6))[0]
-        if today == first_business_day:
-            logger.info(f"MONTHLY timeframe: Today ({today.date()}) is the first business day of the month, triggering rebalance.")
-            return True
-        logger.info(f"MONTHLY timeframe: Today ({today.date()}) is not the first business day of the month (which is {first_business_day.date()}), skipping.")
-        return False
-
+    next_day = calendar.next_rebalance_day(today, period, day_of_period)
+    logger.info(f"{timeframe} timeframe: Today ({today.date()}) is not a {period} rebalance day "
+                f"(the next is {next_day.date() if next_day is not None else 'unknown'}), skipping.")
     return False
 
 
@@ -90,7 +81,8 @@ async def run_simulation_workflow():
     initial_portfolio_cash = 10000.0
 
     # --- Check which timeframes are due for rebalancing ---
-    timeframes_due = [tf for tf in timeframes_to_run if is_rebalance_day(tf)]
+    calendar = RebalanceCalendar.from_csv(strategy_config.EXCHANGE_HOLIDAYS_CSV_PATH)
+    timeframes_due = [tf for tf in timeframes_to_run if is_rebalance_day(tf, calendar)]
 
     if not timeframes_due:
         logger.info("No timeframes are due for rebalancing today. Exiting workflow.")
@@ -100,13 +92,24 @@ async def run_simulation_workflow():
     # --- Step 1 (Once): Data Acquisition ---
     print("\n--- [Step 1] Acquiring Base Historical Data (once for all simulations) ---")
     data_manager = DataManager(tickers_csv_path=strategy_config.UNIVERSE_TICKERS_CSV_PATH)
-    hist_data = data_manager.fetch_historical_data()
+    hist_data = data_manager.fetch_historical_data(fields=PortfolioConstructor.required_fields(strategy_config))
     if hist_data is None:
         logger.error("Failed to acquire historical data. Aborting run.")
         return
-    comp_info = data_manager.fetch_company_info()
+    comp_info = data_manager.fetch_company_info(include_market_cap=strategy_config.LIQUIDITY_MEASURE == 'MARKET_CAP')
+    # The DAILY signals are advanced by the new bars from their checkpoint instead of recomputed.
+    signal_state = load_signal_state(data_manager.signal_state_path, hist_data, strategy_config) if 'DAILY' in timeframes_due else None
+    # Resampled prices, returns and trailing statistics are computed once and shared by all constructors.
+    features = FeatureStore(hist_data, signal_state=signal_state)
     print("✅ Base historical and company data acquired.")
 
+    # --- Step 1b (Once): Portfolio Construction for all due combinations ---
+    print("\n--- [Step 1b] Constructing Target Portfolios ---")
+    combinations = [(strategy_name, timeframe) for timeframe in timeframes_due for strategy_name in strategies_to_run]
+    # Constructions are independent, so they run in a thread pool rather than between trades.
+    target_portfolios = await asyncio.to_thread(construct_portfolios, features, comp_info, strategy_config, combinations)
+    print(f"✅ {len(target_portfolios)} of {len(combinations)} target portfolios constructed.")
+
     # --- Manage a single IBKR connection for the entire run ---
     ibkr_handler = IBKRStockHandler()
     try:
@@ -119,93 +122,103 @@ async def run_simulation_workflow():
             return
         print("✅ Connected to TWS.")
 
-        # --- Main Loop to run for each DUE strategy and timeframe ---
-        for timeframe in timeframes_due:
-            for strategy_name in strategies_to_run:
-                print(f"\n\n================== Running: Strategy={strategy_name}, Timeframe={timeframe} ==================")
-                logger.info(f"--- Starting simulation for Strategy: {strategy_name}, Timeframe: {timeframe} ---")
-
-                strategy_config.STRATEGY_NAME = strategy_name
-
-                # --- Step 2: Load Simulated Portfolio ---
-                portfolio_file = f'{strategy_name}_{timeframe}_portfolio_state.csv'
-                portfolio_csv_path = os.path.join('data', portfolio_file)
-                print(f"\n--- [Step 2/8] Loading Portfolio: {portfolio_file} ---")
-                sim_portfolio = SimulatedPortfolioManager(csv_path=portfolio_csv_path, initial_cash=initial_portfolio_cash)
-                print(f"✅ Portfolio loaded. Cash: ${sim_portfolio.cash:,.2f}, Positions: {len(sim_portfolio.positions)}")
-
-                # --- Step 3: Portfolio Construction ---
-                print(f"\n--- [Step 3/8] Constructing Target Portfolio ---")
-                portfolio_constructor = PortfolioConstructor(hist_data, comp_info, strategy_config)
-                target_portfolio, detailed_report_df = portfolio_constructor.generate_target_portfolio(timeframe=timeframe)
-                print(f"✅ Target Portfolio generated. Longs: {len(target_portfolio['longs'])}, Shorts: {len(target_portfolio['shorts'])}")
-
-                # --- Step 4: Save Detailed Report ---
-                print(f"\n--- [Step 4/8] Saving Detailed Report ---")
-                try:
-                    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                    report_file = f"{strategy_name}_{timeframe}_report_{timestamp}.csv"
-                    report_path = os.path.join('output', report_file)
-                    report_cols = ['Rank', 'Decile', 'Momentum', 'Volatility', 'PositivePeriods', 'marketCap', 'sector']
-                    final_cols = [col for col in report_cols if col in detailed_report_df.columns]
-                    if not detailed_report_df.empty:
-                        detailed_report_df[final_cols].to_csv(report_path)
-                        print(f"✅ Detailed report saved to: {report_path}")
-                except Exception as e:
-                    logger.error(f"Failed to save detailed report: {e}")
-
-                # --- Step 5: Fetch Live Prices via TWS ---
-                print(f"\n--- [Step 5/8] Fetching Live Prices ---")
-                tickers_needed = set(sim_portfolio.positions.keys()) | set(target_portfolio.get('longs', [])) | set(target_portfolio.get('shorts', []))
-                print(f"Fetching live prices for {len(tickers_needed)} unique tickers...")
-                live_prices = await ibkr_handler.get_current_stock_prices_for_tickers(list(tickers_needed))
-                print(f"✅ Fetched {len(live_prices)} prices.")
-
-                # --- Step 6: Portfolio Valuation ---
-                print(f"\n--- [Step 6/8] Portfolio Valuation ---")
-                total_portfolio_value = sim_portfolio.get_total_value(live_prices)
-                print(f"✅ Current Total Portfolio Value: ${total_portfolio_value:,.2f}")
-
-                # --- Step 7: Trade Calculation ---
-                print(f"\n--- [Step 7/8] Calculating Rebalance Orders ---")
-                # Create a temporary ExecutionManager for calculation only (handler is None)
-                temp_exec_manager = ExecutionManager(ibkr_handler=None, config=strategy_config)
-                calculated_orders = await temp_exec_manager.calculate_rebalance_orders(
-                    target_portfolio, sim_portfolio.positions, total_portfolio_value, live_prices
-                )
-                all_orders = calculated_orders.get('all_orders', [])
-
-                print(f"\n--- [PROCESS OUTPUT] Calculated Trades for {strategy_name} ({timeframe}) ---")
-                if all_orders:
-                    for order in all_orders:
-                        print(f"  - {order['action']:<7} | {order['ticker']:<6} | Qty: {order['quantity']}")
+        # --- Step 2: Load Simulated Portfolios and Save Detailed Reports ---
+        print(f"\n--- [Step 2/6] Loading Portfolios and Saving Reports ---")
+        sim_portfolios = {}
+        for strategy_name, timeframe in combinations:
+            portfolio_result = target_portfolios.get((strategy_name, timeframe))
+            if portfolio_result is None:
+                logger.error(f"No target portfolio for {strategy_name} ({timeframe}). Skipping.")
+                continue
+            portfolio_csv_path = os.path.join('data', f'{strategy_name}_{timeframe}_portfolio_state.csv')
+            sim_portfolio = SimulatedPortfolioManager(csv_path=portfolio_csv_path, initial_cash=initial_portfolio_cash)
+            sim_portfolios[(strategy_name, timeframe)] = sim_portfolio
+            target_portfolio = portfolio_result.target_portfolio
+            print(f"✅ {strategy_name} ({timeframe}): Cash: ${sim_portfolio.cash:,.2f}, Positions: {len(sim_portfolio.positions)}, "
+                  f"Target Longs: {len(target_portfolio['longs'])}, Target Shorts: {len(target_portfolio['shorts'])}")
+            try:
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                report_path = os.path.join('output', f"{strategy_name}_{timeframe}_report_{timestamp}.csv")
+                # The full ranking and deciles are only computed here, for the report.
+                if portfolio_result.save_report(report_path):
+                    print(f"   Detailed report saved to: {report_path}")
+            except Exception as e:
+                logger.error(f"Failed to save detailed report for {strategy_name} ({timeframe}): {e}")
+
+        # --- Step 3: Fetch Live Prices via TWS (once for all portfolios) ---
+        print(f"\n--- [Step 3/6] Fetching Live Prices ---")
+        tickers_needed = set()
+        for key, sim_portfolio in sim_portfolios.items():
+            target_portfolio = target_portfolios[key].target_portfolio
+            tickers_needed |= set(sim_portfolio.positions) | set(target_portfolio.get('longs', [])) | set(target_portfolio.get('shorts', []))
+        print(f"Fetching live prices for {len(tickers_needed)} unique tickers...")
+        live_prices = await ibkr_handler.get_current_stock_prices_for_tickers(sorted(tickers_needed))
+        print(f"✅ Fetched {len(live_prices)} prices.")
+
+        # --- Step 4: Portfolio Valuation and Trade Calculation ---
+        print(f"\n--- [Step 4/6] Valuing Portfolios and Calculating Rebalance Orders ---")
+        portfolios = {}
+        for key, sim_portfolio in sim_portfolios.items():
+            total_portfolio_value = sim_portfolio.get_total_value(live_prices)
+            print(f"✅ {key[0]} ({key[1]}): Total Portfolio Value: ${total_portfolio_value:,.2f}")
+            portfolios[key] = (target_portfolios[key].target_portfolio, sim_portfolio.positions, total_portfolio_value)
+        # The orders of all portfolios are sized in one vectorized step.
+        orders_by_portfolio = RebalanceEngine(strategy_config).calculate_orders_batch(portfolios, live_prices)
+
+        for (strategy_name, timeframe), all_orders in orders_by_portfolio.items():
+            print(f"\n--- [PROCESS OUTPUT] Calculated Trades for {strategy_name} ({timeframe}) ---")
+            if all_orders:
+                for order in all_orders:
+                    print(f"  - {order['action']:<7} | {order['ticker']:<6} | Qty: {order['quantity']}")
+            else:
+                print("  - No trades needed. Portfolio is aligned with target.")
+
+        # --- Step 5: Order Netting and Trade Execution (Live in TWS) ---
+        # All portfolios trade in the same account, so their orders are netted per ticker into parent orders.
+        print(f"\n--- [Step 5/6] NETTING AND EXECUTION ---")
+        netted = net_orders(orders_by_portfolio, strategy_config.ORDER_TYPE)
+        summary = netted.summary()
+        print(f"✅ Netted {summary['child_orders']} orders ({summary['child_shares']} shares) into "
+              f"{summary['parent_orders']} parent orders ({summary['parent_shares']} shares).")
+        for order in netted.parent_orders:
+            print(f"  - {order['action']:<7} | {order['ticker']:<6} | Qty: {order['quantity']}")
+        # Unless the orders are executed, they are simulated as filled in full at the live prices.
+        parent_fills = {order['ticker']: (order['quantity'], live_prices[order['ticker']]) for order in netted.parent_orders}
+        if netted.parent_orders:
+            try:
+                # SAFETY PROMPT
+                confirm = input("Press Enter to execute the netted trades in TWS Paper Account, or type 'skip' to continue without trading: ")
+                if confirm.lower() == 'skip':
+                    print("Skipping execution for this run.")
+                    logger.warning("User skipped trade execution.")
                 else:
-                    print("  - No trades needed. Portfolio is aligned with target.")
-
-                # --- Step 8: Trade Execution (Live in TWS) ---
-                print(f"\n--- [Step 8/8] EXECUTION ---")
-                if all_orders:
-                    try:
-                        # SAFETY PROMPT
-                        confirm = input("Press Enter to execute the calculated trades in TWS Paper Account, or type 'skip' to continue without trading: ")
-                        if confirm.lower() == 'skip':
-                            print("Skipping execution for this run.")
-                            logger.warning("User skipped trade execution.")
-                        else:
-                            # Create a new ExecutionManager with the live handler for execution
-                            live_exec_manager = ExecutionManager(ibkr_handler=ibkr_handler, config=strategy_config)
-                            await live_exec_manager.execute_rebalance_orders(all_orders)
-                            print("✅ Orders submitted to TWS.")
-                    except (KeyboardInterrupt, SystemExit):
-                        logger.warning("Execution interrupted by user.")
-                        print("\nExecution aborted by user.")
-                        # Do not proceed with saving state if execution was aborted
-                        return
-                
-                # Always simulate the trades to keep the local portfolio state file up-to-date
-                sim_portfolio.simulate_trades(all_orders, live_prices)
-                sim_portfolio.save_portfolio()
-                print(f"✅ New portfolio state saved to {portfolio_csv_path}")
+                    # Create an ExecutionManager with the live handler for execution
+                    live_exec_manager = ExecutionManager(ibkr_handler=ibkr_handler, config=strategy_config)
+                    submission_report = await live_exec_manager.execute_rebalance_orders(netted.parent_orders)
+                    print("✅ Orders submitted to TWS.")
+                    submission_path = os.path.join('output', f"order_submissions_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv")
+                    submission_report.to_csv(submission_path, index=False)
+                    print(f"✅ Order submissions and fills saved to: {submission_path}")
+                    # The portfolios book the quantities actually filled, at their average fill prices.
+                    filled = submission_report[submission_report['Filled'].fillna(0) > 0]
+                    parent_fills = {ticker: (int(quantity), float(price)) for ticker, quantity, price
+                                    in zip(filled['Ticker'], filled['Filled'], filled['AvgFillPrice'])}
+            except (KeyboardInterrupt, SystemExit):
+                logger.warning("Execution interrupted by user.")
+                print("\nExecution aborted by user.")
+                # Do not proceed with saving state if execution was aborted
+                return
+
+        # --- Step 6: Allocate Fills to the Portfolios ---
+        # Always simulate the trades to keep the local portfolio state files up-to-date. Each parent's
+        # fill is split among its portfolios, and quantities crossed between them are booked at its price.
+        print(f"\n--- [Step 6/6] Updating Portfolio States ---")
+        allocations = netted.allocate(parent_fills, live_prices)
+        for key, sim_portfolio in sim_portfolios.items():
+            filled_orders, fill_prices = allocations.get(key, ([], {}))
+            sim_portfolio.simulate_trades(filled_orders, fill_prices)
+            sim_portfolio.save_portfolio()
+            print(f"✅ New portfolio state saved to {sim_portfolio.csv_path}")
 
     finally:
         # Disconnect at the very end
@@ -0,0 +1,102 @@
+# run_backtest.py
+"""
+Historical backtest script for the Quantitative Momentum Trading System.
+
+Replays the strategies over BACKTEST_YEARS of history with the BacktestEngine,
+using the data source configured in strategy_config (yfinance by default).
+
+Its workflow is as follows:
+1.  Acquires the historical dataset and company info once.
+2.  Builds one FeatureStore, so every backtest shares the same signal matrices.
+3.  For EACH strategy and timeframe, it:
+    a. Walks all rebalance dates and simulates the trades.
+    b. Ranks every rebalance date at once to get the turnover of both legs.
+    c. Saves the equity curve, trade list and turnover to the output directory.
+4.  Prints a summary table of all runs.
+"""
+
+import logging
+import os
+import pandas as pd
+from datetime import datetime
+
+# --- Project-specific Imports ---
+from configs import strategy_config
+from utils import logging_config
+from engine.backtest_engine import BacktestEngine
+from engine.data_manager import DataManager
+from engine.data_sources import create_data_source
+from engine.feature_store import FeatureStore
+from engine.portfolio_constructor import PortfolioConstructor
+
+logger = logging.getLogger(__name__)
+
+
+def run_backtests() -> pd.DataFrame:
+    """
+    Runs the configured backtests.
+
+    Returns:
+        pd.DataFrame: One row of summary statistics per strategy and timeframe.
+    """
+    logger.info("--- [BACKTEST] Starting ---")
+
+    # --- Step 1 (Once): Data Acquisition ---
+    print(f"\n--- [Step 1] Acquiring {strategy_config.BACKTEST_YEARS} Years of Historical Data ---")
+    if strategy_config.DATA_SOURCE == 'SYNTHETIC':
+        data_source = create_data_source('SYNTHETIC', num_tickers=strategy_config.SYNTHETIC_NUM_TICKERS,
+                                         num_years=strategy_config.SYNTHETIC_NUM_YEARS, seed=strategy_config.SYNTHETIC_SEED)
+    else:
+        data_source = create_data_source(strategy_config.DATA_SOURCE)
+    data_manager = DataManager(tickers_csv_path=strategy_config.UNIVERSE_TICKERS_CSV_PATH, data_source=data_source)
+    hist_data = data_manager.fetch_historical_data(fields=PortfolioConstructor.required_fields(strategy_config),
+                                                   history_years=strategy_config.BACKTEST_YEARS)
+    if hist_data is None:
+        logger.error("Failed to acquire historical data. Aborting backtest.")
+        return pd.DataFrame()
+    comp_info = data_manager.fetch_company_info(include_market_cap=strategy_config.LIQUIDITY_MEASURE == 'MARKET_CAP')
+    features = FeatureStore(hist_data)
+    engine = BacktestEngine(hist_data, comp_info, strategy_config, features=features)
+    print("✅ Historical and company data acquired.")
+
+    strategies_to_run = ['CORE', 'SMOOTH', 'FROG_IN_PAN']
+    timeframes_to_run = ['MONTHLY', 'WEEKLY']
+
+    # --- Step 2: Backtests ---
+    summaries = []
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    for timeframe in timeframes_to_run:
+        for strategy_name in strategies_to_run:
+            print(f"\n--- Backtesting Strategy={strategy_name}, Timeframe={timeframe} ---")
+            result = engine.run(timeframe, strategy=strategy_name, initial_cash=strategy_config.BACKTEST_INITIAL_CASH)
+            turnover = engine.rank_history(timeframe, strategy=strategy_name).turnover
+            summaries.append({'strategy': strategy_name, 'timeframe': timeframe, **result.summary(),
+                              'avg_long_turnover': float(turnover['long_turnover'].iloc[1:].mean()),
+                              'avg_short_turnover': float(turnover['short_turnover'].iloc[1:].mean())})
+            try:
+                result.equity.to_csv(os.path.join('output', f"{strategy_name}_{timeframe}_backtest_equity_{timestamp}.csv"))
+                result.trades.to_csv(os.path.join('output', f"{strategy_name}_{timeframe}_backtest_trades_{timestamp}.csv"), index=False)
+                turnover.to_csv(os.path.join('output', f"{strategy_name}_{timeframe}_backtest_turnover_{timestamp}.csv"))
+            except Exception as e:
+                logger.error(f"Failed to save backtest results for {strategy_name}: {e}")
+            print(f"✅ Final equity: ${result.equity.iloc[-1]:,.2f} after {len(result.holdings)} rebalances.")
+
+    summary_df = pd.DataFrame(summaries)
+    print("\n================== Backtest Summary ==================")
+    print(summary_df.to_string(index=False))
+    return summary_df
+
+
+if __name__ == "__main__":
+    for dir_name in ['logs', 'data', 'output']:
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+
+    logging_config.setup_logging(log_level='INFO')
+
+    try:
+        run_backtests()
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Backtest run manually interrupted.")
+    except Exception as e:
+        logger.critical(f"An unhandled critical error occurred in the backtest: {e}", exc_info=True)
@@ -0,0 +1,76 @@
+# run_parameter_sweep.py
+"""
+Parameter sweep script for the Quantitative Momentum Trading System.
+
+Backtests every combination of the parameter grid below over BACKTEST_YEARS of
+history in a pool of worker processes, and saves the results table to the
+output directory. Edit PARAMETER_GRID (instead of strategy_config.py) to
+choose what to sweep; settings that are not swept keep their configured values.
+"""
+
+import logging
+import os
+import pandas as pd
+from datetime import datetime
+
+# --- Project-specific Imports ---
+from configs import strategy_config
+from utils import logging_config
+from engine.data_manager import DataManager
+from engine.data_sources import create_data_source
+from engine.parameter_sweep import run_parameter_sweep
+from engine.portfolio_constructor import PortfolioConstructor
+
+logger = logging.getLogger(__name__)
+
+# A dotted name sweeps one entry of a dictionary setting.
+PARAMETER_GRID = {
+    'TOP_PERCENTILE_CUTOFF': [0.01, 0.025, 0.05],
+    'VOLATILITY_CUTOFF_PERCENTILE': [0.5, 0.85],
+    'SMOOTHNESS_MIN_POSITIVE_PERIODS': [6, 7, 8],
+    'MOMENTUM_LOOKBACKS.MONTHLY': [6, 9, 12],
+}
+STRATEGIES = ['CORE', 'SMOOTH', 'FROG_IN_PAN']
+TIMEFRAMES = ['MONTHLY']
+
+
+def main() -> pd.DataFrame:
+    """Acquires the data once and runs the sweep."""
+    print(f"\n--- [Step 1] Acquiring {strategy_config.BACKTEST_YEARS} Years of Historical Data ---")
+    if strategy_config.DATA_SOURCE == 'SYNTHETIC':
+        data_source = create_data_source('SYNTHETIC', num_tickers=strategy_config.SYNTHETIC_NUM_TICKERS,
+                                         num_years=strategy_config.SYNTHETIC_NUM_YEARS, seed=strategy_config.SYNTHETIC_SEED)
+    else:
+        data_source = create_data_source(strategy_config.DATA_SOURCE)
+    data_manager = DataManager(tickers_csv_path=strategy_config.UNIVERSE_TICKERS_CSV_PATH, data_source=data_source)
+    hist_data = data_manager.fetch_historical_data(fields=PortfolioConstructor.required_fields(strategy_config),
+                                                   history_years=strategy_config.BACKTEST_YEARS)
+    if hist_data is None:
+        logger.error("Failed to acquire historical data. Aborting sweep.")
+        return pd.DataFrame()
+    comp_info = data_manager.fetch_company_info(include_market_cap=strategy_config.LIQUIDITY_MEASURE == 'MARKET_CAP')
+    print("✅ Historical and company data acquired.")
+
+    print("\n--- [Step 2] Running Parameter Sweep ---")
+    results = run_parameter_sweep(hist_data, comp_info, strategy_config, PARAMETER_GRID, STRATEGIES, TIMEFRAMES,
+                                  initial_cash=strategy_config.BACKTEST_INITIAL_CASH)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    results_path = os.path.join('output', f"parameter_sweep_{timestamp}.csv")
+    results.to_csv(results_path, index=False)
+    print(f"✅ {len(results)} results saved to: {results_path}")
+    return results
+
+
+if __name__ == "__main__":
+    for dir_name in ['logs', 'data', 'output']:
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+
+    logging_config.setup_logging(log_level='INFO')
+
+    try:
+        main()
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Parameter sweep manually interrupted.")
+    except Exception as e:
+        logger.critical(f"An unhandled critical error occurred in the parameter sweep: {e}", exc_info=True)
@@ -2,9 +2,11 @@
 """
 Offline simulation script for the Quantitative Momentum Trading System.
 
-This script is a clone of the original trader workflow but uses yfinance to
-fetch the most recent closing prices instead of a live connection to
-Interactive Brokers. This allows for completely offline back-testing and analysis.
+This script is a clone of the original trader workflow but takes the most
+recent closing prices from the configured data source (yfinance by default)
+instead of a live connection to Interactive Brokers. With DATA_SOURCE set to
+'LOCAL' or 'SYNTHETIC' in strategy_config, the run needs no network access at
+all, which allows for completely offline back-testing, analysis and load tests.
 
 Its workflow is as follows:
 1.  Acquires the main historical dataset once.
@@ -13,7 +15,7 @@ Its workflow is as follows:
     a. Loads the strategy's specific portfolio state.
     b. Constructs a new target portfolio.
     c. Saves a detailed CSV report with full stock rankings.
-    d. Fetches the latest closing prices from yfinance.
+    d. Fetches the latest closing prices from the data source.
     e. Calculates the exact rebalancing trades needed.
     f. Simulates the trades and saves the new portfolio state file.
 """
@@ -22,7 +24,6 @@ import logging
 import asyncio
 import os
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
 from typing import List, Dict, Any, Tuple
 
@@ -31,7 +32,10 @@ from typing import List, Dict, Any, Tuple
 from configs import strategy_config
 from utils import logging_config
 from engine.data_manager import DataManager
+from engine.data_sources import create_data_source
+from engine.feature_store import FeatureStore
 from engine.portfolio_constructor import PortfolioConstructor
+from engine.signal_state import load_signal_state
 from engine.execution_manager import ExecutionManager
 from engine.simulated_portfolio_manager import SimulatedPortfolioManager
 
@@ -45,40 +49,48 @@ async def run_yfinance_simulation():
 
     # --- Step 1 (Once): Data Acquisition ---
     print("\n--- [Step 1] Acquiring Base Historical Data ---")
-    data_manager = DataManager(tickers_csv_path=strategy_config.UNIVERSE_TICKERS_CSV_PATH)
-    hist_data = data_manager.fetch_historical_data()
+    if strategy_config.DATA_SOURCE == 'SYNTHETIC':
+        data_source = create_data_source('SYNTHETIC', num_tickers=strategy_config.SYNTHETIC_NUM_TICKERS,
+                                         num_years=strategy_config.SYNTHETIC_NUM_YEARS, seed=strategy_config.SYNTHETIC_SEED)
+    else:
+        data_source = create_data_source(strategy_config.DATA_SOURCE)
+    data_manager = DataManager(tickers_csv_path=strategy_config.UNIVERSE_TICKERS_CSV_PATH, data_source=data_source)
+    hist_data = data_manager.fetch_historical_data(fields=PortfolioConstructor.required_fields(strategy_config))
     if hist_data is None:
         logger.error("Failed to acquire historical data. Aborting run.")
         return
     valid_tickers = hist_data.columns.get_level_values('Ticker').unique().tolist()
     data_manager.universe_tickers = valid_tickers
-    comp_info = data_manager.fetch_company_info()
+    comp_info = data_manager.fetch_company_info(include_market_cap=strategy_config.LIQUIDITY_MEASURE == 'MARKET_CAP')
     print("✅ Base historical and company data acquired.")
 
     # --- Define Strategies to Run ---
     strategies_to_run = ['FROG_IN_PAN', 'CORE']
     timeframes_to_run = ['WEEKLY', 'DAILY']
 
+    # The DAILY signals are advanced by the new bars from their checkpoint instead of recomputed.
+    signal_state = load_signal_state(data_manager.signal_state_path, hist_data, strategy_config) if 'DAILY' in timeframes_to_run else None
+    # Resampled prices, returns and trailing statistics are computed once and shared by all constructors.
+    features = FeatureStore(hist_data, signal_state=signal_state)
+
     # --- Main Loop to run for each strategy ---
     for timeframe in timeframes_to_run:
         for strategy_name in strategies_to_run:
             print(f"\n\n================== Running Simulation for Strategy: {strategy_name}, Timeframe: {timeframe} ==================")
             logger.info(f"--- Starting simulation for strategy: {strategy_name}, timeframe: {timeframe} ---")
 
-            # --- Set the current strategy in the config object ---
-            strategy_config.STRATEGY_NAME = strategy_name
-
             # --- Step 2: Load Simulated Portfolio for the specific strategy ---
             portfolio_file = f'{strategy_name}_{timeframe}_portfolio_state.csv'
             print(f"\n--- [Step 2/7] Loading Portfolio for {strategy_name} ({timeframe}) ---")
-            portfolio_csv_path = os.path.join('data', portfolio_file)
+            portfolio_csv_path = os.path.join(data_manager.cache_dir, portfolio_file)
             sim_portfolio = SimulatedPortfolioManager(csv_path=portfolio_csv_path, initial_cash=5000.0)
             print(f"✅ Portfolio loaded. Cash: ${sim_portfolio.cash:,.2f}, Current Positions: {len(sim_portfolio.positions)}")
 
             # --- Step 3: Portfolio Construction ---
             print(f"\n--- [Step 3/7] Constructing Portfolio for {strategy_name} ({timeframe}) ---")
-            portfolio_constructor = PortfolioConstructor(hist_data, comp_info, strategy_config)
-            target_portfolio, detailed_report_df = portfolio_constructor.generate_target_portfolio(timeframe=timeframe)
+            portfolio_constructor = PortfolioConstructor(hist_data, comp_info, strategy_config, features=features)
+            portfolio_result = portfolio_constructor.construct(timeframe=timeframe, strategy=strategy_name)
+            target_portfolio = portfolio_result.target_portfolio
             print(f"✅ Target Portfolio generated. Longs: {len(target_portfolio['longs'])}, Shorts: {len(target_portfolio['shorts'])}")
 
             # Save the detailed analysis report with a unique timestamp
@@ -86,67 +98,28 @@ async def run_yfinance_simulation():
                 timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
                 filename = f"{strategy_name}_{timeframe}_report_{timestamp}.csv"
                 report_path = os.path.join('output', filename)
-                report_cols = ['Rank', 'Decile', 'Momentum', 'Volatility', 'PositivePeriods', 'marketCap', 'sector']
-                final_cols = [col for col in report_cols if col in detailed_report_df.columns]
-                detailed_report_df[final_cols].to_csv(report_path)
+                portfolio_result.save_report(report_path)
                 print(f"✅ Detailed strategy report saved to: {report_path}")
             except Exception as e:
                 logger.error(f"Failed to save detailed report for {strategy_name}: {e}")
 
-            # --- Step 4: Fetch Latest Prices from yfinance ---
-            print(f"\n--- [Step 4/7] Fetching Latest Prices from yfinance ---")
-            live_prices = {}
-            tickers_needed = list(set(sim_portfolio.positions.keys()) | set(target_portfolio.get('longs', [])) | set(target_portfolio.get('shorts', [])))
-
-            if tickers_needed:
-                try:
-                    # Fetch last 2 days to ensure we get the most recent closing price
-                    data = yf.download(tickers=tickers_needed, period="2d", interval="1d", progress=False)
-                    if not data.empty and 'Adj Close' in data:
-                        # Get the last available closing price for each ticker
-                        last_prices = data['Adj Close'].iloc[-1]
-                        live_prices = last_prices.dropna().to_dict()
-                        print(f"✅ Fetched {len(live_prices)} prices from yfinance.")
-                    else:
-                        logger.warning(f"yfinance returned no data for tickers: {tickers_needed}")
-                        print("- yfinance returned no data.")
-                except Exception as e:
-                    logger.error(f"An error occurred while fetching prices from yfinance: {e}")
-            else:
-                print("- No tickers needed for price fetching.")
-
-
-            # --- Step 5: Fetch Prices from yfinance ---
-            print(f"\n--- [Step 5/7] Fetching Latest Prices from yfinance ---")
+            # --- Step 4: Fetch Latest Prices from the data source ---
+            print(f"\n--- [Step 4/7] Fetching Latest Prices from {strategy_config.DATA_SOURCE} data source ---")
             tickers_needed = list(set(sim_portfolio.positions.keys()) | set(target_portfolio.get('longs', [])) | set(target_portfolio.get('shorts', [])))
             live_prices = {}
             if tickers_needed:
-                print(f"Fetching prices for {len(tickers_needed)} unique tickers one by one for robustness...")
-                for ticker in tickers_needed:
-                    try:
-                        # Fetch data for a single ticker. Requesting a short history is more reliable.
-                        ticker_data = yf.Ticker(ticker)
-                        hist = ticker_data.history(period="5d", auto_adjust=True) # auto_adjust=True gives adjusted prices
-                        if not hist.empty:
-                            # The last available closing price
-                            last_price = hist['Close'].iloc[-1]
-                            live_prices[ticker] = last_price
-                        else:
-                            logger.warning(f"yfinance returned no historical data for {ticker}.")
-                    except Exception as e:
-                        logger.error(f"An exception occurred while fetching price for {ticker} from yfinance: {e}")
-                
-                print(f"✅ Fetched {len(live_prices)} of {len(tickers_needed)} prices from yfinance.")
+                live_prices = data_manager.data_source.fetch_latest_prices(tickers_needed)
+                print(f"✅ Fetched {len(live_prices)} of {len(tickers_needed)} prices.")
             else:
                 print("- No tickers needed for price fetching.")
 
-            # --- Step 6: Trade Calculation ---
-            print(f"\n--- [Step 6/8] Portfolio Valuation ---")
+            # --- Step 5: Portfolio Valuation ---
+            print(f"\n--- [Step 5/7] Portfolio Valuation ---")
             total_portfolio_value = sim_portfolio.get_total_value(live_prices)
             print(f"✅ Current Total Portfolio Value: ${total_portfolio_value:,.2f}")
 
-            # --- Step 7: Simulate & Save Portfolio State ---
-            print(f"\n--- [Step 7/8] Calculating Rebalance Orders ---")
+            # --- Step 6: Trade Calculation ---
+            print(f"\n--- [Step 6/7] Calculating Rebalance Orders ---")
             execution_manager = ExecutionManager(ibkr_handler=None, config=strategy_config)
             calculated_orders = await execution_manager.calculate_rebalance_orders(
                 target_portfolio,
@@ -162,8 +135,8 @@ async def run_yfinance_simulation():
             else:
                 print("  - No trades needed.")
 
-            # --- Step 8/8: Simulate Trades & Save Portfolio State ---
-            print(f"\n--- [Step 8/8] Simulating Trades & Saving Portfolio State ---")
+            # --- Step 7: Simulate Trades & Save Portfolio State ---
+            print(f"\n--- [Step 7/7] Simulating Trades & Saving Portfolio State ---")
             sim_portfolio.simulate_trades(all_orders, live_prices)
             sim_portfolio.save_portfolio()
             print(f"✅ New portfolio state saved to {portfolio_csv_path}")
@@ -0,0 +1,66 @@
+# tests/test_company_info_fetching.py
+"""
+Tests the market cap worker pool of DataManager.fetch_company_info against a
+local fake info provider: retries, permanent failures and the shared rate limit.
+"""
+
+import threading
+import time
+
+from configs import strategy_config
+from engine.data_manager import DataManager
+from engine.data_sources import SyntheticDataSource
+
+NUM_TICKERS = 40
+REQUESTS_PER_SECOND = 20.0
+MAX_RETRIES = 2
+FLAKY_TICKER = 'SYN00001'  # Fails twice, then succeeds.
+BROKEN_TICKER = 'SYN00002'  # Fails on every attempt.
+
+
+class FakeInfoProvider:
+    """Records the time of every request and fails some tickers."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.request_times = []
+
+    def __call__(self, ticker):
+        with self._lock:
+            self.calls[ticker] = self.calls.get(ticker, 0) + 1
+            self.request_times.append(time.monotonic())
+            attempt = self.calls[ticker]
+        if ticker == BROKEN_TICKER or (ticker == FLAKY_TICKER and attempt <= 2):
+            raise ConnectionError(f"Simulated failure for {ticker}")
+        return {'marketCap': 1e9 + int(ticker[3:])}
+
+
+def test_fetch_company_info_with_fake_provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(strategy_config, 'COMPANY_INFO_REQUESTS_PER_SECOND', REQUESTS_PER_SECOND)
+    monkeypatch.setattr(strategy_config, 'COMPANY_INFO_MAX_WORKERS', 8)
+    monkeypatch.setattr(strategy_config, 'COMPANY_INFO_MAX_RETRIES', MAX_RETRIES)
+    monkeypatch.setattr(strategy_config, 'COMPANY_INFO_RETRY_BACKOFF_S', 0.01)
+    provider = FakeInfoProvider()
+    data_manager = DataManager('unused.csv', info_provider=provider,
+                               data_source=SyntheticDataSource(num_tickers=NUM_TICKERS, num_years=1),
+                               cache_dir=str(tmp_path))
+
+    company_info = data_manager.fetch_company_info()
+
+    # Transient failures are retried until the lookup succeeds.
+    assert provider.calls[FLAKY_TICKER] == 3
+    assert company_info[FLAKY_TICKER]['marketCap'] == 1e9 + 1
+    # A permanently failing ticker is left out after its retries, without aborting the batch.
+    assert provider.calls[BROKEN_TICKER] == MAX_RETRIES + 1
+    assert company_info[BROKEN_TICKER]['marketCap'] is None
+    others = [t for t in data_manager.universe_tickers if t not in (FLAKY_TICKER, BROKEN_TICKER)]
+    assert all(provider.calls[t] == 1 for t in others)
+    assert all(company_info[t]['marketCap'] is not None for t in others)
+
+    # The token bucket (capacity one second of budget) caps the aggregate request rate.
+    times = sorted(provider.request_times)
+    capacity = REQUESTS_PER_SECOND
+    for window_s in (0.5, 1.0):
+        max_in_window = max(sum(1 for t in times[i:] if t - start < window_s) for i, start in enumerate(times))
+        assert max_in_window <= capacity + REQUESTS_PER_SECOND * window_s + 1
+    assert times[-1] - times[0] >= (len(times) - capacity) / REQUESTS_PER_SECOND * 0.9
@@ -0,0 +1,60 @@
+# tests/test_ibkr_order_tracker.py
+"""
+Tests that TWS errors only update the tracked state of the orders they belong to.
+"""
+
+import asyncio
+
+from ibapi.contract import Contract
+from ibapi.order import Order
+
+from handlers.ibkr_base_handler import IBKRBaseHandler
+from handlers.ibkr_order_tracker import PENDING_SUBMIT, REJECTED
+
+
+def _handler_with_order(order_id: int) -> IBKRBaseHandler:
+    """Returns a disconnected handler that tracks one placed BUY order with the given ID."""
+    handler = IBKRBaseHandler()
+    contract = Contract()
+    contract.symbol = 'AAPL'
+    order = Order()
+    order.action = 'BUY'
+    order.totalQuantity = 10
+    handler.order_tracker.register(order_id, contract, order)
+    return handler
+
+
+def test_error_for_non_order_req_id_leaves_order_unchanged():
+    async def run():
+        handler = _handler_with_order(101)
+        req_id = handler.get_next_req_id()
+        assert req_id != 101
+        # A late error for a cancelled market data request, and one for an unknown ID.
+        handler.wrapper.error(req_id, 300, "Can't find EId with tickerId")
+        handler.wrapper.error(102, 200, "No security definition has been found for the request")
+        tracked = handler.order_tracker.get(101)
+        assert tracked.state == PENDING_SUBMIT
+        assert tracked.error is None
+    asyncio.run(run())
+
+
+def test_error_for_order_id_rejects_order():
+    async def run():
+        handler = _handler_with_order(101)
+        handler.wrapper.error(101, 201, "Order rejected")
+        tracked = handler.order_tracker.get(101)
+        assert tracked.state == REJECTED
+        assert tracked.error == "Code 201: Order rejected"
+    asyncio.run(run())
+
+
+def test_request_ids_never_reach_the_order_id_range():
+    handler = IBKRBaseHandler()
+    handler.wrapper.next_valid_order_id = 101
+    handler._initialize_req_id_counter()
+    first = handler.get_next_req_id()
+    # A repeated nextValidId must not move the counter back onto IDs already used.
+    handler._initialize_req_id_counter()
+    second = handler.get_next_req_id()
+    assert first > IBKRBaseHandler.REQUEST_ID_BASE
+    assert second > first
@@ -17,6 +17,7 @@ from typing import List, Literal
 from configs import strategy_config, ibkr_config
 from utils import logging_config
 from engine.data_manager import DataManager
+from engine.feature_store import FeatureStore
 from engine.portfolio_constructor import PortfolioConstructor
 from engine.execution_manager import ExecutionManager
 from engine.simulated_portfolio_manager import SimulatedPortfolioManager
@@ -33,11 +34,13 @@ async def run_simulation_workflow():
     # --- Step 1 (Once): Data Acquisition ---
     print("\n--- [Step 1] Acquiring Base Historical Data (once for all simulations) ---")
     data_manager = DataManager(tickers_csv_path=strategy_config.UNIVERSE_TICKERS_CSV_PATH)
-    hist_data = data_manager.fetch_historical_data()
+    hist_data = data_manager.fetch_historical_data(fields=PortfolioConstructor.required_fields(strategy_config))
     if hist_data is None:
         logger.error("Failed to acquire historical data. Aborting run.")
         return
-    comp_info = data_manager.fetch_company_info()
+    comp_info = data_manager.fetch_company_info(include_market_cap=strategy_config.LIQUIDITY_MEASURE == 'MARKET_CAP')
+    # Resampled prices, returns and trailing statistics are computed once and shared by all constructors.
+    features = FeatureStore(hist_data)
     print("✅ Base historical and company data acquired.")
 
     # --- Define Strategies and Timeframes to Run ---
@@ -50,9 +53,6 @@ async def run_simulation_workflow():
             print(f"\n\n================== Running: Strategy={strategy_name}, Timeframe={timeframe} ==================")
             logger.info(f"--- Starting simulation for Strategy: {strategy_name}, Timeframe: {timeframe} ---")
 
-            # --- Set the current strategy in the config object ---
-            strategy_config.STRATEGY_NAME = strategy_name
-
             # --- Step 2: Load Simulated Portfolio ---
             portfolio_file = f'{strategy_name}_{timeframe}_portfolio_state.csv'
             portfolio_csv_path = os.path.join('data', portfolio_file)
@@ -62,8 +62,9 @@ async def run_simulation_workflow():
 
             # --- Step 3: Portfolio Construction ---
             print(f"\n--- [Step 3/7] Constructing Target Portfolio ---")
-            portfolio_constructor = PortfolioConstructor(hist_data, comp_info, strategy_config)
-            target_portfolio, detailed_report_df = portfolio_constructor.generate_target_portfolio(timeframe=timeframe)
+            portfolio_constructor = PortfolioConstructor(hist_data, comp_info, strategy_config, features=features)
+            portfolio_result = portfolio_constructor.construct(timeframe=timeframe, strategy=strategy_name)
+            target_portfolio = portfolio_result.target_portfolio
             print(f"✅ Target Portfolio generated. Longs: {len(target_portfolio['longs'])}, Shorts: {len(target_portfolio['shorts'])}")
 
             # Save the detailed report
@@ -71,9 +72,7 @@ async def run_simulation_workflow():
                 timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
                 report_file = f"{strategy_name}_{timeframe}_report_{timestamp}.csv"
                 report_path = os.path.join('output', report_file)
-                report_cols = ['Rank', 'Decile', 'Momentum', 'Volatility', 'PositivePeriods', 'marketCap', 'sector']
-                final_cols = [col for col in report_cols if col in detailed_report_df.columns]
-                detailed_report_df[final_cols].to_csv(report_path)
+                portfolio_result.save_report(report_path)
                 print(f"✅ Detailed report saved to: {report_path}")
             except Exception as e:
                 logger.error(f"Failed to save detailed report: {e}")
@@ -0,0 +1,90 @@
+# utils/rate_limiter.py
+"""
+Rate limiting helpers for the Quantitative Momentum Trading System.
+
+Provides a thread-safe token bucket that lets many concurrent workers share a
+single request budget (e.g., requests per second against a data API) while
+still allowing short bursts up to the bucket capacity. Worker threads block in
+`acquire`; coroutines await `acquire_async`, which sleeps without blocking the
+event loop.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+
+    Tokens are added continuously at `rate` tokens per second, up to `capacity`.
+    Each request consumes one (or more) tokens and blocks until enough tokens
+    are available.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initializes the bucket, starting full.
+
+        Args:
+            rate (float): The refill rate in tokens per second. Must be positive.
+            capacity (Optional[float]): The maximum burst size. Defaults to `rate` (one second of budget).
+        """
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}.")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, float(rate))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Adds the tokens accrued since the last refill. Must be called with the lock held."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Attempts to consume tokens without blocking.
+
+        Args:
+            tokens (float): The number of tokens to consume.
+
+        Returns:
+            float: 0.0 if the tokens were consumed, otherwise the number of seconds
+                   to wait before enough tokens will be available.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Blocks the calling thread until the requested tokens have been consumed.
+
+        Args:
+            tokens (float): The number of tokens to consume.
+        """
+        while True:
+            wait_s = self.try_acquire(tokens)
+            if wait_s == 0.0:
+                return
+            time.sleep(wait_s)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        """
+        Waits, without blocking the event loop, until the requested tokens have been consumed.
+
+        Args:
+            tokens (float): The number of tokens to consume.
+        """
+        while True:
+            wait_s = self.try_acquire(tokens)
+            if wait_s == 0.0:
+                return
+            await asyncio.sleep(wait_s)